@@ -1,10 +1,28 @@
 import streamlit as st
-from langchain.chains import GraphCypherQAChain
-from langchain_community.graphs import Neo4jGraph
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.memory import ConversationBufferMemory
-from config import NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD, GEMINI_API_KEY
-import time
+from config import (
+    NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD, GEMINI_API_KEY,
+    QA_CACHE_BACKEND, QA_CACHE_PATH, QA_CACHE_TTL, QA_CACHE_MAX_ENTRIES,
+    CYPHER_TEMPLATE_STORE, CYPHER_TEMPLATE_MAX_LEARNED,
+    CONTEXT_MAX_PROMPT_TOKENS, CONTEXT_MAX_SUMMARY_TOKENS, CONTEXT_MAX_MESSAGES,
+    CONTEXT_MAX_MESSAGE_CHARS, CONTEXT_SUMMARIZER,
+    ASYNC_EXECUTION, LLM_MAX_CONCURRENCY, DB_MAX_CONCURRENCY, MAX_PENDING_REQUESTS,
+    SIMILARITY_INDEX_FILE, METRICS_PORT, RESULT_PAGE_SIZE, APP_PREWARM,
+    ENTITY_INDEX_FILE, ENTITY_MATCH_THRESHOLD,
+)
+from chatbot.cache import ReloadingFile, create_query_cache, get_graph_version, is_self_contained
+from chatbot.context import ConversationContext, extractive_summarizer, llm_summarizer
+from chatbot.entities import EntityResolver, Resolution
+from chatbot.executor import AsyncExecutor
+from chatbot.results import ResultPager
+from chatbot.streaming import astream_answer, format_timings, stream_answer
+from chatbot.templates import TemplateEngine
+from chatbot.tools import SimilarityTool
+from chatbot.warmup import Warmup, readiness
+from database.audit import record_query
+from database.driver import check_health, read_query
+from database.entities import EntityIndex
+from database.similarity import SimilarityIndex
+from tracing import TRACER
 
 # Page configuration
 st.set_page_config(
@@ -58,45 +76,168 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Initialize session state
-if "messages" not in st.session_state:
-    st.session_state.messages = []
-if "memory" not in st.session_state:
-    st.session_state.memory = ConversationBufferMemory(return_messages=True)
 if "processing" not in st.session_state:
     st.session_state.processing = False
 if "last_query" not in st.session_state:
     st.session_state.last_query = None
+if "last_timings" not in st.session_state:
+    st.session_state.last_timings = None
+if "last_result" not in st.session_state:
+    st.session_state.last_result = None
+
+# Start-up steps, run once per process on a background thread. langchain and
+# the Gemini client are imported here rather than at the top of the script,
+# so the page renders while they load.
+def create_llm(warmup):
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0, google_api_key=GEMINI_API_KEY)
+
+def open_neo4j_pool(warmup):
+    health = check_health()
+    if not health["ok"]:
+        raise ConnectionError(health["error"])
+    return health
+
+def connect_neo4j_graph(warmup):
+    from chatbot.graph import connect_graph
+    warmup.result("neo4j")
+    return connect_graph(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
+
+# LLM chain (stateless: conversation context is passed in the question)
+def create_llm_chain(warmup):
+    from langchain.chains import GraphCypherQAChain
+    from chatbot.prompts import CYPHER_GENERATION_PROMPT
+    llm = warmup.result("llm")
+    return GraphCypherQAChain.from_llm(
+        cypher_llm=llm,
+        qa_llm=llm,
+        graph=warmup.result("graph"),
+        cypher_prompt=CYPHER_GENERATION_PROMPT,
+        verbose=True,
+        validate_cypher=True,
+        return_direct=False,
+        allow_dangerous_requests=True
+    )
+
+# Name index built at load time, for resolving artist/album/song names;
+# reloaded whenever a load rewrites it
+def load_entity_resolver(warmup):
+    resolver = ReloadingFile(ENTITY_INDEX_FILE,
+                             lambda path: EntityResolver(EntityIndex.load(path), ENTITY_MATCH_THRESHOLD))
+    resolver.get()
+    return resolver
 
-# Initialize Neo4j connection
 @st.cache_resource
+def init_warmup():
+    return Warmup([
+        ("llm", create_llm),
+        ("neo4j", open_neo4j_pool),
+        ("graph", connect_neo4j_graph),
+        ("chain", create_llm_chain),
+        ("entities", load_entity_resolver),
+    ])
+
+# Initialize Neo4j connection
 def init_neo4j_connection():
     try:
-        graph = Neo4jGraph(url=NEO4J_URI, username=NEO4J_USERNAME, password=NEO4J_PASSWORD)
-        graph.refresh_schema()
-        return graph
+        return init_warmup().result("graph")
     except Exception as e:
         st.error(f"❌ Failed to connect to Neo4j: {e}")
         return None
 
-# Initialize LLM chain
-def init_llm_chain(_graph):
+# Initialize answer cache (shared by every session in this process)
+@st.cache_resource
+def init_query_cache():
+    try:
+        return create_query_cache(QA_CACHE_BACKEND, QA_CACHE_PATH, QA_CACHE_MAX_ENTRIES, QA_CACHE_TTL)
+    except Exception as e:
+        st.warning(f"⚠️ Answer cache disabled: {e}")
+        return None
+
+# Initialize the shared async execution layer (one event loop for all sessions)
+@st.cache_resource
+def init_executor():
     try:
-        llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0, google_api_key=GEMINI_API_KEY)
-        chain = GraphCypherQAChain.from_llm(
-            cypher_llm=llm,
-            qa_llm=llm,
-            graph=_graph,
-            verbose=True,
-            validate_cypher=True,
-            return_direct=False,
-            memory=st.session_state.memory,
-            allow_dangerous_requests=True
+        return AsyncExecutor(
+            NEO4J_URI, (NEO4J_USERNAME, NEO4J_PASSWORD),
+            llm_concurrency=LLM_MAX_CONCURRENCY,
+            db_concurrency=DB_MAX_CONCURRENCY,
+            max_pending=MAX_PENDING_REQUESTS,
         )
-        return chain
+    except Exception as e:
+        st.warning(f"⚠️ Async execution disabled: {e}")
+        return None
+
+# Initialize NL->Cypher template engine (learned templates are shared by all sessions)
+@st.cache_resource
+def init_template_engine():
+    return TemplateEngine(CYPHER_TEMPLATE_STORE, CYPHER_TEMPLATE_MAX_LEARNED)
+
+# Audio-feature similarity index built at load time, reloaded after every load
+@st.cache_resource
+def init_similarity_file():
+    return ReloadingFile(SIMILARITY_INDEX_FILE, lambda path: SimilarityTool(SimilarityIndex.load(path)))
+
+# Initialize the audio-feature similarity tool (None until the loader has built the index)
+def init_similarity_tool():
+    try:
+        return init_similarity_file().get()
+    except Exception as e:
+        st.warning(f"⚠️ Similarity index unavailable: {e}")
+        return None
+
+# Initialize entity resolution (None when the loader has not built the name index yet)
+def init_entity_resolver():
+    try:
+        return init_warmup().result("entities").get()
+    except Exception as e:
+        st.warning(f"⚠️ Entity resolution unavailable: {e}")
+        return None
+
+# Serve Prometheus metrics for every session's traces from this process
+@st.cache_resource
+def init_metrics_server():
+    if not METRICS_PORT:
+        return None
+    try:
+        return TRACER.serve_metrics(METRICS_PORT, readiness=readiness)
+    except OSError as e:
+        st.warning(f"⚠️ Metrics endpoint disabled: {e}")
+        return None
+
+# Initialize LLM client (shared by the chain and the context summarizer)
+def init_llm():
+    return init_warmup().result("llm")
+
+# Initialize LLM chain
+def init_llm_chain():
+    try:
+        return init_warmup().result("chain")
     except Exception as e:
         st.error(f"❌ Failed to initialize LLM: {e}")
         return None
 
+# Per-session conversation: bounded history plus rolling summary
+def new_conversation():
+    if CONTEXT_SUMMARIZER == "llm":
+        summarizer = llm_summarizer(init_llm(), CONTEXT_MAX_SUMMARY_TOKENS)
+    else:
+        summarizer = extractive_summarizer(CONTEXT_MAX_SUMMARY_TOKENS)
+    return ConversationContext(
+        max_prompt_tokens=CONTEXT_MAX_PROMPT_TOKENS,
+        max_summary_tokens=CONTEXT_MAX_SUMMARY_TOKENS,
+        max_messages=CONTEXT_MAX_MESSAGES,
+        max_message_chars=CONTEXT_MAX_MESSAGE_CHARS,
+        summarizer=summarizer,
+    )
+
+init_metrics_server()
+if APP_PREWARM:
+    init_warmup()
+
+if "conversation" not in st.session_state:
+    st.session_state.conversation = new_conversation()
+
 # Header
 st.markdown('<h1 class="main-header">🎵 Music Graph Chatbot</h1>', unsafe_allow_html=True)
 st.markdown("Ask questions about artists, songs, and albums in the music database")
@@ -107,16 +248,17 @@ with st.sidebar:
     
     if st.button("🔄 Refresh Connection", use_container_width=True):
         st.cache_resource.clear()
-        st.session_state.messages = []
+        st.session_state.conversation = new_conversation()
         st.session_state.processing = False
         st.session_state.last_query = None
+        st.session_state.last_result = None
         st.rerun()
     
     if st.button("🧹 Clear Chat", use_container_width=True):
-        st.session_state.messages = []
-        st.session_state.memory.clear()
+        st.session_state.conversation.clear()
         st.session_state.processing = False
         st.session_state.last_query = None
+        st.session_state.last_result = None
         st.rerun()
     
     st.header("💡 Example Queries")
@@ -138,11 +280,26 @@ chat_container = st.container()
 
 with chat_container:
     # Display chat history
-    for message in st.session_state.messages:
+    if st.session_state.conversation.evicted:
+        st.caption(f"{st.session_state.conversation.evicted} earlier messages were summarized")
+    for message in st.session_state.conversation:
         if message["role"] == "user":
             st.markdown(f'<div class="user-message">👤 {message["content"]}</div>', unsafe_allow_html=True)
         else:
             st.markdown(f'<div class="bot-message">🤖 {message["content"]}</div>', unsafe_allow_html=True)
+    if st.session_state.last_timings:
+        st.caption(f"⏱️ {st.session_state.last_timings}")
+    
+    # Full result of the last answer, a page at a time; later pages are
+    # only queried from Neo4j when asked for
+    pager = st.session_state.last_result
+    if pager is not None and pager.rows:
+        more = "" if pager.exhausted else "+"
+        with st.expander(f"📋 Results ({len(pager.rows)}{more} rows)"):
+            st.dataframe(pager.rows, use_container_width=True)
+            if not pager.exhausted and st.button("Load more rows", key="load_more_rows"):
+                pager.load_more()
+                st.rerun()
 
 # Query input at the bottom
 user_query = st.text_input(
@@ -158,8 +315,7 @@ if user_query and user_query != st.session_state.last_query and not st.session_s
     st.session_state.last_query = user_query
     
     # Add user message to history
-    st.session_state.messages.append({"role": "user", "content": user_query})
-    st.session_state.memory.chat_memory.add_user_message(user_query)
+    st.session_state.conversation.add_user_message(user_query)
     
     response_placeholder = st.empty()
     
@@ -167,33 +323,91 @@ if user_query and user_query != st.session_state.last_query and not st.session_s
         # Initialize connections
         graph = init_neo4j_connection()
         if graph:
-            chain = init_llm_chain(graph)
+            response = None
+            chain = init_llm_chain()
             
             if chain:
-                # Show typing indicator
-                typing_dots = ""
+                response_placeholder.markdown('<div class="bot-message">🤖 Thinking...</div>', unsafe_allow_html=True)
+                
+                # Answers to self-contained questions only depend on the graph, so
+                # they can be served from cache until the loader bumps the version.
+                cache = init_query_cache() if is_self_contained(user_query) else None
+                cache_state = {}
+                
+                def lookup():
+                    cache_state["version"] = get_graph_version(graph)
+                    return cache.get(user_query, cache_state["version"])
+                
+                # Names the user typed loosely ("queen", "Beyonce") become the
+                # exact names and ids stored in the graph before anything matches
+                resolver = init_entity_resolver()
+                with TRACER.span("entity_resolution") as span:
+                    resolution = resolver.resolve(user_query) if resolver else Resolution(user_query, [])
+                    span.set(rows=len(resolution.entities))
+                question = resolution.question
                 
-                for i in range(3):
-                    typing_dots += "."
-                    response_placeholder.markdown(f'<div class="bot-message">🤖 Thinking{typing_dots}</div>', unsafe_allow_html=True)
-                    time.sleep(0.3)
+                # Recognised question shapes skip Cypher generation entirely:
+                # audio-feature questions are answered by the in-process
+                # similarity index, the rest by Cypher templates.
+                templates = init_template_engine() if is_self_contained(user_query) else None
+                similarity = init_similarity_tool() if templates else None
+                match = similarity.match(question) if similarity else None
+                if match is None and templates:
+                    match = templates.match(question)
                 
-                # Get response
-                history = "\n".join([f"{m['role']}: {m['content']}" for m in st.session_state.messages[-5:]])
-                contextual_query = f"Conversation so far:\n{history}\n\nUser now asks: {user_query}"
-                result = chain.invoke({"query": contextual_query})
+                contextual_query = resolution.annotate(st.session_state.conversation.contextual_query())
                 
-                if result and 'result' in result:
-                    response = result['result']
-                    st.session_state.messages.append({"role": "assistant", "content": response})
-                    st.session_state.memory.chat_memory.add_ai_message(response)
+                # Stream the answer into the chat bubble as tokens arrive
+                executor = init_executor() if ASYNC_EXECUTION else None
+                if executor:
+                    events = executor.iterate(astream_answer(
+                        executor, chain, graph, user_query, contextual_query, match, lookup if cache else None
+                    ))
+                else:
+                    events = stream_answer(chain, graph, user_query, contextual_query, match, lookup if cache else None)
+                
+                cypher, context, truncated, partial, timings = None, None, False, "", {}
+                generated = False  # the LLM wrote the Cypher (also when a template found nothing)
+                for event in events:
+                    if event.kind == "cypher":
+                        cypher, generated = event.value, event.source == "llm"
+                    elif event.kind == "context":
+                        context, truncated = event.value, event.truncated
+                        response_placeholder.markdown(
+                            f'<div class="bot-message">🤖 Found {len(context)} results, writing answer...</div>',
+                            unsafe_allow_html=True
+                        )
+                    elif event.kind == "token":
+                        partial += event.value
+                        response_placeholder.markdown(f'<div class="bot-message">🤖 {partial}▌</div>', unsafe_allow_html=True)
+                    elif event.kind == "done":
+                        response, timings = event.value, event.timings
+                        st.session_state.last_timings = format_timings(timings)
+                
+                # Everything the LLM wrote is kept for the index audit
+                if generated and cypher and "cache" not in timings:
+                    record_query(cypher)
+                
+                # Cypher the LLM wrote that returned rows becomes a template
+                if templates and generated and cypher and context:
+                    templates.learn(question, cypher)
+                
+                st.session_state.last_result = ResultPager(
+                    context, RESULT_PAGE_SIZE, truncated, cypher, None if generated else getattr(match, "params", None),
+                    fetch=read_query,
+                ) if context else None
+                
+                if response is not None and cache and "cache" not in timings:
+                    cache.set(user_query, cache_state["version"], response)
                 
-                # Clear typing indicator
                 response_placeholder.empty()
             
+            if response is not None:
+                st.session_state.conversation.add_ai_message(response)
+            
     except Exception as e:
         error_msg = f"Sorry, I encountered an error: {str(e)}"
-        st.session_state.messages.append({"role": "assistant", "content": error_msg})
+        st.session_state.conversation.add_ai_message(error_msg)
         st.error(error_msg)
     finally:
         st.session_state.processing = False
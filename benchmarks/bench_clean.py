@@ -0,0 +1,43 @@
+"""Micro-benchmark for clean_music_data.
+
+Usage: python -m benchmarks.bench_clean [--rows 32833] [--repeat 5] [--budget 1.0]
+
+Exits non-zero when the best run exceeds the time budget (seconds).
+"""
+import argparse
+import sys
+import time
+
+from benchmarks.synthetic import make_spotify_frame
+from database.loader import clean_music_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time clean_music_data on a synthetic Spotify frame")
+    parser.add_argument("--rows", type=int, default=32833, help="rows in the synthetic frame (real file: 32833)")
+    parser.add_argument("--repeat", type=int, default=5, help="number of timed runs")
+    parser.add_argument("--budget", type=float, default=1.0, help="fail if the best run takes longer (seconds)")
+    parser.add_argument("--pyarrow", action="store_true", help="clean an Arrow-backed frame")
+    args = parser.parse_args()
+
+    df = make_spotify_frame(args.rows)
+    if args.pyarrow:
+        df = df.convert_dtypes(dtype_backend="pyarrow")
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        cleaned = clean_music_data(df)
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    print(f"clean_music_data: {len(df)} rows -> {len(cleaned)} rows")
+    print(f"  best {best * 1000:.1f} ms, median {sorted(timings)[len(timings) // 2] * 1000:.1f} ms")
+    if best > args.budget:
+        print(f"  over budget ({args.budget:.2f}s)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""Cold import cost of the modules app.py needs.
+
+Usage: python -m benchmarks.bench_startup [--repeat 3] [--budget 1.0]
+
+Each module is imported in a fresh interpreter, so every number is a cold
+start. "page" modules are imported before the first render; "warmup" modules
+are imported on the background start-up thread (see chatbot/warmup.py).
+Exits non-zero when the page imports together exceed the budget (seconds).
+"""
+import argparse
+import subprocess
+import sys
+
+PAGE_MODULES = [
+    "streamlit", "config", "chatbot.cache", "chatbot.context", "chatbot.entities", "chatbot.executor",
+    "chatbot.results", "chatbot.streaming", "chatbot.templates", "chatbot.tools", "chatbot.warmup",
+    "database.audit", "database.driver", "database.entities", "database.similarity", "tracing",
+]
+WARMUP_MODULES = ["langchain_google_genai", "chatbot.graph", "langchain.chains", "chatbot.prompts"]
+
+TIMER = "import time; start = time.perf_counter(); import {modules}; print(time.perf_counter() - start)"
+
+
+def import_seconds(modules, repeat):
+    """Best cold import time of `modules` over `repeat` fresh interpreters, or None if one is missing"""
+    timings = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-c", TIMER.format(modules=", ".join(modules))],
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            return None
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time cold imports of the app's modules")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters per module")
+    parser.add_argument("--budget", type=float, default=1.0, help="fail if the page imports take longer (seconds)")
+    args = parser.parse_args()
+
+    for group, modules in (("page", PAGE_MODULES), ("warmup", WARMUP_MODULES)):
+        print(f"== {group} ==")
+        for module in modules:
+            seconds = import_seconds([module], args.repeat)
+            print(f"  {module}: " + ("not installed" if seconds is None else f"{seconds * 1000:.0f} ms"))
+
+    page = import_seconds(PAGE_MODULES, args.repeat)
+    if page is None:
+        print("Some page modules are not installed; skipping the budget check")
+        return 0
+    print(f"All page imports: {page * 1000:.0f} ms (budget {args.budget * 1000:.0f} ms)")
+    return 0 if page <= args.budget else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""In-process stand-in for a Neo4j driver, used when no database is available.
+
+It accepts every statement and returns no rows, so timings measure only the
+client side: cleaning, row building, batching, partitioning and the answer
+pipeline. Each statement and its row count are tallied for the report.
+"""
+import threading
+
+
+class StandInResult:
+    def __init__(self, records=()):
+        self._records = list(records)
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def data(self):
+        return list(self._records)
+
+    def single(self):
+        return self._records[0] if self._records else None
+
+    def consume(self):
+        return None
+
+
+class StandInTransaction:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def run(self, query, parameters=None, **kwargs):
+        params = {**(parameters or {}), **kwargs}
+        self.driver._record(query, len(params.get("rows", ())))
+        return StandInResult()
+
+
+class StandInSession:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, parameters=None, **kwargs):
+        return StandInTransaction(self.driver).run(query, parameters, **kwargs)
+
+    def execute_write(self, work):
+        return work(StandInTransaction(self.driver))
+
+    execute_read = execute_write
+
+
+class StandInDriver:
+    """Driver-shaped object whose sessions accept and count statements"""
+
+    def __init__(self):
+        self.statements = 0
+        self.rows = 0
+        self._lock = threading.Lock()
+
+    def _record(self, query, rows):
+        with self._lock:
+            self.statements += 1
+            self.rows += rows
+
+    def session(self, **kwargs):
+        return StandInSession(self)
+
+    def close(self):
+        pass
@@ -0,0 +1,251 @@
+"""End-to-end benchmark: cleaning, loading and a fixed query workload.
+
+Usage: python -m benchmarks.suite [--sizes 10000 100000 1000000] [--target standin|neo4j]
+                                  [--output results.json] [--compare baseline.json]
+
+Synthetic Spotify-shaped CSVs are generated once per size and cached. The LLM
+is mocked, so runs are deterministic and offline. `--target neo4j` loads into
+the database in config (NEO4J_URI) and WIPES it; the default `standin`
+target measures only the client side (see benchmarks/standin.py).
+Exits non-zero when `--compare` finds a regression beyond `--tolerance`.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.standin import StandInDriver
+from benchmarks.synthetic import write_spotify_csv
+from chatbot.streaming import stream_answer
+from chatbot.templates import TemplateEngine
+from database.driver import get_driver, read_session
+from database.loader import Neo4jMusicLoader
+from database.streaming import TrackIdSet, read_csv_chunks
+from tracing import TRACER, Tracer
+
+DEFAULT_SIZES = [10000]
+
+# The sidebar examples in app.py, answered through the full streaming pipeline
+# (synthetic artists are called "Artist <n>", so Queen becomes Artist 1)
+QUESTIONS = [
+    "What are the most popular songs by Artist 1?",
+    "List artists in the 'pop' genre",
+    "Show me high-energy dance songs",
+    "Which albums were released in 2019?",
+    "Give me 100 random songs",
+]
+
+# The analytics test_neo4j.py prints, run as plain Cypher
+ANALYTICS_QUERIES = {
+    "total_nodes": "MATCH (n) RETURN count(n) AS total_nodes",
+    "total_relationships": "MATCH ()-[r]->() RETURN count(r) AS total_relationships",
+    "node_types": "MATCH (n) RETURN labels(n)[0] AS node_type, count(*) AS count ORDER BY count DESC",
+    "relationship_types": "MATCH ()-[r]->() RETURN type(r) AS rel_type, count(*) AS count ORDER BY count DESC",
+    "genres": "MATCH (s:Song) RETURN s.genre AS genre, count(*) AS song_count ORDER BY song_count DESC",
+    "top_artists": """MATCH (a:Artist)-[:SINGS]->(s:Song)
+RETURN a.name AS artist, count(s) AS song_count ORDER BY song_count DESC LIMIT 15""",
+    "song_sample": "MATCH (s:Song) RETURN s.id AS id, s.title AS title, s.genre AS genre LIMIT 5",
+    "pop_songs": "MATCH (s:Song {genre: 'pop'}) RETURN count(s) AS pop_songs",
+    "top_pop_artists": """MATCH (a:Artist)-[:SINGS]->(s:Song {genre: 'pop'})
+RETURN a.name AS artist, count(s) AS pop_song_count ORDER BY pop_song_count DESC LIMIT 10""",
+}
+
+# What the mocked Cypher LLM writes for a question no template matches
+MOCK_CYPHER = "MATCH (s:Song) RETURN s.title AS title, s.popularity AS popularity LIMIT 10"
+MOCK_ANSWER = "Here are the songs I found in the music graph."
+
+
+class MockLLM:
+    """Deterministic stand-in for the Cypher and QA chains"""
+
+    def __init__(self, text):
+        self.text = text
+
+    def invoke(self, inputs):
+        return self.text
+
+    def stream(self, inputs):
+        for word in self.text.split(" "):
+            yield word + " "
+
+
+class MockChain:
+    graph_schema = ""
+
+    def __init__(self):
+        self.cypher_generation_chain = MockLLM(MOCK_CYPHER)
+        self.qa_chain = MockLLM(MOCK_ANSWER)
+
+
+class DriverGraph:
+    """The slice of langchain's Neo4jGraph the analytics workload uses"""
+
+    get_schema = ""  # the mocked Cypher LLM ignores the schema
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    def query(self, cypher, params=None):
+        with read_session(self.driver) as session:
+            return session.run(cypher, params or {}).data()
+
+
+def percentiles(samples):
+    values = np.asarray(samples)
+    return {
+        "runs": len(values), "mean": float(values.mean()),
+        "p50": float(np.percentile(values, 50)), "p95": float(np.percentile(values, 95)),
+    }
+
+
+def bench_clean_and_load(path, driver, chunksize):
+    """Time reading, cleaning and every load phase of one CSV"""
+    loader = Neo4jMusicLoader(driver=driver)
+    timings = {"read": 0.0, "clean": 0.0, "rows_in": 0, "rows_out": 0}
+
+    def cleaned_chunks():
+        seen = TrackIdSet()
+        chunks = iter(read_csv_chunks(path, chunksize))
+        while True:
+            start = time.perf_counter()
+            chunk = next(chunks, None)
+            timings["read"] += time.perf_counter() - start
+            if chunk is None:
+                return
+            start = time.perf_counter()
+            cleaned = loader.clean_data(chunk)
+            cleaned = cleaned[seen.filter_new(cleaned['track_id'])]
+            timings["clean"] += time.perf_counter() - start
+            timings["rows_in"] += len(chunk)
+            timings["rows_out"] += len(cleaned)
+            yield cleaned
+
+    start = time.perf_counter()
+    phases = loader.load_data(cleaned_chunks())
+    phases["aggregates"] = loader.refresh_aggregates(loader.touched_artists)["artists"]
+    timings["total"] = time.perf_counter() - start
+    return timings, phases
+
+
+def bench_queries(driver, repeat):
+    """Replay the question and analytics workload `repeat` times"""
+    graph, chain, templates = DriverGraph(driver), MockChain(), TemplateEngine(None)
+    tracer = Tracer()
+    results = {}
+    for question in QUESTIONS:
+        samples = {}
+        for _ in range(repeat):
+            match = templates.match(question)
+            for event in stream_answer(chain, graph, question, match=match, tracer=tracer, driver=driver):
+                if event.kind == "done":
+                    for stage, seconds in event.timings.items():
+                        samples.setdefault(stage, []).append(seconds)
+        results[question] = {stage: percentiles(values) for stage, values in samples.items()}
+    for name, cypher in ANALYTICS_QUERIES.items():
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            graph.query(cypher)
+            samples.append(time.perf_counter() - start)
+        results[name] = {"total": percentiles(samples)}
+    return results
+
+
+def flatten(results):
+    """Lower-is-better metrics of a run as {dotted.name: seconds}"""
+    metrics = {}
+    for size, run in results["sizes"].items():
+        metrics[f"{size}.read"] = run["clean"]["read"]
+        metrics[f"{size}.clean"] = run["clean"]["clean"]
+        for phase, stats in run["load"].items():
+            if isinstance(stats, dict):
+                metrics[f"{size}.load.{phase}"] = stats["seconds"]
+        for query, stages in run["queries"].items():
+            metrics[f"{size}.query.{query}.p95"] = stages["total"]["p95"]
+    return metrics
+
+
+def compare(results, baseline, tolerance):
+    """Metrics slower than the baseline by more than `tolerance` (a fraction)"""
+    current, previous = flatten(results), flatten(baseline)
+    regressions = []
+    for name, seconds in sorted(current.items()):
+        before = previous.get(name)
+        # Sub-millisecond timings are noise, not regressions
+        if before is not None and seconds > 0.001 and seconds > before * (1 + tolerance):
+            regressions.append((name, before, seconds))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cleaning, loading and query latency")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="synthetic CSV sizes in rows (e.g. 10000 100000 1000000)")
+    parser.add_argument("--target", choices=["standin", "neo4j"], default="standin",
+                        help="neo4j uses NEO4J_URI and wipes the database")
+    parser.add_argument("--data-dir", default="benchmarks/data", help="where synthetic CSVs are cached")
+    parser.add_argument("--chunksize", type=int, default=50000, help="CSV rows per chunk")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per workload query")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--compare", help="baseline results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before failing")
+    args = parser.parse_args()
+    TRACER.log_path = None  # keep benchmark spans out of the app's trace log
+
+    results = {
+        "meta": {
+            "target": args.target, "seed": args.seed, "chunksize": args.chunksize, "repeat": args.repeat,
+            "python": platform.python_version(), "pandas": pd.__version__,
+            "machine": platform.machine(), "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "sizes": {},
+    }
+    for size in args.sizes:
+        path = os.path.join(args.data_dir, f"spotify_{size}_seed{args.seed}.csv")
+        if not os.path.exists(path):
+            print(f"Generating {path}...")
+            write_spotify_csv(path, size, seed=args.seed)
+
+        # The shared pooled driver is closed at exit; a stand-in is per size
+        driver = get_driver() if args.target == "neo4j" else StandInDriver()
+        print(f"\n== {size} rows ({args.target}) ==")
+        clean, load = bench_clean_and_load(path, driver, args.chunksize)
+        print(f"read {clean['read']:.2f}s, clean {clean['clean']:.2f}s "
+              f"({clean['rows_in']} -> {clean['rows_out']} rows), load total {clean['total']:.2f}s")
+        queries = bench_queries(driver, args.repeat)
+        for name, stages in queries.items():
+            print(f"  {name}: p50 {stages['total']['p50'] * 1000:.1f} ms, "
+                  f"p95 {stages['total']['p95'] * 1000:.1f} ms")
+        results["sizes"][str(size)] = {"clean": clean, "load": load, "queries": queries}
+
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults -> {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["meta"]["target"] != args.target:
+            print(f"Baseline target is {baseline['meta']['target']}, not {args.target}; skipping comparison")
+            return 0
+        regressions = compare(results, baseline, args.tolerance)
+        for name, before, after in regressions:
+            print(f"REGRESSION {name}: {before * 1000:.1f} ms -> {after * 1000:.1f} ms")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} of {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+GENRES = ['pop', 'rap', 'rock', 'latin', 'r&b', 'edm']
+
+
+def make_spotify_frame(rows, seed=0, start=0, population=None):
+    """Build a deterministic DataFrame shaped like data/spotify_songs.csv
+
+    Artist and album cardinalities follow the real dataset (~1 artist per
+    3 songs, ~4 albums per 5 songs), release dates mix the full, year-month
+    and year-only formats, and a few rows carry the gaps clean_data handles.
+    `start` offsets the track ids and `population` sets the dataset size the
+    cardinalities are drawn for, so a large file can be built chunk by chunk.
+    """
+    rng = np.random.default_rng(seed)
+    population = population or rows
+    artist_ids = rng.integers(0, max(1, population // 3), rows)
+    album_ids = rng.integers(0, max(1, population * 4 // 5), rows)
+    years = rng.integers(1960, 2021, rows).astype(str)
+    months = np.char.zfill(rng.integers(1, 13, rows).astype(str), 2)
+    days = np.char.zfill(rng.integers(1, 29, rows).astype(str), 2)
+    date_kind = rng.integers(0, 10, rows)
+    release_dates = np.where(
+        date_kind < 7, np.char.add(np.char.add(years, '-'), np.char.add(np.char.add(months, '-'), days)),
+        np.where(date_kind < 9, np.char.add(np.char.add(years, '-'), months), years),
+    )
+    df = pd.DataFrame({
+        'track_id': [f'{i:022x}' for i in range(start, start + rows)],
+        'track_name': [f' Track {i} ' for i in range(rows)],
+        'track_artist': [f'Artist {i}' for i in artist_ids],
+        'track_popularity': rng.integers(0, 101, rows),
+        'track_album_id': [f'album{i:017x}' for i in album_ids],
+        'track_album_name': [f'Album {i}' for i in album_ids],
+        'track_album_release_date': release_dates,
+        'playlist_name': 'Synthetic',
+        'playlist_id': 'synthetic',
+        'playlist_genre': rng.choice(GENRES, rows),
+        'playlist_subgenre': 'synthetic',
+        'danceability': rng.random(rows).round(3),
+        'energy': rng.random(rows).round(3),
+        'key': rng.integers(0, 12, rows),
+        'loudness': rng.uniform(-20, 0, rows).round(3),
+        'mode': rng.integers(0, 2, rows),
+        'speechiness': rng.random(rows).round(4),
+        'acousticness': rng.random(rows).round(4),
+        'instrumentalness': rng.random(rows).round(4),
+        'liveness': rng.random(rows).round(4),
+        'valence': rng.random(rows).round(3),
+        'tempo': rng.uniform(60, 200, rows).round(3),
+        'duration_ms': rng.integers(60000, 400000, rows),
+    })
+    # Sprinkle in the defects seen in the real export.
+    gaps = rng.choice(rows, size=max(1, rows // 1000), replace=False)
+    df.loc[gaps, 'track_name'] = None
+    duplicates = df.sample(n=max(1, rows // 200), random_state=seed)
+    return pd.concat([df, duplicates], ignore_index=True)
+
+
+def write_spotify_csv(path, rows, seed=0, chunksize=100000):
+    """Write a synthetic Spotify CSV of about `rows` rows, one chunk at a time"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    for n, start in enumerate(range(0, rows, chunksize)):
+        chunk = make_spotify_frame(min(chunksize, rows - start), seed=seed + n, start=start, population=rows)
+        chunk.to_csv(tmp_path, mode='w' if n == 0 else 'a', header=n == 0, index=False)
+    os.replace(tmp_path, path)
+    return path
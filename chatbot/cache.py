@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+
+# Words that only make sense against earlier turns ("what about their
+# albums?"). Answers to such questions depend on the conversation, so they
+# must never be served from a cache keyed on the question alone.
+FOLLOW_UP_PATTERN = re.compile(
+    r"\b(it|its|they|them|their|theirs|he|him|his|she|her|hers|those|these|that one|"
+    r"the same|more|also|else|another|previous|above|earlier)\b",
+    re.IGNORECASE,
+)
+
+
+def normalize_question(question):
+    """Lower-case, collapse whitespace and drop trailing punctuation"""
+    question = re.sub(r"\s+", " ", question.strip().lower())
+    return question.rstrip(" ?!.")
+
+
+def is_self_contained(question):
+    """True if the question can be answered without the conversation history"""
+    return not FOLLOW_UP_PATTERN.search(question)
+
+
+def cache_key(question, graph_version):
+    """Key a question to the graph it was answered against"""
+    raw = f"{graph_version}\x00{normalize_question(question)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+GRAPH_VERSION_QUERY = "MATCH (m:GraphMeta {key: 'graph'}) RETURN m.version AS version"
+
+
+def get_graph_version(graph):
+    """Read the version stamp the loader writes after every load (0 if never stamped)"""
+    rows = graph.query(GRAPH_VERSION_QUERY)
+    return rows[0]["version"] if rows else 0
+
+
+class ReloadingFile:
+    """A value built from a file, rebuilt whenever the file is replaced
+
+    The loader rewrites the similarity and entity indexes after every load
+    (atomically, so each write is a new inode). Keying the loaded copy on
+    the file's identity keeps the app in step with the graph without a
+    restart. `get()` returns None while the file does not exist.
+    """
+
+    def __init__(self, path, build):
+        self.path = path
+        self.build = build
+        self._stamp = None
+        self._value = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if stamp != self._stamp:
+                self._value = self.build(self.path)
+                self._stamp = stamp
+            return self._value
+
+
+class MemoryCacheBackend:
+    """In-process LRU cache with per-entry TTL, safe to share across sessions"""
+
+    def __init__(self, max_entries=1000, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.time() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCacheBackend:
+    """Disk-backed LRU cache with per-entry TTL, shared by every app process on the host"""
+
+    def __init__(self, path, max_entries=10000, ttl=3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS qa_cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS qa_cache_accessed ON qa_cache (accessed_at)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock, closing(self._connect()) as conn, conn:
+            row = conn.execute("SELECT value, stored_at FROM qa_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, stored_at = row
+            if now - stored_at > self.ttl:
+                conn.execute("DELETE FROM qa_cache WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE qa_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            return json.loads(value)
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO qa_cache (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            conn.execute(
+                "DELETE FROM qa_cache WHERE key IN ("
+                " SELECT key FROM qa_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self):
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM qa_cache")
+
+
+class QueryCache:
+    """Answer cache in front of the QA chain, keyed on question and graph version"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, question, graph_version):
+        value = self.backend.get(cache_key(question, graph_version))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, question, graph_version, value):
+        self.backend.set(cache_key(question, graph_version), value)
+
+    def clear(self):
+        self.backend.clear()
+
+
+def create_query_cache(backend="memory", path=None, max_entries=1000, ttl=3600):
+    """Build a QueryCache from config; returns None when caching is disabled"""
+    if backend == "memory":
+        return QueryCache(MemoryCacheBackend(max_entries=max_entries, ttl=ttl))
+    if backend == "sqlite":
+        return QueryCache(SQLiteCacheBackend(path, max_entries=max_entries, ttl=ttl))
+    if backend in (None, "", "off", "none"):
+        return None
+    raise ValueError(f"Unknown QA cache backend: {backend}")
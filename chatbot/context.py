@@ -0,0 +1,144 @@
+import re
+from collections import deque
+
+SUMMARY_PROMPT = """Update the running summary of a conversation about a music database.
+Keep artists, songs, albums, genres and years the user asked about; drop pleasantries.
+Answer with the new summary only, at most {max_words} words.
+
+Current summary:
+{summary}
+
+New turns:
+{turns}
+"""
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token) used for prompt budgeting"""
+    return len(text) // 4 + 1 if text else 0
+
+
+def format_turn(message):
+    return f"{message['role']}: {message['content']}"
+
+
+def _first_sentence(text, max_chars=160):
+    sentence = re.split(r"(?<=[.!?])\s", text.strip(), maxsplit=1)[0]
+    return sentence if len(sentence) <= max_chars else sentence[:max_chars].rstrip() + "…"
+
+
+def extractive_summarizer(max_tokens):
+    """Summarise by keeping the first sentence of every turn, oldest dropped first"""
+    def summarize(summary, turns):
+        lines = summary.splitlines() if summary else []
+        lines += [f"{turn['role']}: {_first_sentence(turn['content'])}" for turn in turns]
+        while lines and estimate_tokens("\n".join(lines)) > max_tokens:
+            lines.pop(0)
+        return "\n".join(lines)
+    return summarize
+
+
+def llm_summarizer(llm, max_tokens):
+    """Summarise with an LLM, falling back to the extractive summary on failure"""
+    fallback = extractive_summarizer(max_tokens)
+
+    def summarize(summary, turns):
+        prompt = SUMMARY_PROMPT.format(
+            max_words=max_tokens * 3 // 4,
+            summary=summary or "(empty)",
+            turns="\n".join(format_turn(turn) for turn in turns),
+        )
+        try:
+            result = llm.invoke(prompt)
+        except Exception:
+            return fallback(summary, turns)
+        text = getattr(result, "content", str(result)).strip()
+        return text if estimate_tokens(text) <= max_tokens else fallback(summary, turns)
+    return summarize
+
+
+class ConversationContext:
+    """Single, bounded record of one user's chat
+
+    Holds the messages shown in the UI (at most `max_messages`, each clipped
+    to `max_message_chars`) and builds the contextual question for the LLM
+    within `max_prompt_tokens`: the newest turns verbatim, and everything
+    older folded into a rolling summary of at most `max_summary_tokens`.
+    Turns are summarised before they are evicted, so nothing is lost from
+    the context even though memory per session stays constant.
+    """
+
+    def __init__(self, max_prompt_tokens=800, max_summary_tokens=200, max_messages=40,
+                 max_message_chars=4000, summarizer=None):
+        self.max_prompt_tokens = max_prompt_tokens
+        self.max_summary_tokens = max_summary_tokens
+        self.max_message_chars = max_message_chars
+        self.summarizer = summarizer or extractive_summarizer(max_summary_tokens)
+        self.messages = deque(maxlen=max_messages)
+        self.summary = ""
+        self._next_seq = 0
+        self._summarized_seq = -1
+
+    def __iter__(self):
+        return iter(self.messages)
+
+    def __len__(self):
+        return len(self.messages)
+
+    @property
+    def evicted(self):
+        """Number of messages no longer shown because of the per-session cap"""
+        return self._next_seq - len(self.messages)
+
+    def add_user_message(self, content):
+        self._append("user", content)
+
+    def add_ai_message(self, content):
+        self._append("assistant", content)
+
+    def clear(self):
+        self.messages.clear()
+        self.summary = ""
+        self._summarized_seq = self._next_seq - 1
+
+    def _append(self, role, content):
+        if len(self.messages) == self.messages.maxlen:
+            self._fold(self.messages[0]["seq"])
+        self.messages.append({"role": role, "content": content[:self.max_message_chars], "seq": self._next_seq})
+        self._next_seq += 1
+
+    def _fold(self, upto_seq):
+        """Fold every not-yet-summarised message up to `upto_seq` into the summary"""
+        turns = [m for m in self.messages if self._summarized_seq < m["seq"] <= upto_seq]
+        if turns:
+            self.summary = self.summarizer(self.summary, turns)
+        self._summarized_seq = max(self._summarized_seq, upto_seq)
+
+    def contextual_query(self):
+        """Prompt text for the latest user message, bounded by the token budget"""
+        if not self.messages:
+            return ""
+        question = self.messages[-1]["content"]
+        history = [m for m in list(self.messages)[:-1] if m["seq"] > self._summarized_seq]
+        budget = self.max_prompt_tokens - self.max_summary_tokens - estimate_tokens(question)
+
+        window, used = [], 0
+        for message in reversed(history):
+            cost = estimate_tokens(format_turn(message))
+            if used + cost > budget:
+                break
+            window.append(message)
+            used += cost
+        window.reverse()
+
+        if len(window) < len(history):
+            self._fold(history[len(history) - len(window) - 1]["seq"])
+
+        parts = []
+        if self.summary:
+            parts.append(f"Summary of earlier conversation:\n{self.summary}")
+        if window:
+            parts.append("Conversation so far:\n" + "\n".join(format_turn(m) for m in window))
+        if not parts:
+            return question
+        return "\n\n".join(parts) + f"\n\nUser now asks: {question}"
@@ -0,0 +1,145 @@
+import re
+
+from database.entities import KINDS, base_name, normalize_name
+
+# Words that are part of how questions are asked rather than names. A
+# candidate span may not start (articles aside) or end with one, so "popular"
+# or "dance songs" is never taken for a title.
+QUESTION_WORDS = set("""
+a about after albums album all an and any are artist artists as at be before best between by can
+dance danceable danceability did do does duration energetic energy find first for from genre genres
+give has have high how i in is it last latest least like list long low many me more most music my
+new newest of old oldest on or other popular popularity random recent recommend released release
+short show similar some song songs sound sounds suggest than that the their them these this those
+to top track tracks was were what when which who with year years
+edm latin pop r b rap rock
+""".split())
+
+# Names may start with these ("The Weeknd", "A Boogie wit da Hoodie")
+ARTICLES = {"a", "an", "the"}
+
+# Single words only ever resolve to artists, and only right after one of
+# these cues ("songs by Queen") or in quotes: artists named by a common word
+# ("Love", "Energy") are too easy to hit by accident in "I love rock songs".
+SINGLE_WORD_KINDS = ("artist",)
+SINGLE_WORD_CUES = {"by", "from", "like", "artist", "band", "singer", "feat", "featuring", "ft"}
+MAX_SPAN_WORDS = 8
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+(?:['’][^\W_]+)*")
+QUOTED_PATTERN = re.compile(r"[\"“]([^\"”]+)[\"”]|(?<!\w)'([^']+)'(?!\w)")
+
+PROPERTY = {"artist": ("Artist", "name"), "album": ("Album", "id"), "song": ("Song", "id")}
+MAX_IDS = 20  # ids listed for a title several songs or albums share
+KIND_ORDER = {kind: i for i, kind in enumerate(KINDS)}
+
+
+def _quote(value):
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+class ResolvedEntity:
+    def __init__(self, text, kind, name, ids, score):
+        self.text = text
+        self.kind = kind
+        self.name = name
+        self.ids = ids
+        self.score = score
+
+    def condition(self):
+        """How Cypher should match the entity: its unique key, or the ids sharing its name"""
+        label, key = PROPERTY[self.kind]
+        if key == "name":
+            return f"{label}.name = {_quote(self.name)}"
+        if len(self.ids) == 1:
+            return f"{label}.id = {_quote(self.ids[0])}"
+        if len(self.ids) <= MAX_IDS:
+            return f"{label}.id IN [{', '.join(_quote(i) for i in self.ids)}]"
+        # Too many versions to list; the title index serves prefix matches too
+        return f"{label}.title STARTS WITH {_quote(self.name)}"
+
+
+class Resolution:
+    """A question with its names replaced by canonical ones, plus what they resolved to"""
+
+    def __init__(self, question, entities):
+        self.question = question
+        self.entities = entities
+
+    def hint(self):
+        if not self.entities:
+            return ""
+        lines = [f"- {e.name} ({e.kind}): {e.condition()}" for e in self.entities]
+        return "Names in the question, resolved against the graph (match them exactly):\n" + "\n".join(lines)
+
+    def annotate(self, prompt):
+        """Append the resolved names to the prompt sent for Cypher generation"""
+        return f"{prompt}\n\n{self.hint()}" if self.entities else prompt
+
+
+class EntityResolver:
+    """Finds artist, album and song names in a question before any Cypher is written
+
+    Word spans of the question (longest first) and anything in quotes are
+    looked up in an EntityIndex: first exactly, ignoring case, accents and
+    punctuation, then by trigram similarity. Matched spans are rewritten to
+    the canonical name, so templates and the LLM both use values that hit
+    the unique-constraint and title indexes on the first try.
+    """
+
+    def __init__(self, index, threshold=0.8):
+        self.index = index
+        self.threshold = threshold
+
+    def _match(self, text, kinds, fuzzy):
+        if fuzzy:
+            if len(normalize_name(text)) < 5:
+                return None
+            score, found = self.index.fuzzy(text, self.threshold, kinds)
+        else:
+            score, found = 1.0, self.index.lookup(text, kinds)
+        if not found:
+            return None
+        # Artists before albums before songs; titles that share the matched
+        # (base) name resolve together, e.g. every "Bohemian Rhapsody - ..." version
+        kind = min((kind for kind, _ in found), key=KIND_ORDER.get)
+        names = sorted(name for found_kind, name in found if found_kind == kind)
+        ids = [i for name in names for i in found[(kind, name)]]
+        name = names[0] if len(names) == 1 else base_name(names[0]) or names[0]
+        return kind, name, ids, score
+
+    def _candidates(self, question):
+        tokens = list(TOKEN_PATTERN.finditer(question))
+        words = [normalize_name(token.group(0)) for token in tokens]
+        for quoted in QUOTED_PATTERN.finditer(question):
+            start, end = quoted.span(1) if quoted.group(1) is not None else quoted.span(2)
+            if not set(normalize_name(question[start:end]).split()) <= QUESTION_WORDS:
+                yield start, end, KINDS
+        for length in range(min(MAX_SPAN_WORDS, len(tokens)), 0, -1):
+            for i in range(len(tokens) - length + 1):
+                span = words[i:i + length]
+                leading = span[0] in QUESTION_WORDS and not (length > 1 and span[0] in ARTICLES)
+                if leading or span[-1] in QUESTION_WORDS:
+                    continue
+                if length == 1 and (span[0].isdigit() or i == 0 or words[i - 1] not in SINGLE_WORD_CUES):
+                    continue
+                kinds = SINGLE_WORD_KINDS if length == 1 else KINDS
+                yield tokens[i].start(), tokens[i + length - 1].end(), kinds
+
+    def resolve(self, question):
+        candidates = list(self._candidates(question))
+        taken = []
+        # Exact names anywhere in the question win over near misses
+        for fuzzy in (False, True):
+            for start, end, kinds in candidates:
+                if any(start < other_end and other_start < end for other_start, other_end, _ in taken):
+                    continue
+                match = self._match(question[start:end], kinds, fuzzy)
+                if match is not None:
+                    kind, name, ids, score = match
+                    taken.append((start, end, ResolvedEntity(question[start:end], kind, name, ids, round(score, 3))))
+
+        taken.sort(key=lambda item: item[0])
+        rewritten = question
+        for start, end, entity in reversed(taken):
+            rewritten = rewritten[:start] + entity.name + rewritten[end:]
+        return Resolution(rewritten, [entity for _, _, entity in taken])
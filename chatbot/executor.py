@@ -0,0 +1,137 @@
+import asyncio
+import queue
+import threading
+
+from database.driver import create_async_driver, db_hits, read_session
+
+_DONE = object()
+
+
+class ExecutorBusy(RuntimeError):
+    """Raised when the shared request queue is full"""
+
+
+class AsyncExecutor:
+    """One asyncio loop, shared by every Streamlit session, for LLM and Neo4j I/O
+
+    The loop runs on a daemon thread; session threads hand it coroutines and
+    block only on their own result. Separate semaphores cap concurrent LLM
+    calls and Neo4j queries, and at most `max_pending` requests may be
+    queued or running at once, so a traffic spike is rejected early instead
+    of piling up threads.
+    """
+
+    def __init__(self, uri, auth, llm_concurrency=8, db_concurrency=16, max_pending=200):
+        self.max_pending = max_pending
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="melodia-async", daemon=True)
+        self._thread.start()
+        self.run(self._setup(uri, auth, llm_concurrency, db_concurrency))
+
+    async def _setup(self, uri, auth, llm_concurrency, db_concurrency):
+        self.driver = create_async_driver(uri, auth)
+        self.llm_limit = asyncio.Semaphore(llm_concurrency)
+        self.db_limit = asyncio.Semaphore(db_concurrency)
+
+    def _acquire_slot(self):
+        with self._pending_lock:
+            if self._pending >= self.max_pending:
+                raise ExecutorBusy("Too many requests in flight, please try again in a moment")
+            self._pending += 1
+
+    def _release_slot(self, *_):
+        with self._pending_lock:
+            self._pending -= 1
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def submit(self, coro):
+        """Schedule a coroutine on the shared loop and return a concurrent Future"""
+        try:
+            self._acquire_slot()
+        except ExecutorBusy:
+            coro.close()
+            raise
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        future.add_done_callback(self._release_slot)
+        return future
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the shared loop and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def iterate(self, agen, timeout=None):
+        """Consume an async generator from a synchronous thread, item by item"""
+        items = queue.Queue()
+
+        async def drain():
+            try:
+                async for item in agen:
+                    items.put(item)
+            except BaseException as e:
+                items.put(e)
+                raise
+            finally:
+                items.put(_DONE)
+
+        future = self.submit(drain())
+        try:
+            while True:
+                item = items.get(timeout=timeout)
+                if item is _DONE:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            if not future.done():
+                future.cancel()
+
+    async def query(self, cypher, params=None, max_rows=None):
+        """Run a read query with the async driver and return the rows as dicts
+
+        With `max_rows`, records are pulled from the cursor one fetch batch at
+        a time and the rest of the result is discarded once enough arrived.
+        """
+        async with self.db_limit:
+            async with read_session(self.driver) as session:
+                result = await session.run(cypher, params or {})
+                if max_rows is None:
+                    return await result.data()
+                rows = []
+                async for record in result:
+                    rows.append(record.data())
+                    if len(rows) >= max_rows:
+                        break
+                await result.consume()
+                return rows
+
+    async def profile(self, cypher, params=None, max_rows=None):
+        """Like `query`, but PROFILEd; returns (rows, total db hits)"""
+        async with self.db_limit:
+            async with read_session(self.driver) as session:
+                result = await session.run(f"PROFILE {cypher}", params or {})
+                rows = []
+                async for record in result:
+                    rows.append(record.data())
+                    if max_rows is not None and len(rows) >= max_rows:
+                        break
+                summary = await result.consume()
+        return rows, db_hits(summary.profile)
+
+    async def invoke(self, runnable, inputs):
+        async with self.llm_limit:
+            return await runnable.ainvoke(inputs)
+
+    async def stream(self, runnable, inputs):
+        async with self.llm_limit:
+            async for chunk in runnable.astream(inputs):
+                yield chunk
+
+    def close(self):
+        self.run(self.driver.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
@@ -0,0 +1,78 @@
+import json
+import os
+
+from langchain_community.graphs import Neo4jGraph
+
+from chatbot.cache import get_graph_version
+from config import SCHEMA_SNAPSHOT_FILE
+from database.driver import read_query
+
+
+def load_schema_snapshot(path, graph_version):
+    """The schema saved for `graph_version`, or None if missing or stale"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return snapshot if snapshot.get("version") == graph_version else None
+
+
+def save_schema_snapshot(path, graph_version, schema, structured_schema):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": graph_version, "schema": schema, "structured_schema": structured_schema},
+                  f, default=str)
+    os.replace(tmp_path, path)
+
+
+class SnapshotNeo4jGraph(Neo4jGraph):
+    """Neo4jGraph whose schema comes from a file while the graph version is unchanged
+
+    Introspecting the schema runs several APOC meta queries over the whole
+    graph. The result only changes when the loader bumps the graph version,
+    so it is saved next to that version and reused by every later start.
+    """
+
+    snapshot_path = SCHEMA_SNAPSHOT_FILE
+
+    def query(self, query, params=None, session_params=None):
+        """Run a query as a managed read on the shared pool (database/driver.py)
+
+        Neo4jGraph would run it with `execute_query` on its own driver, which
+        routes to the leader. Everything the chatbot asks the graph (schema
+        introspection, the graph version) is a read, so it goes to followers
+        and read replicas on a cluster.
+        """
+        return read_query(query, params)
+
+    def close(self):
+        # The shared pool outlives any one graph and is closed at exit
+        pass
+
+    def refresh_schema(self):
+        version = get_graph_version(self)
+        snapshot = load_schema_snapshot(self.snapshot_path, version)
+        if snapshot is not None:
+            self.schema = snapshot["schema"]
+            self.structured_schema = snapshot["structured_schema"]
+            return
+        super().refresh_schema()
+        if self.snapshot_path:
+            save_schema_snapshot(self.snapshot_path, version, self.schema, getattr(self, "structured_schema", {}))
+
+
+def connect_graph(url, username, password):
+    """A schema-snapshotting Neo4jGraph whose queries run on the shared driver"""
+    # Neo4jGraph cannot be handed a driver: it opens and verifies its own.
+    # Nothing runs on that one (see `query`), so close it before the schema
+    # is read through the shared pool.
+    graph = SnapshotNeo4jGraph(url=url, username=username, password=password, refresh_schema=False)
+    graph._driver.close()
+    graph.refresh_schema()
+    return graph
@@ -0,0 +1,33 @@
+from langchain_core.prompts import PromptTemplate
+
+# Appended to the schema Neo4jGraph introspects, which lists labels and
+# properties but not which lookups are anchored by an index or constraint.
+GRAPH_MODEL_HINT = """Graph model notes:
+- Genres are (:Genre {name}) nodes, names lower-case (pop, rap, rock, latin, r&b, edm).
+  Filter by genre with MATCH (:Genre {name: 'pop'})<-[:IN_GENRE]-(s:Song), not s.genre.
+- Release years are (:Year {value}) nodes with an integer value, and every album has
+  an integer al.year. For one year use MATCH (:Year {value: 2019})<-[:RELEASED_IN]-(al:Album);
+  for a range use WHERE 2010 <= al.year <= 2015. Never parse al.releaseDate.
+- Precomputed counts: a.songCount and a.albumCount on Artist,
+  (:Artist)-[:ACTIVE_IN {songCount}]->(:Genre), and g.songCount / g.artistCount on Genre.
+  Prefer them over counting songs."""
+
+CYPHER_GENERATION_TEMPLATE = """Task: Generate a Cypher statement to query a graph database.
+Instructions:
+Use only the provided relationship types and properties in the schema.
+Do not use any other relationship types or properties that are not provided.
+Schema:
+{schema}
+
+""" + GRAPH_MODEL_HINT.replace("{", "{{").replace("}", "}}") + """
+
+Note: Do not include any explanations or apologies in your responses.
+Do not respond to any questions that might ask anything else than for you to construct a Cypher statement.
+Do not include any text except the generated Cypher statement.
+
+The question is:
+{question}"""
+
+CYPHER_GENERATION_PROMPT = PromptTemplate(
+    input_variables=["schema", "question"], template=CYPHER_GENERATION_TEMPLATE
+)
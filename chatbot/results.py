@@ -0,0 +1,124 @@
+import re
+
+LIMIT_PATTERN = re.compile(r"\bLIMIT\b", re.IGNORECASE)
+UNION_PATTERN = re.compile(r"\bUNION\b", re.IGNORECASE)
+# Anything after the last LIMIT that makes it part of an earlier query part
+# (or of a subquery) rather than the end of the whole query
+CLAUSE_PATTERN = re.compile(
+    r"\b(?:RETURN|WITH|MATCH|OPTIONAL|UNWIND|WHERE|ORDER|SKIP|UNION|CALL|USE)\b|[{}]", re.IGNORECASE
+)
+QUOTED_PATTERN = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|`[^`]*`")
+
+
+def _masked(cypher):
+    """`cypher` with strings and quoted names blanked out, so words inside them are not keywords"""
+    return QUOTED_PATTERN.sub(lambda m: " " * len(m.group(0)), cypher)
+
+
+def _trailing_limit(cypher):
+    """(offset, expression) of the LIMIT that ends the query, or None if it has none"""
+    masked = _masked(cypher)
+    limits = list(LIMIT_PATTERN.finditer(masked))
+    if not limits or CLAUSE_PATTERN.search(masked, limits[-1].end()):
+        return None
+    return limits[-1].start(), cypher[limits[-1].end():].strip()
+
+
+def limit_cypher(cypher, max_rows):
+    """Cap what a generated query can return at `max_rows`
+
+    A missing LIMIT is appended and a larger literal one is lowered. Any
+    other final LIMIT (`$limit`, `toInteger(5)`) is kept as it is, and the
+    fetch stops after `max_rows` records instead. A UNION is wrapped in a
+    subquery, since a LIMIT after it would only cap its last branch.
+    """
+    stripped = cypher.strip().rstrip(";").rstrip()
+    if UNION_PATTERN.search(_masked(stripped)):
+        return f"CALL {{\n{stripped}\n}}\nRETURN *\nLIMIT {max_rows}"
+    found = _trailing_limit(stripped)
+    if found is None:
+        return f"{stripped}\nLIMIT {max_rows}"
+    start, expression = found
+    if expression.isdigit() and int(expression) > max_rows:
+        return f"{stripped[:start]}LIMIT {max_rows}"
+    return stripped
+
+
+def limit_params(params, max_rows):
+    """Clamp a template's $limit parameter to `max_rows`"""
+    limit = params.get("limit")
+    if isinstance(limit, int) and limit > max_rows:
+        return dict(params, limit=max_rows)
+    return params
+
+
+def page_cypher(cypher):
+    """Wrap a read query so one page of its rows can be fetched with $_skip/$_limit"""
+    inner = cypher.strip().rstrip(";")
+    return f"CALL {{\n{inner}\n}}\nRETURN *\nSKIP $_skip LIMIT $_limit"
+
+
+def _column_summary(rows):
+    summary = {}
+    for column in rows[0]:
+        values = [row.get(column) for row in rows if row.get(column) is not None]
+        numbers = [v for v in values if isinstance(v, (int, float)) and not isinstance(v, bool)]
+        if values and len(numbers) == len(values):
+            summary[column] = {"min": min(numbers), "max": max(numbers),
+                               "mean": round(sum(numbers) / len(numbers), 3)}
+        elif values:
+            distinct = {str(v) for v in values}
+            summary[column] = {"distinct": len(distinct)}
+    return summary
+
+
+def qa_context(rows, max_rows, truncated=False):
+    """What the QA LLM sees: the rows themselves, or a summary plus the first `max_rows`
+
+    Queries are usually ordered, so the head of the result is the most
+    relevant sample; the column summary covers the rest.
+    """
+    if len(rows) <= max_rows and not truncated:
+        return rows
+    total = f"more than {len(rows)}" if truncated else str(len(rows))
+    return [{
+        "total_rows": total,
+        "columns": _column_summary(rows) if rows else {},
+        f"first_{min(max_rows, len(rows))}_rows": rows[:max_rows],
+    }]
+
+
+class ResultPager:
+    """Full result of one answer, shown a page at a time in the results table
+
+    Pages come from the rows already fetched for the answer first. Only when
+    that fetch was cut off at the row cap are later pages pulled from Neo4j,
+    on demand, through `fetch(cypher, params)`.
+    """
+
+    def __init__(self, rows, page_size, truncated=False, cypher=None, params=None, fetch=None):
+        self.page_size = page_size
+        self.cypher = cypher
+        self.params = params or {}
+        self.fetch = fetch
+        self._fetched = list(rows)
+        self._more_in_db = truncated and cypher is not None and fetch is not None
+        self.rows = self._fetched[:page_size]
+
+    @property
+    def exhausted(self):
+        return len(self.rows) >= len(self._fetched) and not self._more_in_db
+
+    def load_more(self):
+        if len(self.rows) < len(self._fetched):
+            page = self._fetched[len(self.rows):len(self.rows) + self.page_size]
+        elif self._more_in_db:
+            params = dict(self.params, _skip=len(self.rows), _limit=self.page_size + 1)
+            page = self.fetch(page_cypher(self.cypher), params)
+            self._more_in_db = len(page) > self.page_size
+            page = page[:self.page_size]
+            self._fetched.extend(page)
+        else:
+            page = []
+        self.rows.extend(page)
+        return page
@@ -0,0 +1,300 @@
+import asyncio
+
+from config import TRACE_PROFILE_QUERIES, RESULT_ROW_LIMIT, QA_MAX_ROWS
+from chatbot.context import estimate_tokens
+from chatbot.results import limit_cypher, limit_params, qa_context
+from database.driver import profile_query, read_query
+from tracing import TRACER
+
+# One row past the cap tells a cut-off result from one that fits exactly
+FETCH_ROWS = RESULT_ROW_LIMIT + 1
+
+# Blocking counterparts of the AsyncExecutor methods named by `AnswerRun.db_call`
+SYNC_QUERIES = {"query": read_query, "profile": profile_query}
+
+
+def _as_runnable(chain):
+    """Use an LLMChain's prompt | llm directly so it can stream; pass runnables through"""
+    if hasattr(chain, "prompt") and hasattr(chain, "llm"):
+        return chain.prompt | chain.llm
+    return chain
+
+
+def _text(chunk):
+    return getattr(chunk, "content", chunk if isinstance(chunk, str) else str(chunk))
+
+
+def extract_cypher(text):
+    """Strip the Markdown fence the LLM sometimes wraps around generated Cypher"""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    return text.strip()
+
+
+class StreamEvent:
+    """One step of a streamed answer: kind is cypher, context, token or done
+
+    A cypher event's `source` says who wrote it: "llm", "template" or
+    "tool". A context event's `truncated` is set when the query returned
+    more than RESULT_ROW_LIMIT rows and only the first ones were fetched.
+    """
+
+    def __init__(self, kind, value=None, seconds=None, timings=None, truncated=False, source=None):
+        self.kind = kind
+        self.value = value
+        self.seconds = seconds
+        self.timings = timings
+        self.truncated = truncated
+        self.source = source
+
+
+def _cypher_inputs(chain, graph, question, contextual_query):
+    return {"question": contextual_query or question,
+            "schema": getattr(chain, "graph_schema", None) or graph.get_schema}
+
+
+def _source(match):
+    """How a question is answered: in-process tool, Cypher template or the LLM"""
+    if match is None:
+        return "llm"
+    return "tool" if getattr(match, "rows", None) is not None else "template"
+
+
+def _capped(rows):
+    """Split a fetch of RESULT_ROW_LIMIT + 1 rows into (rows, truncated)"""
+    return rows[:RESULT_ROW_LIMIT], len(rows) > RESULT_ROW_LIMIT
+
+
+def _finish_cypher(chain, generated):
+    cypher = extract_cypher(_text(generated))
+    corrector = getattr(chain, "cypher_query_corrector", None)
+    return corrector(cypher) if corrector is not None else cypher
+
+
+def _usage_tokens(chunk):
+    usage = getattr(chunk, "usage_metadata", None) or {}
+    return usage.get("output_tokens", 0)
+
+
+class AnswerRun:
+    """Stages shared by `stream_answer` and `astream_answer`
+
+    The two pipelines differ only in how they wait on the LLM and Neo4j.
+    Everything else (what runs against the database, row capping, the QA
+    context, spans and timings) lives here and turns each stage's result
+    into a StreamEvent.
+    """
+
+    def __init__(self, tracer, match):
+        self.tracer = tracer
+        self.match = match
+        self.timings = {}
+        self.root = tracer.span("answer", source=_source(match))
+        self.cypher, self.params = None, {}
+        self.rows, self.context = [], []
+        self.answer, self.usage_tokens = [], 0
+
+    def span(self, name):
+        return self.tracer.span(name, parent=self.root)
+
+    def _add(self, stage, seconds):
+        # Stages run twice when a template finds nothing and the LLM retries
+        self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+
+    def cache_hit(self, cached):
+        self.root.set(source="cache")
+        self.timings["total"] = self.root.end()
+        return StreamEvent("done", cached, timings=dict(self.timings, cache=self.timings["total"]))
+
+    def matched(self):
+        """Cypher event for a template or tool match, which needs no generation"""
+        self.cypher, self.params = self.match.cypher, self.match.params
+        self._add("cypher_generation", 0.0)
+        return StreamEvent("cypher", self.cypher, 0.0, source=_source(self.match))
+
+    def generated(self, chain, generated, seconds):
+        self.cypher, self.params = _finish_cypher(chain, generated), {}
+        self._add("cypher_generation", seconds)
+        return StreamEvent("cypher", self.cypher, seconds, source="llm")
+
+    def db_call(self):
+        """The db_execution stage as (method, kwargs), or (None, rows) when no query runs
+
+        `method` names the AsyncExecutor coroutine, or the SYNC_QUERIES
+        function, to call with `kwargs`. Queries are capped at FETCH_ROWS
+        both in the Cypher and while records are pulled.
+        """
+        if getattr(self.match, "rows", None) is not None:
+            return None, self.match.rows  # answered in-process by a tool, no Cypher to run
+        if not self.cypher:
+            return None, []
+        kwargs = {"cypher": limit_cypher(self.cypher, FETCH_ROWS), "params": limit_params(self.params, FETCH_ROWS),
+                  "max_rows": FETCH_ROWS}
+        return ("profile" if TRACE_PROFILE_QUERIES else "query"), kwargs
+
+    def fetched(self, span, method, result):
+        """End the db_execution span and build the context event and the QA LLM's context"""
+        if method is None:
+            rows, truncated = result, False
+        else:
+            if method == "profile":
+                result, hits = result
+                span.set(db_hits=hits)
+            rows, truncated = _capped(result)
+        self.rows = rows
+        seconds = span.set(rows=len(rows), truncated=truncated).end()
+        self._add("db_execution", seconds)
+        self.context = qa_context(rows, QA_MAX_ROWS, truncated)
+        return StreamEvent("context", rows, seconds, truncated=truncated)
+
+    def fall_back(self):
+        """Hand a template that found nothing over to the LLM; True if the stages should run again
+
+        An exact-name template that returns no rows most often means the
+        question did not fit it after all, and answering from an empty
+        context would state (and cache) that nothing exists.
+        """
+        if self.rows or _source(self.match) != "template":
+            return False
+        self.match = None
+        self.root.set(source="llm", fallback=True)
+        return True
+
+    def qa_inputs(self, question):
+        return {"question": question, "context": self.context}
+
+    def token(self, chunk):
+        """A token event for a streamed QA chunk, or None if it carried no text"""
+        self.usage_tokens += _usage_tokens(chunk)
+        token = _text(chunk)
+        if not token:
+            return None
+        if not self.answer:
+            self.timings["first_token"] = self.root.elapsed()
+        self.answer.append(token)
+        return StreamEvent("token", token)
+
+    def done(self, span):
+        """Close the answer span, counting tokens from usage metadata or estimating them"""
+        text = "".join(self.answer)
+        span.set(tokens=self.usage_tokens or estimate_tokens(text))
+        self.timings["answer_generation"] = span.end()
+        self.timings["total"] = self.root.end()
+        return StreamEvent("done", text, timings=self.timings)
+
+    def fail(self, error):
+        self.root.end(repr(error))
+
+
+def stream_answer(chain, graph, question, contextual_query=None, match=None, lookup=None, tracer=TRACER,
+                  driver=None):
+    """Answer a question stage by stage, yielding StreamEvents as each finishes
+
+    Mirrors GraphCypherQAChain (generate Cypher, query Neo4j, phrase the
+    answer) but hands back the Cypher and rows as soon as they exist and
+    streams the QA LLM token by token. A template `match` skips the
+    Cypher-generation LLM call; a tool match (with precomputed `rows`) skips
+    Neo4j too; a template that returns no rows falls back to generated
+    Cypher. `lookup` is an optional callable returning a
+    cached answer (or None), tried first. The final "done" event carries the
+    stage timings and the full answer text. Every stage is a span on `tracer`.
+    Queries run in read sessions on `driver` (the shared one by default).
+    """
+    run = AnswerRun(tracer, match)
+    try:
+        if lookup is not None:
+            with run.span("cache_lookup") as span:
+                cached = lookup()
+                span.set(hit=cached is not None)
+            if cached is not None:
+                yield run.cache_hit(cached)
+                return
+
+        while True:
+            if run.match is not None:
+                yield run.matched()
+            else:
+                with run.span("cypher_generation") as span:
+                    generated = _as_runnable(chain.cypher_generation_chain).invoke(
+                        _cypher_inputs(chain, graph, question, contextual_query)
+                    )
+                yield run.generated(chain, generated, span.seconds)
+
+            with run.span("db_execution") as span:
+                method, call = run.db_call()
+                event = run.fetched(span, method, SYNC_QUERIES[method](driver=driver, **call) if method else call)
+            yield event
+            if not run.fall_back():
+                break
+
+        span = run.span("answer_generation")
+        for chunk in _as_runnable(chain.qa_chain).stream(run.qa_inputs(question)):
+            event = run.token(chunk)
+            if event is not None:
+                yield event
+        yield run.done(span)
+    except Exception as e:
+        run.fail(e)
+        raise
+
+
+async def astream_answer(executor, chain, graph, question, contextual_query=None, match=None, lookup=None,
+                         tracer=TRACER):
+    """Async twin of `stream_answer`, run on an AsyncExecutor's shared loop
+
+    LLM calls go through the executor's concurrency limits and the query
+    through the async Neo4j driver. The cache `lookup` runs in a worker
+    thread before anything is sent to the LLM, so a hit costs no LLM call.
+    """
+    run = AnswerRun(tracer, match)
+    try:
+        if lookup is not None:
+            span = run.span("cache_lookup")
+            cached = await asyncio.to_thread(lookup)
+            span.set(hit=cached is not None).end()
+            if cached is not None:
+                yield run.cache_hit(cached)
+                return
+
+        while True:
+            if run.match is not None:
+                yield run.matched()
+            else:
+                with run.span("cypher_generation") as span:
+                    generated = await executor.invoke(
+                        _as_runnable(chain.cypher_generation_chain),
+                        _cypher_inputs(chain, graph, question, contextual_query),
+                    )
+                yield run.generated(chain, generated, span.seconds)
+
+            with run.span("db_execution") as span:
+                method, call = run.db_call()
+                event = run.fetched(span, method, await getattr(executor, method)(**call) if method else call)
+            yield event
+            if not run.fall_back():
+                break
+
+        span = run.span("answer_generation")
+        async for chunk in executor.stream(_as_runnable(chain.qa_chain), run.qa_inputs(question)):
+            event = run.token(chunk)
+            if event is not None:
+                yield event
+        yield run.done(span)
+    except Exception as e:
+        run.fail(e)
+        raise
+
+
+def format_timings(timings):
+    """One-line stage breakdown shown under a streamed answer"""
+    labels = [
+        ("cache", "cache hit"),
+        ("cypher_generation", "Cypher"),
+        ("db_execution", "DB"),
+        ("answer_generation", "answer"),
+        ("first_token", "first token"),
+        ("total", "total"),
+    ]
+    return " · ".join(f"{label} {timings[key] * 1000:.0f} ms" for key, label in labels if key in timings)
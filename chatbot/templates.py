@@ -0,0 +1,298 @@
+import json
+import os
+import re
+import threading
+import zlib
+
+# Learned Cypher must be read-only; anything that writes or calls procedures
+# is never replayed without the LLM and validation in the loop.
+WRITE_CLAUSE_PATTERN = re.compile(r"\b(CREATE|MERGE|DELETE|DETACH|SET|REMOVE|DROP|CALL|LOAD|FOREACH)\b", re.IGNORECASE)
+STRING_LITERAL_PATTERN = re.compile(r"'((?:[^'\\]|\\.)*)'|\"((?:[^\"\\]|\\.)*)\"")
+NUMBER_LITERAL_PATTERN = re.compile(r"(?<![\w.$])(\d+)(?![\w.])")
+
+DEFAULT_LIMIT = 10
+
+# Words that start a qualifier after a name ("songs by Queen released after
+# 1980"). A string slot that would swallow one does not match, so the
+# question goes to the LLM instead of an exact-name query for
+# "Queen released after 1980". The first word of a name may be one ("In Flames").
+QUALIFIER_WORDS = {
+    "after", "before", "between", "during", "from", "having", "in", "ordered", "ranked", "recorded",
+    "released", "since", "sorted", "where", "which", "with", "without",
+}
+
+
+def clean_question(question):
+    """Collapse whitespace and drop trailing punctuation, keeping the user's casing"""
+    return re.sub(r"\s+", " ", question.strip()).rstrip(" ?!.")
+
+
+def has_qualifier(value):
+    """True if a captured name carries a trailing qualifier rather than being just a name"""
+    return any(word in QUALIFIER_WORDS for word in value.lower().split()[1:])
+
+
+class QueryTemplate:
+    """A question pattern with named slots and the Cypher that answers it"""
+
+    def __init__(self, name, pattern, cypher, slots=None, defaults=None, learned=False):
+        self.name = name
+        self.pattern = pattern
+        self.regex = re.compile(pattern, re.IGNORECASE)
+        self.cypher = cypher
+        self.slots = slots or {}
+        self.defaults = defaults or {}
+        self.learned = learned
+        self.hits = 0
+
+    def match(self, question):
+        """Return the Cypher parameters if the question fits this template"""
+        found = self.regex.fullmatch(question)
+        if not found:
+            return None
+        params = dict(self.defaults)
+        for slot, value in found.groupdict().items():
+            if value is None:
+                continue
+            kind = self.slots.get(slot, "str")
+            if kind == "int":
+                value = int(value)
+            elif kind == "lower":
+                value = value.lower()
+            elif has_qualifier(value):
+                return None
+            params[slot] = value
+        return params
+
+    def to_dict(self):
+        return {"name": self.name, "pattern": self.pattern, "cypher": self.cypher,
+                "slots": self.slots, "defaults": self.defaults, "hits": self.hits}
+
+
+class TemplateMatch:
+    def __init__(self, template, params):
+        self.template = template
+        self.params = params
+
+    @property
+    def cypher(self):
+        return self.template.cypher
+
+
+# Hand-written, index-anchored Cypher for the question shapes in the sidebar
+# and the README usage table.
+BUILTIN_TEMPLATES = [
+    QueryTemplate(
+        "most_popular_songs_by_artist",
+        r"(?:what are |show me |list |find )?(?:the )?(?:top (?P<limit>\d+) )?most popular songs by (?P<artist>.+)",
+        """MATCH (a:Artist {name: $artist})-[:SINGS]->(s:Song)
+RETURN s.title AS title, s.popularity AS popularity
+ORDER BY s.popularity DESC LIMIT $limit""",
+        slots={"limit": "int"}, defaults={"limit": DEFAULT_LIMIT},
+    ),
+    QueryTemplate(
+        "top_songs_overall",
+        r"(?:what are |show me |list |find )?(?:the )?top (?P<limit>\d+) most popular songs(?: overall)?",
+        """MATCH (s:Song) WHERE s.popularity IS NOT NULL
+RETURN s.title AS title, s.popularity AS popularity
+ORDER BY s.popularity DESC LIMIT $limit""",
+        slots={"limit": "int"}, defaults={"limit": DEFAULT_LIMIT},
+    ),
+    QueryTemplate(
+        "albums_released_in_year",
+        r"(?:(?:which|what) )?albums (?:were )?released in (?P<year>\d{4})",
+        """MATCH (:Year {value: $year})<-[:RELEASED_IN]-(al:Album)
+RETURN al.title AS album, al.releaseDate AS releaseDate
+ORDER BY al.releaseDate LIMIT $limit""",
+        slots={"year": "int"}, defaults={"limit": 50},
+    ),
+    QueryTemplate(
+        "albums_released_between_years",
+        r"(?:(?:which|what) )?albums (?:were )?released (?:between|from) (?P<start>\d{4}) (?:and|to) (?P<end>\d{4})",
+        """MATCH (al:Album) WHERE $start <= al.year <= $end
+RETURN al.title AS album, al.releaseDate AS releaseDate
+ORDER BY al.releaseDate LIMIT $limit""",
+        slots={"start": "int", "end": "int"}, defaults={"limit": 50},
+    ),
+    QueryTemplate(
+        "most_popular_songs_in_genre",
+        r"(?:what are |show me |list |find )?(?:the )?(?:top (?P<limit>\d+) )?most popular '?(?P<genre>[\w&]+)'? songs",
+        """MATCH (:Genre {name: $genre})<-[:IN_GENRE]-(s:Song)
+RETURN s.title AS title, s.popularity AS popularity
+ORDER BY s.popularity DESC LIMIT $limit""",
+        slots={"limit": "int", "genre": "lower"}, defaults={"limit": DEFAULT_LIMIT},
+    ),
+    QueryTemplate(
+        "artists_in_genre",
+        r"(?:list |show me |which |what )?(?:the )?artists (?:are )?in the '?(?P<genre>[\w&]+)'? genre",
+        """MATCH (:Genre {name: $genre})<-[r:ACTIVE_IN]-(a:Artist)
+RETURN a.name AS artist, r.songCount AS songs
+ORDER BY songs DESC LIMIT $limit""",
+        slots={"genre": "lower"}, defaults={"limit": 25},
+    ),
+    QueryTemplate(
+        "artists_with_most_songs",
+        r"(?:which|what|who are the|list the|show me the)? ?(?:top (?P<limit>\d+) )?artists (?:have|with) the most songs",
+        """MATCH (a:Artist) WHERE a.songCount IS NOT NULL
+RETURN a.name AS artist, a.songCount AS songs, a.albumCount AS albums
+ORDER BY a.songCount DESC LIMIT $limit""",
+        slots={"limit": "int"}, defaults={"limit": DEFAULT_LIMIT},
+    ),
+    QueryTemplate(
+        "artists_with_most_songs_in_genre",
+        r"(?:which|what|who are the|list the|show me the)? ?(?:top (?P<limit>\d+) )?artists (?:have|with) the most '?(?P<genre>[\w&]+)'? songs",
+        """MATCH (:Genre {name: $genre})<-[r:ACTIVE_IN]-(a:Artist)
+RETURN a.name AS artist, r.songCount AS songs
+ORDER BY r.songCount DESC LIMIT $limit""",
+        slots={"limit": "int", "genre": "lower"}, defaults={"limit": DEFAULT_LIMIT},
+    ),
+    QueryTemplate(
+        "songs_per_genre",
+        r"(?:how many songs (?:are there )?(?:in each|per) genre|(?:show me |list )?(?:the )?genre breakdown)",
+        """MATCH (g:Genre)
+RETURN g.name AS genre, g.songCount AS songs, g.artistCount AS artists
+ORDER BY g.songCount DESC""",
+    ),
+    QueryTemplate(
+        "high_energy_dance_songs",
+        r"(?:show me |find |list )?(?:high[- ]energy dance songs|songs with high danceability and energy)",
+        """MATCH (s:Song) WHERE s.energy >= $min_energy AND s.danceability >= $min_danceability
+RETURN s.title AS title, s.energy AS energy, s.danceability AS danceability
+ORDER BY s.energy + s.danceability DESC LIMIT $limit""",
+        defaults={"min_energy": 0.8, "min_danceability": 0.7, "limit": 20},
+    ),
+    QueryTemplate(
+        "random_songs",
+        r"(?:give me |show me |list )?(?P<limit>\d+) random songs",
+        """MATCH (s:Song)
+WITH s, rand() AS r ORDER BY r LIMIT $limit
+RETURN s.title AS title, s.genre AS genre, s.popularity AS popularity""",
+        slots={"limit": "int"},
+    ),
+]
+
+
+def _find_free_span(question, literal, taken):
+    """Locate `literal` as a whole word in the question, skipping claimed spans"""
+    for found in re.finditer(rf"(?<!\w){re.escape(literal)}(?!\w)", question, re.IGNORECASE):
+        if all(found.end() <= start or found.start() >= end for start, end, _ in taken):
+            return found.start(), found.end()
+    return None
+
+
+def _replace_numbers(cypher, literal, slot):
+    """Swap a number for a parameter everywhere outside string literals"""
+    pieces, pos = [], 0
+    for quoted in STRING_LITERAL_PATTERN.finditer(cypher):
+        outside = cypher[pos:quoted.start()]
+        pieces.append(NUMBER_LITERAL_PATTERN.sub(lambda m: f"${slot}" if m.group(1) == literal else m.group(0), outside))
+        pieces.append(quoted.group(0))
+        pos = quoted.end()
+    outside = cypher[pos:]
+    pieces.append(NUMBER_LITERAL_PATTERN.sub(lambda m: f"${slot}" if m.group(1) == literal else m.group(0), outside))
+    return "".join(pieces)
+
+
+def generalize(question, cypher):
+    """Turn a question and the Cypher that answered it into a reusable template
+
+    Every string or number literal in the Cypher that also appears as a whole
+    word in the question becomes a slot on both sides. Returns None for Cypher
+    that writes, since learned templates run without validation.
+    """
+    if WRITE_CLAUSE_PATTERN.search(cypher):
+        return None
+
+    slots, taken = {}, []
+    for quoted in list(STRING_LITERAL_PATTERN.finditer(cypher)):
+        literal = quoted.group(1) if quoted.group(1) is not None else quoted.group(2)
+        span = _find_free_span(question, literal, taken) if literal else None
+        if span is None:
+            continue
+        slot = f"s{len(slots)}"
+        slots[slot] = "str"
+        taken.append((*span, slot))
+        cypher = cypher.replace(quoted.group(0), f"${slot}", 1)
+
+    outside_strings = STRING_LITERAL_PATTERN.sub("", cypher)
+    for literal in sorted(set(NUMBER_LITERAL_PATTERN.findall(outside_strings)), key=len, reverse=True):
+        span = _find_free_span(question, literal, taken)
+        if span is None:
+            continue
+        slot = f"s{len(slots)}"
+        slots[slot] = "int"
+        taken.append((*span, slot))
+        cypher = _replace_numbers(cypher, literal, slot)
+
+    pattern, pos = [], 0
+    for start, end, slot in sorted(taken):
+        group = r"\d+" if slots[slot] == "int" else ".+?"
+        pattern.append(re.escape(question[pos:start]))
+        pattern.append(f"(?P<{slot}>{group})")
+        pos = end
+    pattern.append(re.escape(question[pos:]))
+    pattern = "".join(pattern)
+    name = f"learned_{zlib.crc32(pattern.lower().encode('utf-8')):08x}"
+    return QueryTemplate(name, pattern, cypher, slots=slots, learned=True)
+
+
+class TemplateEngine:
+    """Matches questions to Cypher templates and learns new ones from the LLM"""
+
+    def __init__(self, store_path=None, max_learned=500):
+        self.store_path = store_path
+        self.max_learned = max_learned
+        self.builtin = list(BUILTIN_TEMPLATES)
+        self.learned = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.store_path or not os.path.exists(self.store_path):
+            return
+        with open(self.store_path, encoding="utf-8") as f:
+            for entry in json.load(f):
+                template = QueryTemplate(entry["name"], entry["pattern"], entry["cypher"],
+                                         slots=entry.get("slots"), defaults=entry.get("defaults"), learned=True)
+                template.hits = entry.get("hits", 0)
+                self.learned[template.pattern] = template
+
+    def _save(self):
+        if not self.store_path:
+            return
+        directory = os.path.dirname(self.store_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.store_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump([template.to_dict() for template in self.learned.values()], f, indent=2)
+        os.replace(tmp_path, self.store_path)
+
+    def match(self, question):
+        """Return a TemplateMatch for the first template that fits, or None"""
+        question = clean_question(question)
+        with self._lock:
+            templates = self.builtin + list(self.learned.values())
+        for template in templates:
+            params = template.match(question)
+            if params is not None:
+                template.hits += 1
+                return TemplateMatch(template, params)
+        return None
+
+    def learn(self, question, cypher):
+        """Remember LLM-generated Cypher that ran successfully for this question"""
+        template = generalize(clean_question(question), cypher.strip())
+        if template is None:
+            return None
+        with self._lock:
+            if template.pattern in self.learned:
+                return self.learned[template.pattern]
+            if len(self.learned) >= self.max_learned:
+                # Drop the least used learned template to make room.
+                coldest = min(self.learned.values(), key=lambda t: t.hits)
+                del self.learned[coldest.pattern]
+            self.learned[template.pattern] = template
+            self._save()
+        return template
+
@@ -0,0 +1,92 @@
+import re
+
+from chatbot.templates import clean_question
+
+SIMILAR_PATTERN = re.compile(
+    r"(?:find |show me |recommend |give me |list |suggest )?(?:some |(?P<limit>\d+) )?"
+    r"(?:other )?(?:songs|tracks|music) (?:similar to|like|that sound like) "
+    r"[\"'“]?(?P<title>.+?)[\"'”]?(?: by (?P<artist>.+))?",
+    re.IGNORECASE,
+)
+
+FEATURE_WORDS = {
+    'energy': 'energy', 'energetic': 'energy',
+    'danceability': 'danceability', 'dance': 'danceability', 'danceable': 'danceability',
+    'popularity': 'popularity', 'popular': 'popularity',
+    'long': 'duration', 'short': 'duration',
+}
+DESCRIPTOR = r"(?:very |high|low|energy|energetic|danceability|dance|danceable|popularity|popular|short|long|and|,|-|\s)+"
+RANGE_PATTERN = re.compile(
+    rf"(?:show me |find |list |give me )?(?:some |(?P<limit>\d+) )?"
+    rf"(?:(?P<before>{DESCRIPTOR}) (?:songs|tracks)|(?:songs|tracks) with (?P<after>{DESCRIPTOR}))",
+    re.IGNORECASE,
+)
+
+
+class ToolMatch:
+    """A question answered in-process; `rows` stand in for a Cypher result"""
+
+    cypher = None
+    params = None
+
+    def __init__(self, name, rows):
+        self.name = name
+        self.rows = rows
+
+
+def parse_descriptors(text):
+    """Map "high-energy dance" / "low popularity" to {feature: "high"|"low"}"""
+    levels, level = {}, "high"
+    for word in re.findall(r"[a-z]+", text.lower()):
+        if word in ("high", "low"):
+            level = word
+        elif word == "short":
+            levels["duration"] = "low"
+        elif word == "long":
+            levels["duration"] = "high"
+        elif word in FEATURE_WORDS:
+            levels[FEATURE_WORDS[word]] = level
+    return levels
+
+
+class SimilarityTool:
+    """Answers "songs like X" and audio-feature range questions from a SimilarityIndex"""
+
+    def __init__(self, index, default_limit=10):
+        self.index = index
+        self.default_limit = default_limit
+
+    def match(self, question):
+        question = clean_question(question)
+        found = SIMILAR_PATTERN.fullmatch(question)
+        if found:
+            return self._similar(found)
+        found = RANGE_PATTERN.fullmatch(question)
+        if found:
+            return self._range(found)
+        return None
+
+    def _limit(self, found):
+        return int(found.group("limit")) if found.group("limit") else self.default_limit
+
+    def _similar(self, found):
+        title, artist = found.group("title").strip(), found.group("artist")
+        song_ids = self.index.find(title, artist.strip() if artist else None)
+        if not song_ids and artist:
+            # "songs like Bohemian Rhapsody by Queen" may also be a title containing "by"
+            song_ids = self.index.find(f"{title} by {artist}")
+        if not song_ids:
+            return None
+        rows = self.index.similar_to(song_ids[0], k=self._limit(found))
+        return ToolMatch("similar_songs", rows)
+
+    def _range(self, found):
+        levels = parse_descriptors(found.group("before") or found.group("after"))
+        if not levels:
+            return None
+        bounds = {}
+        for feature, level in levels.items():
+            low, high = self.index.quantiles[feature]
+            bounds[feature] = (high, None) if level == "high" else (None, low)
+        rows = self.index.range_query(bounds, limit=self._limit(found))
+        return ToolMatch("audio_feature_range", rows)
@@ -0,0 +1,77 @@
+import threading
+import time
+
+from tracing import TRACER
+
+_current = None
+
+
+class Warmup:
+    """Runs the app's slow start-up steps on a background thread
+
+    Each step is a (name, callable) pair. Steps run in order and are called
+    with the warmup itself, so later steps can use earlier results. The page
+    renders while they run; code that needs a step's result calls
+    `result(name)`, which waits for it and re-raises its error. Every step
+    is traced as a `startup.<name>` span, and `status()` feeds the
+    readiness endpoint.
+    """
+
+    def __init__(self, steps):
+        global _current
+        self.steps = list(steps)
+        self._results = {}
+        self._errors = {}
+        self._seconds = {}
+        self._done = {name: threading.Event() for name, _ in self.steps}
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="melodia-warmup", daemon=True)
+        self._thread.start()
+        _current = self
+
+    def _run(self):
+        with TRACER.span("startup"):
+            for name, step in self.steps:
+                start = time.perf_counter()
+                try:
+                    with TRACER.span(f"startup.{name}"):
+                        self._results[name] = step(self)
+                except Exception as e:
+                    self._errors[name] = e
+                finally:
+                    self._seconds[name] = time.perf_counter() - start
+                    self._done[name].set()
+
+    def result(self, name, timeout=None):
+        """Wait for step `name` and return its result, re-raising its error"""
+        if not self._done[name].wait(timeout):
+            raise TimeoutError(f"Start-up step {name} is still running")
+        if name in self._errors:
+            raise self._errors[name]
+        return self._results[name]
+
+    @property
+    def ready(self):
+        return all(event.is_set() for event in self._done.values()) and not self._errors
+
+    def status(self):
+        """{"ready": bool, "steps": {name: {"state", "seconds", "error"}}}"""
+        steps = {}
+        for name, _ in self.steps:
+            if not self._done[name].is_set():
+                steps[name] = {"state": "running", "seconds": None, "error": None}
+            else:
+                error = self._errors.get(name)
+                steps[name] = {
+                    "state": "failed" if error else "done",
+                    "seconds": round(self._seconds[name], 3),
+                    "error": str(error) if error else None,
+                }
+        return {"ready": self.ready, "steps": steps}
+
+
+def readiness():
+    """Status of the most recently started warmup, for the /ready endpoint"""
+    if _current is None:
+        return {"ready": False, "steps": {}}
+    return _current.status()
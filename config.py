@@ -8,4 +8,72 @@ NEO4J_URI = os.getenv("NEO4J_URI")
 NEO4J_USERNAME = os.getenv("NEO4J_USERNAME")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-DATA_FILE = os.getenv("DATA_FILE")
\ No newline at end of file
+DATA_FILE = os.getenv("DATA_FILE")
+
+# Shared Neo4j driver (database/driver.py); use a neo4j:// URI on a cluster
+NEO4J_DATABASE = os.getenv("NEO4J_DATABASE") or None  # unset uses the server default
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "100"))
+NEO4J_CONNECTION_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_CONNECTION_ACQUISITION_TIMEOUT", "60"))
+NEO4J_CONNECTION_TIMEOUT = float(os.getenv("NEO4J_CONNECTION_TIMEOUT", "30"))
+NEO4J_MAX_CONNECTION_LIFETIME = float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600"))
+NEO4J_LIVENESS_CHECK_TIMEOUT = os.getenv("NEO4J_LIVENESS_CHECK_TIMEOUT")  # idle seconds before a ping; unset never pings
+NEO4J_KEEP_ALIVE = os.getenv("NEO4J_KEEP_ALIVE", "true").lower() in ("1", "true", "yes")
+NEO4J_FETCH_SIZE = int(os.getenv("NEO4J_FETCH_SIZE", "1000"))  # records pulled per round trip
+
+# Loader tuning
+LOAD_BATCH_SIZE = int(os.getenv("LOAD_BATCH_SIZE", "5000"))
+LOAD_CHUNK_SIZE = int(os.getenv("LOAD_CHUNK_SIZE", "50000"))
+LOAD_DTYPE_BACKEND = os.getenv("LOAD_DTYPE_BACKEND")  # set to "pyarrow" for Arrow-backed columns
+LOAD_WORKERS = int(os.getenv("LOAD_WORKERS", "4"))
+LOAD_MAX_RETRIES = int(os.getenv("LOAD_MAX_RETRIES", "5"))
+LOAD_MANIFEST_FILE = os.getenv("LOAD_MANIFEST_FILE", "data/load_manifest.json")
+LOAD_CHECKPOINT_FILE = os.getenv("LOAD_CHECKPOINT_FILE", "data/load_checkpoint.json")
+LOAD_CHECKPOINT_EVERY = int(os.getenv("LOAD_CHECKPOINT_EVERY", "20"))  # batches between checkpoint saves
+LOAD_CHECKPOINT_SECONDS = float(os.getenv("LOAD_CHECKPOINT_SECONDS", "5"))  # or seconds, whichever comes first
+SIMILARITY_INDEX_FILE = os.getenv("SIMILARITY_INDEX_FILE", "data/similarity_index.npz")
+ENTITY_INDEX_FILE = os.getenv("ENTITY_INDEX_FILE", "data/entity_index.npz")
+
+# Answer cache for the chatbot ("memory", "sqlite" or "off")
+QA_CACHE_BACKEND = os.getenv("QA_CACHE_BACKEND", "memory")
+QA_CACHE_PATH = os.getenv("QA_CACHE_PATH", "data/qa_cache.sqlite3")
+QA_CACHE_TTL = int(os.getenv("QA_CACHE_TTL", "3600"))
+QA_CACHE_MAX_ENTRIES = int(os.getenv("QA_CACHE_MAX_ENTRIES", "1000"))
+
+# NL->Cypher templates learned from validated LLM output
+CYPHER_TEMPLATE_STORE = os.getenv("CYPHER_TEMPLATE_STORE", "data/cypher_templates.json")
+CYPHER_TEMPLATE_MAX_LEARNED = int(os.getenv("CYPHER_TEMPLATE_MAX_LEARNED", "500"))
+
+# Conversation context sent to the LLM ("extractive" or "llm" summaries)
+CONTEXT_MAX_PROMPT_TOKENS = int(os.getenv("CONTEXT_MAX_PROMPT_TOKENS", "800"))
+CONTEXT_MAX_SUMMARY_TOKENS = int(os.getenv("CONTEXT_MAX_SUMMARY_TOKENS", "200"))
+CONTEXT_MAX_MESSAGES = int(os.getenv("CONTEXT_MAX_MESSAGES", "40"))
+CONTEXT_MAX_MESSAGE_CHARS = int(os.getenv("CONTEXT_MAX_MESSAGE_CHARS", "4000"))
+CONTEXT_SUMMARIZER = os.getenv("CONTEXT_SUMMARIZER", "extractive")
+
+# Shared async execution layer for LLM and Neo4j calls
+ASYNC_EXECUTION = os.getenv("ASYNC_EXECUTION", "true").lower() in ("1", "true", "yes")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+DB_MAX_CONCURRENCY = int(os.getenv("DB_MAX_CONCURRENCY", "16"))
+MAX_PENDING_REQUESTS = int(os.getenv("MAX_PENDING_REQUESTS", "200"))
+
+# Index audit (python -m database.audit)
+QUERY_AUDIT_LOG = os.getenv("QUERY_AUDIT_LOG", "data/generated_queries.jsonl")
+
+# Tracing and metrics
+TRACE_LOG_FILE = os.getenv("TRACE_LOG_FILE", "")  # JSON-lines span log, off unless set (e.g. data/traces.jsonl)
+TRACE_LOG_MAX_BYTES = int(os.getenv("TRACE_LOG_MAX_BYTES", str(50 * 1024 * 1024)))  # rotated to <file>.1 past this
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # serve Prometheus /metrics from the app when set
+METRICS_FILE = os.getenv("METRICS_FILE", "data/metrics.prom")  # written by the loader after each run
+TRACE_PROFILE_QUERIES = os.getenv("TRACE_PROFILE_QUERIES", "false").lower() in ("1", "true", "yes")
+
+# App start-up
+APP_PREWARM = os.getenv("APP_PREWARM", "true").lower() in ("1", "true", "yes")  # warm up on page load, not first query
+SCHEMA_SNAPSHOT_FILE = os.getenv("SCHEMA_SNAPSHOT_FILE", "data/graph_schema.json")
+
+# Entity resolution: how close a misspelt name must be to resolve (0-1)
+ENTITY_MATCH_THRESHOLD = float(os.getenv("ENTITY_MATCH_THRESHOLD", "0.8"))
+
+# Result-size guard
+RESULT_ROW_LIMIT = int(os.getenv("RESULT_ROW_LIMIT", "1000"))  # rows fetched per answer
+QA_MAX_ROWS = int(os.getenv("QA_MAX_ROWS", "25"))  # rows shown to the QA LLM before summarising
+RESULT_PAGE_SIZE = int(os.getenv("RESULT_PAGE_SIZE", "50"))  # rows per page of the results table
@@ -1,11 +1,32 @@
+import argparse
+
+from database.bulk_import import export_music_data, finalize_import
 from database.loader import load_music_data
 from database.schema import setup_database_schema
 
 if __name__ == "__main__":
-    print("Setting up database schema...")
-    setup_database_schema()
-    
-    print("Loading music data...")
-    load_music_data()
-    
-    print("👍Database setup and data loading complete.")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Set up the Neo4j schema and load the music data")
+    parser.add_argument("--full", action="store_true",
+                        help="wipe the graph and reload everything instead of syncing the delta")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue an interrupted load from its last committed batch")
+    parser.add_argument("--bulk", metavar="DIR",
+                        help="write neo4j-admin import files to DIR instead of loading over Bolt")
+    parser.add_argument("--compress", action="store_true", help="gzip the --bulk data files")
+    parser.add_argument("--finalize-import", action="store_true",
+                        help="create the schema and aggregates after a neo4j-admin import")
+    args = parser.parse_args()
+
+    if args.bulk:
+        export_music_data(args.bulk, compress=args.compress)
+    elif args.finalize_import:
+        finalize_import()
+        print("👍Imported graph is ready.")
+    else:
+        print("Setting up database schema...")
+        setup_database_schema()
+        
+        print("Loading music data...")
+        load_music_data(full_reload=args.full, resume=args.resume)
+        
+        print("👍Database setup and data loading complete.")
@@ -0,0 +1,50 @@
+# Materialised statistics refreshed after every load, so "top N" questions
+# read a handful of precomputed properties instead of aggregating the graph.
+#
+#   (:Artist {songCount, albumCount})
+#   (:Artist)-[:ACTIVE_IN {songCount}]->(:Genre {name, songCount, artistCount})
+#   (:GraphMeta {artistCount, albumCount, songCount, genreCount, yearCount,
+#                singsCount, containsCount, createdCount})
+#
+# ACTIVE_IN is derived from (:Artist)-[:SINGS]->(:Song)-[:IN_GENRE]->(:Genre).
+
+ARTIST_AGGREGATES_QUERY = """
+UNWIND $rows AS row
+MATCH (a:Artist {name: row.name})
+OPTIONAL MATCH (a)-[old:ACTIVE_IN]->(:Genre)
+DELETE old
+WITH DISTINCT a
+CALL {
+    WITH a
+    OPTIONAL MATCH (a)-[:SINGS]->(s:Song)-[:IN_GENRE]->(g:Genre)
+    WITH a, g, count(s) AS songs
+    FOREACH (_ IN CASE WHEN g IS NULL THEN [] ELSE [1] END |
+        MERGE (a)-[r:ACTIVE_IN]->(g)
+        SET r.songCount = songs
+    )
+    RETURN sum(songs) AS songCount
+}
+SET a.songCount = songCount, a.albumCount = COUNT { (a)-[:CREATED]->(:Album) }
+"""
+
+GENRE_AGGREGATES_QUERY = """
+MATCH (g:Genre)
+WITH g, COUNT { (g)<-[:IN_GENRE]-(:Song) } AS songs
+SET g.songCount = songs, g.artistCount = COUNT { (g)<-[:ACTIVE_IN]-(:Artist) }
+WITH g WHERE songs = 0
+DETACH DELETE g
+"""
+
+GRAPH_AGGREGATES_QUERY = """
+MERGE (m:GraphMeta {key: 'graph'})
+SET m.artistCount = COUNT { MATCH (:Artist) },
+    m.albumCount = COUNT { MATCH (:Album) },
+    m.songCount = COUNT { MATCH (:Song) },
+    m.genreCount = COUNT { MATCH (:Genre) },
+    m.yearCount = COUNT { MATCH (:Year) },
+    m.singsCount = COUNT { MATCH ()-[:SINGS]->() },
+    m.containsCount = COUNT { MATCH ()-[:CONTAINS]->() },
+    m.createdCount = COUNT { MATCH ()-[:CREATED]->() }
+"""
+
+ALL_ARTISTS_QUERY = "MATCH (a:Artist) RETURN a.name AS name"
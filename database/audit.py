@@ -0,0 +1,214 @@
+import argparse
+import json
+import os
+import re
+import threading
+
+from config import CYPHER_TEMPLATE_STORE, QUERY_AUDIT_LOG
+from database.driver import read_session, write_session
+
+# Plan operators that touch every node (of a label) instead of seeking an index
+SCAN_OPERATORS = {"NodeByLabelScan", "AllNodesScan"}
+
+# Indexes every deployment should have; setup_database_schema creates the
+# same ones, so --create only matters for databases set up before they existed.
+RECOMMENDED_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS FOR (al:Album) ON (al.releaseDate)",
+    "CREATE INDEX IF NOT EXISTS FOR (s:Song) ON (s.title)",
+    "CREATE INDEX IF NOT EXISTS FOR (al:Album) ON (al.title)",
+    "CREATE FULLTEXT INDEX songTitles IF NOT EXISTS FOR (s:Song) ON EACH [s.title]",
+    "CREATE FULLTEXT INDEX artistNames IF NOT EXISTS FOR (a:Artist) ON EACH [a.name]",
+    "CREATE FULLTEXT INDEX albumTitles IF NOT EXISTS FOR (al:Album) ON EACH [al.title]",
+]
+
+NODE_PATTERN = re.compile(r"\((\w+)?:(\w+)(?:\s*\{([^}]*)\})?")
+MAP_KEY_PATTERN = re.compile(r"(\w+)\s*:")
+PROPERTY_PATTERN = re.compile(r"\b(\w+)\.(\w+)\b")
+SET_PATTERN = re.compile(r"\b(\w+)\.(\w+)\s*=")
+WHERE_PATTERN = re.compile(r"\bWHERE\b(.*?)(?=\b(?:RETURN|WITH|MATCH|OPTIONAL|ORDER|UNWIND|CALL)\b|$)", re.DOTALL | re.IGNORECASE)
+
+_log_lock = threading.Lock()
+
+
+def record_query(cypher, path=QUERY_AUDIT_LOG):
+    """Append an LLM-generated Cypher statement to the audit log"""
+    if not path or not cypher:
+        return
+    directory = os.path.dirname(path)
+    with _log_lock:
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"cypher": cypher}) + "\n")
+
+
+def _labels_by_variable(cypher):
+    labels = {}
+    for variable, label, _ in NODE_PATTERN.findall(cypher):
+        if variable:
+            labels[variable] = label
+    return labels
+
+
+def filtered_properties(cypher):
+    """{label: {property}} a query filters on, in property maps or WHERE clauses"""
+    labels = _labels_by_variable(cypher)
+    found = {}
+    for _, label, props in NODE_PATTERN.findall(cypher):
+        found.setdefault(label, set()).update(MAP_KEY_PATTERN.findall(props))
+    for clause in WHERE_PATTERN.findall(cypher):
+        for variable, prop in PROPERTY_PATTERN.findall(clause):
+            if variable in labels:
+                found.setdefault(labels[variable], set()).add(prop)
+    return found
+
+
+def written_properties():
+    """{label: {property}} the loader actually writes, read from its Cypher"""
+    from database import aggregates, loader
+
+    written = {}
+    queries = [getattr(module, name) for module in (loader, aggregates) for name in dir(module)
+               if name.endswith("_QUERY")]
+    for cypher in queries:
+        if "MERGE" not in cypher and "SET" not in cypher:
+            continue
+        labels = _labels_by_variable(cypher)
+        for clause in re.findall(r"MERGE\s*\([^)]*\)", cypher):
+            for _, label, props in NODE_PATTERN.findall(clause):
+                written.setdefault(label, set()).update(MAP_KEY_PATTERN.findall(props))
+        for variable, prop in SET_PATTERN.findall(cypher):
+            if variable in labels:
+                written.setdefault(labels[variable], set()).add(prop)
+    return written
+
+
+def declared_indexes(session):
+    """Node indexes on the database as (name, type, label, properties)"""
+    rows = session.run(
+        "SHOW INDEXES YIELD name, type, entityType, labelsOrTypes, properties "
+        "WHERE entityType = 'NODE' AND labelsOrTypes IS NOT NULL "
+        "RETURN name, type, labelsOrTypes[0] AS label, properties"
+    )
+    return [(r["name"], r["type"], r["label"], tuple(r["properties"])) for r in rows]
+
+
+def unwritten_indexes(indexes, written):
+    """Indexes on properties the loader never writes (they stay empty)"""
+    return [
+        (name, label, props) for name, _, label, props in indexes
+        if not set(props) <= written.get(label, set())
+    ]
+
+
+def plan_operators(plan):
+    """Flatten an EXPLAIN plan into (operator, details) pairs"""
+    if plan is None:
+        return []
+    operator = plan.get("operatorType", "").split("@")[0]
+    details = plan.get("args", plan.get("arguments", {})).get("Details", "")
+    found = [(operator, details)]
+    for child in plan.get("children", []):
+        found.extend(plan_operators(child))
+    return found
+
+
+def explain(session, cypher, params=None):
+    """EXPLAIN a query (nothing is executed) and return its scan operators"""
+    summary = session.run(f"EXPLAIN {cypher}", params or {}).consume()
+    return [(op, details) for op, details in plan_operators(summary.plan) if op in SCAN_OPERATORS]
+
+
+def suggest_indexes(cypher, scans, indexes):
+    """CREATE INDEX statements for properties a scanning query filters on"""
+    indexed = {(label, props[0]) for _, kind, label, props in indexes if kind == "RANGE" and len(props) == 1}
+    scanned = set()
+    for _, details in scans:
+        scanned.update(label for _, label, _ in NODE_PATTERN.findall(f"({details})"))
+    suggestions = []
+    for label, props in filtered_properties(cypher).items():
+        if label not in scanned:
+            continue
+        for prop in sorted(props):
+            if (label, prop) not in indexed:
+                suggestions.append(f"CREATE INDEX IF NOT EXISTS FOR (n:{label}) ON (n.{prop})")
+    return suggestions
+
+
+def load_corpus(log_path=QUERY_AUDIT_LOG, template_store=CYPHER_TEMPLATE_STORE):
+    """Cypher to audit: built-in templates, learned templates and the generated-query log"""
+    from chatbot.templates import BUILTIN_TEMPLATES
+
+    corpus = {template.cypher: template.defaults for template in BUILTIN_TEMPLATES}
+    if template_store and os.path.exists(template_store):
+        with open(template_store, encoding="utf-8") as f:
+            for template in json.load(f):
+                corpus.setdefault(template["cypher"], template.get("defaults", {}))
+    if log_path and os.path.exists(log_path):
+        with open(log_path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    corpus.setdefault(json.loads(line)["cypher"], {})
+    return corpus
+
+
+def audit(session, corpus):
+    """EXPLAIN every query in the corpus and report scans and missing indexes"""
+    indexes = declared_indexes(session)
+    report = {"queries": [], "unwritten_indexes": unwritten_indexes(indexes, written_properties())}
+    for cypher, params in corpus.items():
+        # EXPLAIN only plans, so unbound parameters just need a placeholder;
+        # LIMIT/SKIP still insist on a non-negative integer.
+        placeholders = {name: 10 if name in ("limit", "skip") else None for name in re.findall(r"\$(\w+)", cypher)}
+        params = {**placeholders, **params}
+        try:
+            scans = explain(session, cypher, params)
+        except Exception as e:
+            report["queries"].append({"cypher": cypher, "error": str(e)})
+            continue
+        if scans:
+            report["queries"].append({
+                "cypher": cypher, "scans": scans,
+                "suggestions": suggest_indexes(cypher, scans, indexes),
+            })
+    return report
+
+
+def print_report(report, corpus_size):
+    flagged = [q for q in report["queries"] if "scans" in q]
+    failed = [q for q in report["queries"] if "error" in q]
+    print(f"Audited {corpus_size} queries: {len(flagged)} scan, {len(failed)} failed to plan")
+    for query in flagged:
+        print("\n" + query["cypher"].strip())
+        for operator, details in query["scans"]:
+            print(f"  {operator}: {details}")
+        for suggestion in query["suggestions"]:
+            print(f"  suggest: {suggestion}")
+    for query in failed:
+        print(f"\nCould not plan: {query['cypher'].strip()}\n  {query['error']}")
+    for name, label, props in report["unwritten_indexes"]:
+        print(f"\nIndex {name} on :{label}({', '.join(props)}) covers properties the loader never writes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report Cypher queries that scan instead of using an index")
+    parser.add_argument("--log", default=QUERY_AUDIT_LOG, help="Generated-query log to audit")
+    parser.add_argument("--create", action="store_true", help="Create suggested and recommended indexes")
+    args = parser.parse_args()
+
+    with read_session() as session:
+        corpus = load_corpus(args.log)
+        report = audit(session, corpus)
+        print_report(report, len(corpus))
+    if args.create:
+        statements = dict.fromkeys(RECOMMENDED_INDEXES)
+        for query in report["queries"]:
+            statements.update(dict.fromkeys(query.get("suggestions", [])))
+        with write_session() as session:
+            for statement in statements:
+                print(f"Running: {statement}")
+                session.run(statement).consume()
+
+
+if __name__ == "__main__":
+    main()
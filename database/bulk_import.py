@@ -0,0 +1,190 @@
+import os
+
+import pandas as pd
+from tqdm import tqdm
+
+from config import (
+    DATA_FILE, LOAD_CHUNK_SIZE, LOAD_DTYPE_BACKEND, LOAD_MANIFEST_FILE, SIMILARITY_INDEX_FILE, ENTITY_INDEX_FILE,
+)
+from database.entities import EntityIndexBuilder
+from database.loader import SONG_DEFAULTS, Neo4jMusicLoader, clean_music_data, tracked_chunks
+from database.manifest import save_manifest
+from database.schema import setup_database_schema
+from database.similarity import SimilarityIndexBuilder
+from database.streaming import TrackIdSet, clean_chunks, read_csv_chunks
+
+# file stem -> neo4j-admin header. Nodes use their natural keys as ids in a
+# per-label id space, so ids are deterministic and match the MERGE keys the
+# transactional loader uses; a later delta sync updates the same nodes.
+NODE_HEADERS = {
+    'Artist': ['name:ID(Artist)'],
+    'Album': ['id:ID(Album)', 'title', 'releaseDate', 'year:int'],
+    'Song': ['id:ID(Song)', 'title', 'duration:long', 'popularity:long', 'genre',
+             'danceability:double', 'energy:double'],
+    'Genre': ['name:ID(Genre)'],
+    'Year': [':ID(Year)', 'value:int'],
+}
+
+RELATIONSHIP_HEADERS = {
+    'SINGS': [':START_ID(Artist)', ':END_ID(Song)'],
+    'CONTAINS': [':START_ID(Album)', ':END_ID(Song)'],
+    'CREATED': [':START_ID(Artist)', ':END_ID(Album)'],
+    'IN_GENRE': [':START_ID(Song)', ':END_ID(Genre)'],
+    'RELEASED_IN': [':START_ID(Album)', ':END_ID(Year)'],
+}
+
+
+def _column(df, name, default):
+    return df[name] if name in df.columns else pd.Series(default, index=df.index)
+
+
+def song_frame(df):
+    """Song node rows in NODE_HEADERS['Song'] order, with the loader's defaults"""
+    return pd.DataFrame({
+        'id': df['track_id'],
+        'title': df['track_name'],
+        'duration': _column(df, 'duration_ms', SONG_DEFAULTS['duration_ms']).astype('int64'),
+        'popularity': _column(df, 'track_popularity', SONG_DEFAULTS['track_popularity']).astype('int64'),
+        'genre': _column(df, 'playlist_genre', SONG_DEFAULTS['playlist_genre']).astype(str),
+        'danceability': _column(df, 'danceability', SONG_DEFAULTS['danceability']),
+        'energy': _column(df, 'energy', SONG_DEFAULTS['energy']),
+    })
+
+
+def album_frame(df):
+    """Album node rows, one per album id in `df`; an unknown release date leaves date and year empty"""
+    albums = df[['track_album_id', 'track_album_name', 'track_album_release_date']].drop_duplicates(
+        subset=['track_album_id']
+    )
+    return pd.DataFrame({
+        'id': albums['track_album_id'],
+        'title': albums['track_album_name'],
+        'releaseDate': albums['track_album_release_date'],
+        'year': albums['track_album_release_date'].str[:4].astype('Int64'),
+    })
+
+
+class BulkImportWriter:
+    """Streams cleaned chunks into neo4j-admin import files
+
+    Every node and relationship type gets a one-line header file and a data
+    file that is appended to chunk by chunk, so memory stays flat however
+    many tracks are exported. Artists, albums, genres, years and CREATED
+    pairs are de-duplicated across chunks with hashed membership sets, since
+    the import tool rejects duplicate ids. `compress` writes .csv.gz data
+    files, which neo4j-admin reads directly.
+    """
+
+    def __init__(self, out_dir, compress=False):
+        self.out_dir = out_dir
+        self.extension = ".csv.gz" if compress else ".csv"
+        self.counts = dict.fromkeys(list(NODE_HEADERS) + list(RELATIONSHIP_HEADERS), 0)
+        self._seen = {name: TrackIdSet() for name in ('Artist', 'Album', 'Genre', 'Year', 'CREATED')}
+        os.makedirs(out_dir, exist_ok=True)
+        for name, header in {**NODE_HEADERS, **RELATIONSHIP_HEADERS}.items():
+            with open(self._path(name, header=True), 'w', encoding='utf-8') as f:
+                f.write(",".join(header) + "\n")
+            # Never append to the data files of an earlier export
+            if os.path.exists(self._path(name)):
+                os.remove(self._path(name))
+
+    def _path(self, name, header=False):
+        filename = f"{name.lower()}_header.csv" if header else f"{name.lower()}{self.extension}"
+        return os.path.join(self.out_dir, filename)
+
+    def _append(self, name, frame):
+        if len(frame):
+            frame.to_csv(self._path(name), mode='a', header=False, index=False)
+            self.counts[name] += len(frame)
+
+    def _new(self, name, frame, key):
+        """Rows of `frame` whose `key` was not written in an earlier chunk"""
+        return frame[self._seen[name].filter_new(key)]
+
+    def write(self, df):
+        artists = pd.DataFrame({'name': df['track_artist'].astype(str).unique()})
+        self._append('Artist', self._new('Artist', artists, artists['name']))
+
+        albums = album_frame(df)
+        albums = self._new('Album', albums, albums['id'])
+        self._append('Album', albums)
+
+        songs = song_frame(df)
+        self._append('Song', songs)
+
+        genres = pd.DataFrame({'name': songs['genre'].unique()})
+        self._append('Genre', self._new('Genre', genres, genres['name']))
+        dated = albums[albums['year'].notna()]
+        year_values = dated['year'].unique()
+        years = pd.DataFrame({'id': year_values, 'value': year_values})
+        self._append('Year', self._new('Year', years, years['id'].astype(str)))
+
+        self._append('SINGS', pd.DataFrame({'artist': df['track_artist'].astype(str), 'song': df['track_id']}))
+        self._append('CONTAINS', pd.DataFrame({'album': df['track_album_id'], 'song': df['track_id']}))
+        self._append('IN_GENRE', songs[['id', 'genre']])
+        self._append('RELEASED_IN', dated[['id', 'year']])
+        created = df[['track_artist', 'track_album_id']].astype(str).drop_duplicates()
+        self._append('CREATED', self._new(
+            'CREATED', created, created['track_artist'] + '\x1f' + created['track_album_id']
+        ))
+
+    def close(self):
+        """Create empty data files for types no chunk produced rows for"""
+        for name, count in self.counts.items():
+            if count == 0:
+                pd.DataFrame(columns=[0]).to_csv(self._path(name), index=False, header=False)
+
+    def command(self, database="neo4j"):
+        """The neo4j-admin invocation that imports the written files"""
+        args = ["neo4j-admin database import full", "--overwrite-destination"]
+        for name in NODE_HEADERS:
+            args.append(f"--nodes={name}={self._path(name, header=True)},{self._path(name)}")
+        for name in RELATIONSHIP_HEADERS:
+            args.append(f"--relationships={name}={self._path(name, header=True)},{self._path(name)}")
+        args.append(database)
+        return " \\\n  ".join(args)
+
+
+def write_import_files(chunks, out_dir, compress=False):
+    """Write every cleaned chunk to neo4j-admin import files and return the writer"""
+    writer = BulkImportWriter(out_dir, compress)
+    for chunk in tqdm(chunks, desc="Bulk export"):
+        writer.write(chunk)
+    writer.close()
+    return writer
+
+
+def export_music_data(out_dir, compress=False, path=DATA_FILE or 'data/spotify_songs.csv', chunksize=LOAD_CHUNK_SIZE):
+    """Offline first load: clean the CSV into neo4j-admin import files
+
+    Also writes the load manifest and the similarity and entity indexes,
+    exactly as a full transactional load would, so later runs can delta-sync
+    on top.
+    """
+    print(f"Streaming {path} in chunks of {chunksize} rows...")
+    chunks = clean_chunks(clean_music_data, read_csv_chunks(path, chunksize, LOAD_DTYPE_BACKEND))
+    similarity = SimilarityIndexBuilder()
+    entities = EntityIndexBuilder()
+    manifest = {}
+    chunks = entities.tap(similarity.tap(chunks))
+    writer = write_import_files(tracked_chunks(chunks, manifest), out_dir, compress)
+    for name, count in writer.counts.items():
+        print(f"  {name}: {count} rows")
+
+    save_manifest(manifest, LOAD_MANIFEST_FILE)
+    similarity.build().save(SIMILARITY_INDEX_FILE)
+    entities.build().save(ENTITY_INDEX_FILE)
+
+    print("\nStop Neo4j, then import with:\n")
+    print(writer.command())
+    print("\nStart Neo4j again and run: python create_data_loader.py --finalize-import")
+    return writer
+
+
+def finalize_import():
+    """Create the schema and materialise aggregates after a neo4j-admin import"""
+    setup_database_schema()
+    loader = Neo4jMusicLoader()
+    print("Refreshing aggregates for all artists...")
+    loader.refresh_aggregates()
+    loader.bump_graph_version()
@@ -0,0 +1,95 @@
+import json
+import os
+import threading
+import time
+
+from config import LOAD_CHECKPOINT_EVERY, LOAD_CHECKPOINT_SECONDS
+
+
+def source_fingerprint(path, **settings):
+    """What a load depends on: the CSV's size and mtime plus the settings that shape its batches"""
+    stat = os.stat(path)
+    return {"path": os.path.abspath(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, **settings}
+
+
+class LoadCheckpoint:
+    """Batches committed by a load, persisted as it goes so a failed run can resume
+
+    Batches are counted per key (chunk, phase and partition). Rows are
+    cleaned, batched and partitioned deterministically, so a rerun over the
+    same CSV with the same settings rebuilds identical batches and can skip
+    the first `done(key)` of each. Every batch is a MERGE, so one that
+    committed just before the crash but was not recorded is safe to repeat.
+
+    The file is rewritten every `save_every` commits or `save_seconds`,
+    whichever comes first, and by `flush`, so parallel writers do not queue
+    on file I/O and a crash replays at most a few batches.
+    """
+
+    def __init__(self, path, fingerprint, batches=None, save_every=LOAD_CHECKPOINT_EVERY,
+                 save_seconds=LOAD_CHECKPOINT_SECONDS):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.batches = dict(batches or {})
+        self.save_every = max(1, save_every)
+        self.save_seconds = save_seconds
+        self._pending = 0
+        self._saved_at = time.monotonic()
+        self._lock = threading.Lock()
+        # Held while writing, so snapshots reach the file in order
+        self._save_lock = threading.Lock()
+
+    @classmethod
+    def resume(cls, path, fingerprint):
+        """The checkpoint left at `path` by an interrupted load of the same source, or None"""
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get("fingerprint") != fingerprint:
+            return None
+        return cls(path, fingerprint, state.get("batches"))
+
+    def done(self, key):
+        return self.batches.get(key, 0)
+
+    @property
+    def total(self):
+        return sum(self.batches.values())
+
+    def commit(self, key, batches):
+        """Record that the first `batches` batches of `key` are committed"""
+        with self._lock:
+            self.batches[key] = batches
+            self._pending += 1
+            due = self._pending >= self.save_every or time.monotonic() - self._saved_at >= self.save_seconds
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write any commits not yet saved"""
+        with self._save_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                state = {"fingerprint": self.fingerprint, "batches": dict(self.batches)}
+                self._pending = 0
+                self._saved_at = time.monotonic()
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.path)
+
+    def clear(self):
+        """Forget the checkpoint once the load has finished"""
+        with self._save_lock, self._lock:
+            self.batches = {}
+            self._pending = 0
+            if os.path.exists(self.path):
+                os.remove(self.path)
@@ -0,0 +1,157 @@
+import atexit
+import threading
+import time
+
+from config import (
+    NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD, NEO4J_DATABASE,
+    NEO4J_MAX_POOL_SIZE, NEO4J_CONNECTION_ACQUISITION_TIMEOUT, NEO4J_CONNECTION_TIMEOUT,
+    NEO4J_MAX_CONNECTION_LIFETIME, NEO4J_LIVENESS_CHECK_TIMEOUT, NEO4J_KEEP_ALIVE, NEO4J_FETCH_SIZE,
+)
+
+# URI schemes whose drivers discover the cluster and route reads to followers
+# and read replicas, writes to the leader. bolt:// talks to one server only.
+ROUTING_SCHEMES = ("neo4j", "neo4j+s", "neo4j+ssc")
+
+# Session access modes, as neo4j.READ_ACCESS / WRITE_ACCESS. The neo4j package
+# itself is imported on first use: it is the slowest import the app has.
+READ_ACCESS = "READ"
+WRITE_ACCESS = "WRITE"
+
+_driver = None
+_driver_lock = threading.Lock()
+
+
+def is_routing(uri=NEO4J_URI):
+    return (uri or "").split("://", 1)[0].lower() in ROUTING_SCHEMES
+
+
+def driver_settings():
+    """Pool and fetch settings shared by the sync and async drivers"""
+    settings = {
+        "max_connection_pool_size": NEO4J_MAX_POOL_SIZE,
+        "connection_acquisition_timeout": NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+        "connection_timeout": NEO4J_CONNECTION_TIMEOUT,
+        "max_connection_lifetime": NEO4J_MAX_CONNECTION_LIFETIME,
+        "keep_alive": NEO4J_KEEP_ALIVE,
+        "fetch_size": NEO4J_FETCH_SIZE,
+    }
+    if NEO4J_LIVENESS_CHECK_TIMEOUT:
+        settings["liveness_check_timeout"] = float(NEO4J_LIVENESS_CHECK_TIMEOUT)
+    return settings
+
+
+def get_driver():
+    """The process-wide Neo4j driver, created on first use and closed at exit
+
+    The loader, schema setup, audit and app all borrow sessions from this one
+    connection pool instead of each opening (and tearing down) their own.
+    """
+    global _driver
+    with _driver_lock:
+        if _driver is None:
+            from neo4j import GraphDatabase
+            _driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USERNAME, NEO4J_PASSWORD), **driver_settings())
+        return _driver
+
+
+def create_async_driver(uri=NEO4J_URI, auth=(NEO4J_USERNAME, NEO4J_PASSWORD)):
+    """An async driver with the shared pool settings
+
+    Async drivers belong to the event loop that uses them, so the executor
+    creates and closes its own rather than sharing the sync one.
+    """
+    from neo4j import AsyncGraphDatabase
+    return AsyncGraphDatabase.driver(uri, auth=auth, **driver_settings())
+
+
+def close_driver():
+    global _driver
+    with _driver_lock:
+        if _driver is not None:
+            _driver.close()
+            _driver = None
+
+
+atexit.register(close_driver)
+
+
+def _session(driver, access_mode, **kwargs):
+    if NEO4J_DATABASE:
+        kwargs.setdefault("database", NEO4J_DATABASE)
+    return (driver or get_driver()).session(default_access_mode=access_mode, **kwargs)
+
+
+def read_session(driver=None, **kwargs):
+    """A session routed to followers or read replicas on a cluster"""
+    return _session(driver, READ_ACCESS, **kwargs)
+
+
+def write_session(driver=None, **kwargs):
+    """A session routed to the leader on a cluster"""
+    return _session(driver, WRITE_ACCESS, **kwargs)
+
+
+def db_hits(plan):
+    """Total database hits of a PROFILE plan tree"""
+    if not plan:
+        return 0
+    return plan.get("dbHits", 0) + sum(db_hits(child) for child in plan.get("children", []))
+
+
+def _fetch(result, max_rows):
+    """Rows of `result` as dicts, pulling no more than `max_rows` records"""
+    if max_rows is None:
+        return result.data()
+    rows = []
+    for record in result:
+        rows.append(record.data())
+        if len(rows) >= max_rows:
+            break
+    return rows
+
+
+def read_query(cypher, params=None, driver=None, max_rows=None):
+    """Run a read query in a managed read transaction and return the rows as dicts
+
+    With `max_rows`, records are pulled one fetch batch at a time and the
+    rest of the result is discarded once enough arrived.
+    """
+    def work(tx):
+        result = tx.run(cypher, params or {})
+        rows = _fetch(result, max_rows)
+        result.consume()
+        return rows
+
+    with read_session(driver) as session:
+        return session.execute_read(work)
+
+
+def profile_query(cypher, params=None, driver=None, max_rows=None):
+    """Like `read_query`, but PROFILEd; returns (rows, total db hits)"""
+    def work(tx):
+        result = tx.run(f"PROFILE {cypher}", params or {})
+        rows = _fetch(result, max_rows)
+        return rows, db_hits(result.consume().profile)
+
+    with read_session(driver) as session:
+        return session.execute_read(work)
+
+
+def check_health(driver=None):
+    """Verify the pool can reach the database and time a trivial read
+
+    Returns {"ok", "seconds", "server", "routing", "error"}; never raises.
+    """
+    start = time.perf_counter()
+    health = {"ok": False, "seconds": None, "server": None, "routing": is_routing(), "error": None}
+    try:
+        driver = driver or get_driver()
+        driver.verify_connectivity()
+        with read_session(driver) as session:
+            summary = session.run("RETURN 1").consume()
+        health["server"] = f"{summary.server.agent} at {summary.server.address}"
+        health["ok"] = True
+    except Exception as e:
+        health["error"] = str(e)
+    health["seconds"] = time.perf_counter() - start
+    return health
@@ -0,0 +1,150 @@
+import os
+import re
+import unicodedata
+from collections import Counter
+from difflib import SequenceMatcher
+
+import numpy as np
+
+from database.packed import load_strings, save_strings
+
+# Entity kinds, in the order a name that is several things is resolved as
+KINDS = ("artist", "album", "song")
+
+# "Song - Remastered 2011", "Song (feat. X)", "Album [Deluxe Edition]"
+SUFFIX_PATTERN = re.compile(r"\s+-\s+.*$|\s*[(\[].*?[)\]]")
+
+
+def normalize_name(text):
+    """Case-, accent- and punctuation-insensitive form of a name: "Beyoncé!" -> "beyonce" """
+    text = unicodedata.normalize("NFKD", str(text))
+    text = "".join(c for c in text if not unicodedata.combining(c)).casefold()
+    return " ".join(re.findall(r"[^\W_]+", text))
+
+
+def base_name(text):
+    """A title without version suffixes, or None if it has none"""
+    stripped = SUFFIX_PATTERN.sub("", str(text)).strip()
+    return stripped if stripped and stripped != str(text).strip() else None
+
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class EntityIndex:
+    """In-memory lookup of artist, album and song names for entity resolution
+
+    Every entity is reachable by its normalised name and, for titles with
+    version suffixes, its base title. `lookup` is an exact dictionary hit.
+    `fuzzy` picks candidates by trigram overlap, reading only the posting
+    lists of the query's trigrams, and scores them by edit similarity, which
+    tolerates a typo in a short name far better than trigram overlap alone.
+    """
+
+    # Trigrams shared by more names than this are too common to narrow the
+    # candidates down, so they are not counted
+    MAX_POSTINGS = 5000
+
+    def __init__(self, kinds, names, ids):
+        self.kinds = np.asarray(kinds, dtype=object)
+        self.names = np.asarray(names, dtype=object)
+        self.ids = np.asarray(ids, dtype=object)
+        self._by_key = {}
+        for i, name in enumerate(self.names):
+            for key in {normalize_name(name), normalize_name(base_name(name) or "")} - {""}:
+                self._by_key.setdefault(key, []).append(i)
+        self.keys = list(self._by_key)
+        # Per kind, so a lookup restricted to artists never ranks song titles
+        self._postings = {kind: {} for kind in KINDS}
+        for k, key in enumerate(self.keys):
+            for kind in {str(self.kinds[i]) for i in self._by_key[key]}:
+                postings = self._postings[kind]
+                for gram in trigrams(key):
+                    postings.setdefault(gram, []).append(k)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _entities(self, positions, kinds):
+        found = {}
+        for i in positions:
+            kind = str(self.kinds[i])
+            if kind in kinds:
+                found.setdefault((kind, str(self.names[i])), []).append(str(self.ids[i]))
+        return found
+
+    def lookup(self, text, kinds=KINDS):
+        """{(kind, canonical name): [ids]} of entities whose name normalises to `text`"""
+        return self._entities(self._by_key.get(normalize_name(text), []), kinds)
+
+    def fuzzy(self, text, threshold=0.8, kinds=KINDS):
+        """(score, {(kind, name): [ids]}) for the closest name at or above `threshold`, else (0.0, {})"""
+        key = normalize_name(text)
+        grams = trigrams(key)
+        best_score, best = 0.0, set()
+        for kind in kinds:
+            counts = Counter()
+            for gram in grams:
+                posting = self._postings[kind].get(gram, ())
+                if len(posting) <= self.MAX_POSTINGS:
+                    counts.update(posting)
+            for k, _ in counts.most_common(20):
+                score = SequenceMatcher(None, key, self.keys[k]).ratio()
+                if score > best_score:
+                    best_score, best = score, {k}
+                elif score == best_score:
+                    best.add(k)
+        if best_score < threshold:
+            return 0.0, {}
+        positions = [i for k in best for i in self._by_key[self.keys[k]]]
+        return best_score, self._entities(positions, kinds)
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(tmp_path, **save_strings({}, kinds=self.kinds, names=self.names, ids=self.ids))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(load_strings(data, "kinds"), load_strings(data, "names"), load_strings(data, "ids"))
+
+
+class EntityIndexBuilder:
+    """Collects the unique artist, album and song names of cleaned chunks
+
+    Rows with a missing id or name are skipped rather than indexed as the
+    text "<NA>" or "nan".
+    """
+
+    def __init__(self):
+        self._artists = set()
+        self._albums = {}
+        self._songs = {}
+
+    def add(self, chunk):
+        self._artists.update(chunk['track_artist'].dropna().astype(str))
+        albums = chunk[['track_album_id', 'track_album_name']].dropna()
+        self._albums.update(zip(albums['track_album_id'].astype(str), albums['track_album_name'].astype(str)))
+        songs = chunk[['track_id', 'track_name']].dropna()
+        self._songs.update(zip(songs['track_id'].astype(str), songs['track_name'].astype(str)))
+
+    def tap(self, chunks):
+        """Pass chunks through unchanged while adding them to the index"""
+        for chunk in chunks:
+            self.add(chunk)
+            yield chunk
+
+    def build(self):
+        # Artists are keyed by name (their unique constraint), so the name is the id
+        artists = sorted(self._artists)
+        return EntityIndex(
+            ["artist"] * len(artists) + ["album"] * len(self._albums) + ["song"] * len(self._songs),
+            artists + list(self._albums.values()) + list(self._songs.values()),
+            artists + list(self._albums) + list(self._songs),
+        )
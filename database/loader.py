@@ -1,135 +1,578 @@
+import random
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
 import pandas as pd
-from neo4j import GraphDatabase
-from config import NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD
+from neo4j.exceptions import ServiceUnavailable, SessionExpired, TransientError
+from config import (
+    DATA_FILE, LOAD_BATCH_SIZE, LOAD_CHUNK_SIZE, LOAD_DTYPE_BACKEND, LOAD_WORKERS, LOAD_MAX_RETRIES, LOAD_MANIFEST_FILE,
+    SIMILARITY_INDEX_FILE, ENTITY_INDEX_FILE, METRICS_FILE, LOAD_CHECKPOINT_FILE,
+)
 from tqdm import tqdm
 
+from database.aggregates import (
+    ALL_ARTISTS_QUERY, ARTIST_AGGREGATES_QUERY, GENRE_AGGREGATES_QUERY, GRAPH_AGGREGATES_QUERY,
+)
+from database.checkpoint import LoadCheckpoint, source_fingerprint
+from database.driver import get_driver, write_session
+from database.entities import EntityIndexBuilder
+from database.manifest import build_manifest, diff_manifests, load_manifest, save_manifest
+from database.similarity import SimilarityIndexBuilder
+from database.streaming import clean_chunks, read_csv_chunks
+from tracing import TRACER
+
+RETRY_BASE_DELAY = 0.2  # seconds, doubled on every transient failure
+
+
+ARTIST_QUERY = """
+UNWIND $rows AS row
+MERGE (a:Artist {name: row.name})
+"""
+
+GENRE_QUERY = """
+UNWIND $rows AS row
+MERGE (g:Genre {name: row.name})
+"""
+
+YEAR_QUERY = """
+UNWIND $rows AS row
+MERGE (y:Year {value: row.value})
+"""
+
+ALBUM_QUERY = """
+UNWIND $rows AS row
+MERGE (al:Album {id: row.id})
+SET al.title = row.title, al.releaseDate = row.release_date, al.year = row.year
+"""
+
+SONG_QUERY = """
+UNWIND $rows AS row
+MERGE (s:Song {id: row.id})
+SET s.title = row.title, s.duration = row.duration,
+    s.popularity = row.popularity, s.genre = row.genre,
+    s.danceability = row.danceability, s.energy = row.energy
+"""
+
+SINGS_QUERY = """
+UNWIND $rows AS row
+MATCH (a:Artist {name: row.artist}), (s:Song {id: row.id})
+MERGE (a)-[:SINGS]->(s)
+"""
+
+CONTAINS_QUERY = """
+UNWIND $rows AS row
+MATCH (al:Album {id: row.album_id}), (s:Song {id: row.id})
+MERGE (al)-[:CONTAINS]->(s)
+"""
+
+# A song has one genre and an album one release year; relinking drops the
+# old edge so re-synced rows that changed genre or date do not keep both.
+IN_GENRE_QUERY = """
+UNWIND $rows AS row
+MATCH (s:Song {id: row.id}), (g:Genre {name: row.genre})
+OPTIONAL MATCH (s)-[old:IN_GENRE]->(other:Genre) WHERE other <> g
+DELETE old
+MERGE (s)-[:IN_GENRE]->(g)
+"""
+
+RELEASED_IN_QUERY = """
+UNWIND $rows AS row
+MATCH (al:Album {id: row.id}), (y:Year {value: row.year})
+OPTIONAL MATCH (al)-[old:RELEASED_IN]->(other:Year) WHERE other <> y
+DELETE old
+MERGE (al)-[:RELEASED_IN]->(y)
+"""
+
+# An album whose release date became unknown keeps no link to its old year
+UNLINK_YEARS_QUERY = """
+UNWIND $rows AS row
+MATCH (al:Album {id: row.id})-[old:RELEASED_IN]->(:Year)
+DELETE old
+"""
+
+CREATED_QUERY = """
+UNWIND $rows AS row
+MATCH (a:Artist {name: row.artist}), (al:Album {id: row.album_id})
+MERGE (a)-[:CREATED]->(al)
+"""
+
+CLEAR_QUERY = """
+MATCH (n)
+CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF $batch_size ROWS
+"""
+
+DELETE_SONGS_QUERY = """
+UNWIND $rows AS row
+MATCH (s:Song {id: row.id})
+DETACH DELETE s
+"""
+
+UNLINK_SONGS_QUERY = """
+UNWIND $rows AS row
+MATCH (s:Song {id: row.id})<-[r:SINGS|CONTAINS]-()
+DELETE r
+"""
+
+PRUNE_CREATED_QUERY = """
+UNWIND $rows AS row
+MATCH (a:Artist {name: row.artist})-[r:CREATED]->(al:Album {id: row.album_id})
+WHERE NOT EXISTS { MATCH (a)-[:SINGS]->(:Song)<-[:CONTAINS]-(al) }
+DELETE r
+"""
+
+PRUNE_ALBUMS_QUERY = """
+UNWIND $rows AS row
+MATCH (al:Album {id: row.album_id})
+WHERE NOT (al)-[:CONTAINS]->()
+DETACH DELETE al
+"""
+
+PRUNE_ARTISTS_QUERY = """
+UNWIND $rows AS row
+MATCH (a:Artist {name: row.artist})
+WHERE NOT (a)-[:SINGS]->()
+DETACH DELETE a
+"""
+
+PRUNE_YEARS_QUERY = """
+MATCH (y:Year)
+WHERE NOT ()-[:RELEASED_IN]->(y)
+DELETE y
+"""
+
+# The version is the load's timestamp rather than a counter, so it keeps
+# increasing even after a --full reload wipes the GraphMeta node.
+BUMP_GRAPH_VERSION_QUERY = """
+MERGE (m:GraphMeta {key: 'graph'})
+SET m.version = timestamp()
+RETURN m.version AS version
+"""
+
+SONG_DEFAULTS = {
+    'duration_ms': 180000,
+    'track_popularity': 0,
+    'playlist_genre': 'Unknown',
+    'danceability': 0.5,
+    'energy': 0.5,
+}
+
+
+REQUIRED_COLUMNS = ['track_name', 'track_artist', 'track_album_name', 'track_id']
+
+TEXT_COLUMNS = ['track_name', 'track_artist', 'track_album_name', 'playlist_genre']
+
+CATEGORY_COLUMNS = {'track_artist', 'track_album_name', 'playlist_genre'}
+
+NUMERIC_DEFAULTS = {
+    'track_popularity': 0,
+    'danceability': 0.5,
+    'energy': 0.5,
+    'duration_ms': 180000  # 3 minutes default
+}
+
+
+def normalize_release_dates(dates):
+    """Normalise Spotify release dates to YYYY-MM-DD strings
+
+    The dataset mixes full dates with year-only ("2012") and year-month
+    ("2012-05") values. Those are padded to the first day of the period and
+    the result is validated with a single fixed-format parse; anything that
+    does not parse becomes NA, so the album gets no date, year or Year link.
+    """
+    dates = dates.astype('string').str.strip()
+    lengths = dates.str.len()
+    dates = dates.mask(lengths == 4, dates + '-01-01').mask(lengths == 7, dates + '-01')
+    parsed = pd.to_datetime(dates, format='%Y-%m-%d', errors='coerce')
+    return dates.where(parsed.notna())
+
+
+def clean_music_data(df):
+    """Clean and prepare the music data
+
+    Incomplete and duplicate rows are dropped with one combined mask, so the
+    input is copied exactly once, and columns are then replaced in place.
+    Repeated strings (artist, album, genre) become categoricals and release
+    dates are normalised to YYYY-MM-DD without a strftime pass.
+    """
+    complete = df[REQUIRED_COLUMNS].notna().all(axis=1)
+    # take() returns an owned frame, so the column assignments below neither
+    # touch the caller's frame nor trip SettingWithCopyWarning.
+    df_clean = df.take(np.flatnonzero(complete & ~df['track_id'].where(complete).duplicated()))
+    
+    for col in TEXT_COLUMNS:
+        if col in df_clean.columns:
+            cleaned = df_clean[col].str.strip().fillna('Unknown')
+            df_clean[col] = cleaned.astype('category') if col in CATEGORY_COLUMNS else cleaned
+    
+    for col, default_val in NUMERIC_DEFAULTS.items():
+        if col in df_clean.columns:
+            df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce').fillna(default_val)
+    
+    if 'track_album_release_date' in df_clean.columns:
+        df_clean['track_album_release_date'] = normalize_release_dates(df_clean['track_album_release_date'])
+    
+    return df_clean
+
+
+def album_rows(albums):
+    """Turn album records into UNWIND parameter rows; an unknown release date is null"""
+    rows = []
+    for album in albums.itertuples(index=False):
+        known = not pd.isna(album.track_album_release_date)
+        rows.append({"id": album.track_album_id, "title": album.track_album_name,
+                     "release_date": album.track_album_release_date if known else None,
+                     "year": int(album.track_album_release_date[:4]) if known else None})
+    return rows
+
+
+def song_rows(df):
+    """Turn song records into UNWIND parameter rows, including relationship keys"""
+    return [
+        {
+            "id": song.track_id,
+            "title": song.track_name,
+            "artist": song.track_artist,
+            "album_id": song.track_album_id,
+            "duration": getattr(song, 'duration_ms', SONG_DEFAULTS['duration_ms']),
+            "popularity": getattr(song, 'track_popularity', SONG_DEFAULTS['track_popularity']),
+            "genre": getattr(song, 'playlist_genre', SONG_DEFAULTS['playlist_genre']),
+            "danceability": getattr(song, 'danceability', SONG_DEFAULTS['danceability']),
+            "energy": getattr(song, 'energy', SONG_DEFAULTS['energy']),
+        }
+        for song in df.itertuples(index=False)
+    ]
+
+
+def created_rows(pairs):
+    """Turn unique (artist, album) pairs into UNWIND parameter rows"""
+    return [
+        {"artist": pair.track_artist, "album_id": pair.track_album_id}
+        for pair in pairs.itertuples(index=False)
+    ]
+
+
+def partition_rows(rows, key, partitions):
+    """Split rows into `partitions` lists so equal `key` values share a list"""
+    buckets = [[] for _ in range(partitions)]
+    for row in rows:
+        buckets[zlib.crc32(str(row[key]).encode("utf-8")) % partitions].append(row)
+    return buckets
+
+
+def phase_stats(desc, rows, elapsed):
+    """Print, trace and return the throughput of one load phase"""
+    TRACER.record(f"load.{desc.lower().replace(' ', '_')}", elapsed, rows=rows)
+    rate = rows / elapsed if elapsed > 0 else 0.0
+    print(f"  {desc}: {rows} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec)")
+    return {"rows": rows, "seconds": elapsed, "rows_per_sec": rate}
+
+
+def stale_rows(previous, track_ids):
+    """Rows describing the artist/album links of `track_ids` at the last load"""
+    return [
+        {"id": track_id, "artist": previous[track_id][1], "album_id": previous[track_id][2]}
+        for track_id in track_ids
+    ]
+
+
+def as_chunks(data):
+    """Treat a single DataFrame as a one-chunk stream"""
+    return [data] if isinstance(data, pd.DataFrame) else data
+
+
+def tracked_chunks(chunks, manifest):
+    """Pass chunks through while fingerprinting them into `manifest`"""
+    for chunk in chunks:
+        manifest.update(build_manifest(chunk))
+        yield chunk
+
+
+def merge_stats(total, stats):
+    """Fold per-chunk phase stats into running totals"""
+    for phase, values in stats.items():
+        current = total.setdefault(phase, {"rows": 0, "seconds": 0.0, "rows_per_sec": 0.0})
+        current["rows"] += values["rows"]
+        current["seconds"] += values["seconds"]
+        current["rows_per_sec"] = current["rows"] / current["seconds"] if current["seconds"] > 0 else 0.0
+    return total
+
 
 class Neo4jMusicLoader:
-    def __init__(self):
-        self.driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
-    def close(self):
-        self.driver.close()
+    def __init__(self, batch_size=LOAD_BATCH_SIZE, workers=LOAD_WORKERS, max_retries=LOAD_MAX_RETRIES, driver=None):
+        # The shared pool (database/driver.py) unless a caller brings its own driver
+        self.driver = driver or get_driver()
+        self.batch_size = batch_size
+        self.workers = max(1, workers)
+        self.max_retries = max_retries
+        self.touched_artists = set()
+        # Set by load_music_data to skip batches an interrupted run committed
+        self.checkpoint = None
+        self.stage = "setup"
     def clean_data(self, df):
         """Clean and prepare the music data"""
-        df_clean = df.copy()
-        df_clean = df_clean.dropna(subset=['track_name', 'track_artist', 'track_album_name','track_id'])
-        
-        text_columns = ['track_name', 'track_artist', 'track_album_name', 'playlist_genre']
-        for col in text_columns:
-            if col in text_columns:
-                df_clean.loc[:,col] = df_clean[col].str.strip().fillna('Unknown')
-        
-       
-        numeric_defaults = {
-            'track_popularity': 0,
-            'danceability': 0.5,
-            'energy': 0.5,
-            'duration_ms': 180000  # 3 minutes default
-        }
-        
-        for col, default_val in numeric_defaults.items():
-            if col in df_clean.columns:
-                df_clean.loc[:, col] = pd.to_numeric(df_clean[col], errors='coerce').fillna(default_val)
-        
-        if 'track_album_release_date' in df_clean.columns:
-            df_clean.loc[:,'track_album_release_date'] = pd.to_datetime(
-                df_clean['track_album_release_date'], errors='coerce'
-            ).dt.strftime('%Y-%m-%d').fillna('1900-01-01')
-            
-        df_clean = df_clean.drop_duplicates(subset=['track_id'])
-        
-        return df_clean
+        return clean_music_data(df)
     
-    def load_data(self, df):
-        """Load the cleaned data into Neo4j"""
-        with self.driver.session() as session:
-            
-            print("Clearing existing data...")
-            session.run("MATCH (n) DETACH DELETE n") 
-            
+    def _execute_batch(self, session, query, batch):
+        """Run one UNWIND batch in a write transaction, backing off on transient errors"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return session.execute_write(lambda tx: tx.run(query, rows=batch).consume())
+            except (TransientError, ServiceUnavailable, SessionExpired):
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(RETRY_BASE_DELAY * (2 ** attempt) * (1 + random.random()))
+
+    def _committed(self, key):
+        """Batches of `key` an interrupted run already committed"""
+        return self.checkpoint.done(f"{self.stage}/{key}") if self.checkpoint else 0
+
+    def _commit(self, key, batches):
+        if self.checkpoint:
+            self.checkpoint.commit(f"{self.stage}/{key}", batches)
+
+    def _write_batches(self, session, query, rows, desc):
+        """Send rows to Neo4j in UNWIND batches, one write transaction per batch"""
+        start = time.perf_counter()
+        skip = self._committed(desc)
+        for n, i in enumerate(tqdm(range(0, len(rows), self.batch_size), desc=desc)):
+            if n < skip:
+                continue
+            self._execute_batch(session, query, rows[i:i + self.batch_size])
+            self._commit(desc, n + 1)
+        written = max(0, len(rows) - skip * self.batch_size)
+        return phase_stats(desc, written, time.perf_counter() - start)
+
+    def _write_partition(self, query, rows, key, progress):
+        """Write one partition on its own session so workers never share a connection"""
+        skip = self._committed(key)
+        with write_session(self.driver) as session:
+            for n, i in enumerate(range(0, len(rows), self.batch_size)):
+                if n >= skip:
+                    self._execute_batch(session, query, rows[i:i + self.batch_size])
+                    self._commit(key, n + 1)
+                progress.update(1)
+
+    def _write_parallel(self, query, rows, key, desc):
+        """Spread UNWIND batches across a pool of sessions, partitioned by `key`
+
+        Every row sharing the same key value lands in the same partition, so
+        two workers never MERGE relationships onto the same keyed node at once.
+        Leftover contention (an album credited to two artists) is absorbed by
+        the transient-error retry in `_execute_batch`.
+        """
+        start = time.perf_counter()
+        partitions = partition_rows(rows, key, self.workers)
+        total_batches = sum(-(-len(part) // self.batch_size) for part in partitions)
+        with tqdm(total=total_batches, desc=desc) as progress:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                futures = [
+                    pool.submit(self._write_partition, query, part, f"{desc}/{p}", progress)
+                    for p, part in enumerate(partitions) if part
+                ]
+                for future in as_completed(futures):
+                    future.result()
+        return phase_stats(desc, len(rows), time.perf_counter() - start)
+
+    def _write_graph(self, df):
+        """MERGE the artists, albums, songs and relationships of `df` into Neo4j"""
+        stats = {}
+        with write_session(self.driver) as session:
             print("Loading artists...")
-            artists = df['track_artist'].unique()
-            for artist in tqdm(artists, desc="Artists"):
-                session.run("MERGE (a:Artist {name: $name})", name=artist)
+            artists = [{"name": name} for name in df['track_artist'].unique()]
+            self.touched_artists.update(row["name"] for row in artists)
+            stats["artists"] = self._write_batches(session, ARTIST_QUERY, artists, "Artists")
+            
+            print("Loading genres and years...")
+            songs = song_rows(df)
+            genres = [{"name": name} for name in sorted({row["genre"] for row in songs})]
+            stats["genres"] = self._write_batches(session, GENRE_QUERY, genres, "Genres")
+            albums = df[['track_album_id', 'track_album_name', 'track_album_release_date']].drop_duplicates(
+                subset=['track_album_id']
+            )
+            albums = album_rows(albums)
+            dated = [row for row in albums if row["year"] is not None]
+            years = [{"value": year} for year in sorted({row["year"] for row in dated})]
+            stats["years"] = self._write_batches(session, YEAR_QUERY, years, "Years")
                 
             print("Loading albums...")
-            albums = df[['track_album_id','track_album_name', 'track_album_release_date']].drop_duplicates()
-            album_records = list(albums.itertuples(index=False))
-            for  album in tqdm(album_records, desc="Albums"):
-                session.run(
-                    "MERGE (al:Album {id: $id,title: $title, releaseDate: $release_date})",
-                    id=album.track_album_id,
-                    title=album.track_album_name,
-                    release_date=album.track_album_release_date
-                )
+            stats["albums"] = self._write_batches(session, ALBUM_QUERY, albums, "Albums")
+            undated = [row for row in albums if row["year"] is None]
+            if undated:
+                stats["unlinked_years"] = self._write_batches(session, UNLINK_YEARS_QUERY, undated, "Undated albums")
                 
             print("Loading songs with audio features...")
-            song_records = list(df.itertuples(index=False))
-            for song in tqdm(song_records, desc="Songs"):
-                session.run(
-                    """MERGE (s:Song {
-                        id: $id, title: $title, duration: $duration, 
-                        popularity: $popularity, genre: $genre, 
-                        danceability: $danceability, energy: $energy})""",
-                    id=song.track_id,
-                    title=song.track_name,
-                    duration=getattr(song, 'duration_ms', 180000),
-                    popularity=getattr(song, 'track_popularity', 0),
-                    genre=getattr(song, 'playlist_genre', 'Unknown'),
-                    danceability=getattr(song, 'danceability', 0.5),
-                    energy=getattr(song, 'energy', 0.5),
-                )
+            stats["songs"] = self._write_batches(session, SONG_QUERY, songs, "Songs")
                 
-                
-            print("Creating relationships...")
-            batch_size = 1000
-            total_songs = len(song_records)
-            
-            
-            for i in tqdm(range(0, total_songs, batch_size), desc="Creating relationships"):
-                batch = song_records[i:i+batch_size]
-                for song in batch:
-                    # Artist -> SINGS -> Song
-                    session.run(
-                            "MATCH (a:Artist {name: $artist}), (s:Song {id: $song_id}) MERGE (a)-[:SINGS]->(s)",
-                            artist=song.track_artist,
-                            song_id=song.track_id
-                        )
-                    # Album -> CONTAINS -> Song
-                    session.run(
-                            "MATCH (al:Album {id: $album_id}), (s:Song {id: $song_id}) MERGE (al)-[:CONTAINS]->(s)",
-                            album_id=song.track_album_id,
-                            song_id=song.track_id
-                        )
-                    # Artist -> CREATED -> Album (if not already linked)
-                    session.run(
-                        "MATCH (a:Artist {name: $artist}), (al:Album {id: $album_id}) MERGE (a)-[:CREATED]->(al)",
-                        artist=song.track_artist,
-                        album_id=song.track_album_id
-                    )
-                    
+        print(f"Creating relationships with {self.workers} workers...")
+        stats["sings"] = self._write_parallel(SINGS_QUERY, songs, "artist", "SINGS")
+        stats["contains"] = self._write_parallel(CONTAINS_QUERY, songs, "album_id", "CONTAINS")
+        stats["in_genre"] = self._write_parallel(IN_GENRE_QUERY, songs, "genre", "IN_GENRE")
+        stats["released_in"] = self._write_parallel(RELEASED_IN_QUERY, dated, "year", "RELEASED_IN")
+        created = df[['track_artist', 'track_album_id']].drop_duplicates()
+        stats["created"] = self._write_parallel(CREATED_QUERY, created_rows(created), "artist", "CREATED")
+        return stats
+
+    def bump_graph_version(self):
+        """Stamp the graph with a new version so cached answers are invalidated"""
+        with write_session(self.driver) as session:
+            return session.execute_write(lambda tx: tx.run(BUMP_GRAPH_VERSION_QUERY).single()["version"])
+
+    def refresh_aggregates(self, artists=None):
+        """Recompute materialised statistics for `artists` (all when None), genres and graph totals"""
+        with write_session(self.driver) as session:
+            if artists is None:
+                artists = [record["name"] for record in session.run(ALL_ARTISTS_QUERY)]
+            # Sorted, so a resumed run rebuilds the same batches
+            rows = [{"name": name} for name in sorted(artists)]
+            stats = {"artists": self._write_batches(session, ARTIST_AGGREGATES_QUERY, rows, "Artist aggregates")}
+            session.execute_write(lambda tx: tx.run(GENRE_AGGREGATES_QUERY).consume())
+            session.execute_write(lambda tx: tx.run(GRAPH_AGGREGATES_QUERY).consume())
+        return stats
+
+    def load_data(self, data):
+        """Replace the whole graph with the cleaned data using batched UNWIND writes
+
+        `data` is either one DataFrame or an iterable of cleaned chunks, which
+        are written one after another so only a single chunk is in memory.
+        """
+        stats = {}
+        self.stage = "setup"
+        if self._committed("clear"):
+            print("Existing data already cleared by the interrupted run")
+        else:
+            with write_session(self.driver) as session:
+                print("Clearing existing data...")
+                session.run(CLEAR_QUERY, batch_size=self.batch_size).consume()
+            self._commit("clear", 1)
+        for i, chunk in enumerate(as_chunks(data)):
+            self.stage = f"chunk {i}"
+            merge_stats(stats, self._write_graph(chunk))
+        self.stage = "final"
+        return stats
+
+    def sync_data(self, data, manifest, manifest_path=LOAD_MANIFEST_FILE):
+        """Apply only the rows that changed since the last load recorded in the manifest
+
+        Falls back to a full `load_data` when no manifest exists yet. The graph
+        stays queryable throughout: nothing is wiped, deleted songs are removed
+        by id and stale artist/album links are pruned afterwards. `data` may be
+        a DataFrame or an iterable of cleaned chunks.
+
+        The new data's fingerprints are collected into `manifest`, which the
+        caller saves only once everything after the sync (aggregates, graph
+        version) has committed too; until then a rerun sees the same delta.
+        """
+        previous = load_manifest(manifest_path)
+        if previous is None:
+            print("No load manifest found, running a full load...")
+            return self.load_data(tracked_chunks(as_chunks(data), manifest))
+
+        stats = {"inserted": 0, "changed": 0, "deleted": 0}
+        stale = []
+        for i, chunk in enumerate(as_chunks(data)):
+            self.stage = f"chunk {i}"
+            chunk_manifest = build_manifest(chunk)
+            manifest.update(chunk_manifest)
+            inserted, changed, _ = diff_manifests(previous, chunk_manifest)
+            stats["inserted"] += len(inserted)
+            stats["changed"] += len(changed)
+            if changed:
+                # Links of changed songs as they were at the last load; the
+                # artists and albums they point to may have lost their last song.
+                unlink = stale_rows(previous, changed)
+                stale.extend(unlink)
+                with write_session(self.driver) as session:
+                    merge_stats(stats, {"unlink_songs": self._write_batches(
+                        session, UNLINK_SONGS_QUERY, unlink, "Unlinked songs"
+                    )})
+            upserts = chunk[chunk['track_id'].isin(set(inserted) | set(changed))]
+            if len(upserts):
+                merge_stats(stats, self._write_graph(upserts))
+
+        self.stage = "final"
+        deleted = [track_id for track_id in previous if track_id not in manifest]
+        stats["deleted"] = len(deleted)
+        print(f"Delta: {stats['inserted']} inserted, {stats['changed']} changed, {len(deleted)} deleted songs")
+        if deleted:
+            stale.extend(stale_rows(previous, deleted))
+            rows = [{"id": track_id} for track_id in deleted]
+            with write_session(self.driver) as session:
+                stats["delete_songs"] = self._write_batches(session, DELETE_SONGS_QUERY, rows, "Deleted songs")
+
+        self.touched_artists.update(row["artist"] for row in stale)
+        if stale:
+            with write_session(self.driver) as session:
+                stats["prune_created"] = self._write_batches(session, PRUNE_CREATED_QUERY, stale, "Pruned CREATED")
+                stats["prune_albums"] = self._write_batches(session, PRUNE_ALBUMS_QUERY, stale, "Pruned albums")
+                stats["prune_artists"] = self._write_batches(session, PRUNE_ARTISTS_QUERY, stale, "Pruned artists")
+                session.execute_write(lambda tx: tx.run(PRUNE_YEARS_QUERY).consume())
+        return stats
             
             
-def load_music_data():
+def load_music_data(full_reload=False, path=DATA_FILE or 'data/spotify_songs.csv', chunksize=LOAD_CHUNK_SIZE,
+                    resume=False):
+    """Load or delta-sync the CSV into Neo4j, checkpointing every committed batch
+
+    With `resume`, batches committed by an interrupted run over the same CSV
+    and settings are skipped instead of written again.
+    """
     loader = Neo4jMusicLoader()
+    fingerprint = source_fingerprint(path, chunksize=chunksize, batch_size=loader.batch_size,
+                                     workers=loader.workers, full_reload=full_reload)
+    checkpoint = LoadCheckpoint.resume(LOAD_CHECKPOINT_FILE, fingerprint) if resume else None
+    if checkpoint is not None:
+        print(f"Resuming from {LOAD_CHECKPOINT_FILE}: {checkpoint.total} batches already committed")
+    elif resume:
+        print(f"No checkpoint for this CSV and settings in {LOAD_CHECKPOINT_FILE}, starting from the beginning")
+    loader.checkpoint = checkpoint or LoadCheckpoint(LOAD_CHECKPOINT_FILE, fingerprint)
     try:
-        print("Reading CSV file...")
-        df = pd.read_csv('data/spotify_songs.csv')
-        
-        print("Cleaning data...")
-        cleaned_df = loader.clean_data(df)
-        
-        print(f"Loaded {len(cleaned_df)} songs from {cleaned_df['track_artist'].nunique()} artists")
-        print(f"Genres: {cleaned_df['playlist_genre'].unique().tolist()}")
-        
-        print("Loading data into Neo4j...")
-        loader.load_data(cleaned_df)
+        with TRACER.span("load", full_reload=full_reload, resumed=checkpoint is not None):
+            print(f"Streaming {path} in chunks of {chunksize} rows...")
+            chunks = clean_chunks(loader.clean_data, read_csv_chunks(path, chunksize, LOAD_DTYPE_BACKEND))
+            similarity = SimilarityIndexBuilder()
+            entities = EntityIndexBuilder()
+            chunks = entities.tap(similarity.tap(chunks))
+            
+            print("Loading data into Neo4j...")
+            manifest = {}
+            with TRACER.span("load.write"):
+                if full_reload:
+                    loader.load_data(tracked_chunks(chunks, manifest))
+                else:
+                    loader.sync_data(chunks, manifest, LOAD_MANIFEST_FILE)
+            print(f"Refreshing aggregates for {len(loader.touched_artists)} artists...")
+            with TRACER.span("load.aggregates", rows=len(loader.touched_artists)):
+                loader.refresh_aggregates(loader.touched_artists)
+            loader.bump_graph_version()
+            
+            with TRACER.span("load.similarity_index") as span:
+                index = similarity.build()
+                index.save(SIMILARITY_INDEX_FILE)
+                span.set(rows=len(index))
+            print(f"Audio-feature similarity index: {len(index)} songs -> {SIMILARITY_INDEX_FILE}")
+            
+            with TRACER.span("load.entity_index") as span:
+                names = entities.build()
+                names.save(ENTITY_INDEX_FILE)
+                span.set(rows=len(names))
+            print(f"Entity name index: {len(names)} artists, albums and songs -> {ENTITY_INDEX_FILE}")
         
+        # Only now: a manifest saved before the aggregates committed would
+        # make the next run see no delta and leave them stale
+        save_manifest(manifest, LOAD_MANIFEST_FILE)
+        loader.checkpoint.clear()
         print("Data loaded successfully!")
     except Exception as e:
         print(f"Error loading data: {e}")
         import traceback
         traceback.print_exc()
+        if loader.checkpoint.total:
+            print(f"{loader.checkpoint.total} batches are checkpointed in {LOAD_CHECKPOINT_FILE}; "
+                  "rerun with --resume to continue from the last committed batch")
     finally:
-        loader.close()
-            
\ No newline at end of file
+        # Saves the commits since the last periodic save (a no-op once cleared)
+        loader.checkpoint.flush()
+        TRACER.write_metrics(METRICS_FILE)
+        print(f"Load metrics -> {METRICS_FILE}")
@@ -0,0 +1,59 @@
+import json
+import os
+
+import pandas as pd
+
+# Columns whose values end up in the graph; a change in any of them means the
+# song (and possibly its artist/album links) has to be rewritten.
+FINGERPRINT_COLUMNS = [
+    'track_id', 'track_name', 'track_artist', 'track_album_id', 'track_album_name',
+    'track_album_release_date', 'track_popularity', 'playlist_genre',
+    'danceability', 'energy', 'duration_ms',
+]
+
+
+def build_manifest(df):
+    """Fingerprint every cleaned row: track_id -> [hash, artist, album_id]
+
+    A missing album id is recorded as None, since pd.NA cannot be saved as JSON.
+    """
+    columns = [col for col in FINGERPRINT_COLUMNS if col in df.columns]
+    hashes = pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+    album_ids = df['track_album_id'].astype(object)
+    album_ids = album_ids.where(album_ids.notna(), None)
+    return {
+        track_id: [format(int(h), '016x'), artist, album_id]
+        for track_id, h, artist, album_id in zip(
+            df['track_id'], hashes, df['track_artist'], album_ids
+        )
+    }
+
+
+def load_manifest(path):
+    """Return the manifest of the last successful load, or None if there is none"""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path):
+    """Persist the manifest atomically so a crash never leaves a torn file"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+
+def diff_manifests(old, new):
+    """Compare two manifests and return (inserted, changed, deleted) track ids"""
+    inserted = [track_id for track_id in new if track_id not in old]
+    changed = [
+        track_id for track_id, entry in new.items()
+        if track_id in old and old[track_id][0] != entry[0]
+    ]
+    deleted = [track_id for track_id in old if track_id not in new]
+    return inserted, changed, deleted
@@ -0,0 +1,36 @@
+import numpy as np
+
+
+def pack_strings(strings):
+    """Store strings as (offsets, utf-8 bytes) arrays for np.savez
+
+    A fixed-width `<U` array pads every element to the longest one at four
+    bytes per character; here each string costs its encoded length plus an
+    8-byte offset, and the file needs no pickling to load.
+    """
+    encoded = [str(s).encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def unpack_strings(offsets, data):
+    """The object array of strings stored by `pack_strings`"""
+    raw = data.tobytes()
+    strings = np.empty(len(offsets) - 1, dtype=object)
+    strings[:] = [raw[start:end].decode("utf-8") for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+    return strings
+
+
+def save_strings(arrays, **columns):
+    """Add each string column to the `arrays` passed to np.savez as <name>_offsets and <name>_bytes"""
+    for name, strings in columns.items():
+        arrays[f"{name}_offsets"], arrays[f"{name}_bytes"] = pack_strings(strings)
+    return arrays
+
+
+def load_strings(data, name):
+    """A string column saved by `save_strings`, or by an older index as a plain `<U` array"""
+    if name in data:
+        return data[name].astype(object)
+    return unpack_strings(data[f"{name}_offsets"], data[f"{name}_bytes"])
@@ -1,27 +1,38 @@
-from neo4j import GraphDatabase
-from config import NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD
+from database.driver import write_session
 
 
-def setup_database_schema():
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
-    
-    with driver.session() as session:
+def setup_database_schema(driver=None):
+    # Schema changes must reach the leader, so this always uses a write session
+    with write_session(driver) as session:
         try:
             # Create constraints for uniqueness
             session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (a:Artist) REQUIRE a.name IS UNIQUE")
             session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (s:Song) REQUIRE s.id IS UNIQUE")
             session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (al:Album) REQUIRE al.id IS UNIQUE")
+            session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (g:Genre) REQUIRE g.name IS UNIQUE")
+            session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (y:Year) REQUIRE y.value IS UNIQUE")
+            session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (m:GraphMeta) REQUIRE m.key IS UNIQUE")
             
             # Create indexes for better query performance
             session.run("CREATE INDEX IF NOT EXISTS FOR (s:Song) ON (s.genre)")
             session.run("CREATE INDEX IF NOT EXISTS FOR (s:Song) ON (s.popularity)")
             session.run("CREATE INDEX IF NOT EXISTS FOR (s:Song) ON (s.danceability)")
             session.run("CREATE INDEX IF NOT EXISTS FOR (s:Song) ON (s.energy)")
-            session.run("CREATE INDEX IF NOT EXISTS FOR (s:Song) ON (s.tempo)")
+            session.run("CREATE INDEX IF NOT EXISTS FOR (s:Song) ON (s.title)")
             session.run("CREATE INDEX IF NOT EXISTS FOR (a:Artist) ON (a.name)")
+            session.run("CREATE RANGE INDEX IF NOT EXISTS FOR (al:Album) ON (al.year)")
+            session.run("CREATE INDEX IF NOT EXISTS FOR (al:Album) ON (al.releaseDate)")
+            session.run("CREATE INDEX IF NOT EXISTS FOR (al:Album) ON (al.title)")
+            
+            # Full-text indexes for fuzzy title and name lookups
+            session.run("CREATE FULLTEXT INDEX songTitles IF NOT EXISTS FOR (s:Song) ON EACH [s.title]")
+            session.run("CREATE FULLTEXT INDEX artistNames IF NOT EXISTS FOR (a:Artist) ON EACH [a.name]")
+            session.run("CREATE FULLTEXT INDEX albumTitles IF NOT EXISTS FOR (al:Album) ON EACH [al.title]")
+            
+            # Materialised aggregates (see database/aggregates.py)
+            session.run("CREATE INDEX IF NOT EXISTS FOR (a:Artist) ON (a.songCount)")
+            session.run("CREATE INDEX IF NOT EXISTS FOR ()-[r:ACTIVE_IN]-() ON (r.songCount)")
             
             print("Database schema optimized with all necessary constraints and indexes!")
         except Exception as e:
             print(f"Error setting up database schema: {e}")
-        finally:
-            driver.close()
\ No newline at end of file
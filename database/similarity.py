@@ -0,0 +1,163 @@
+import os
+
+import numpy as np
+
+from database.packed import load_strings, save_strings
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # scipy is optional; brute force is fast enough for ~100k songs
+    cKDTree = None
+
+# Song property name -> cleaned CSV column it is loaded from
+FEATURES = {
+    'danceability': 'danceability',
+    'energy': 'energy',
+    'popularity': 'track_popularity',
+    'duration': 'duration_ms',
+}
+
+
+class SimilarityIndex:
+    """In-memory nearest-neighbour index over songs' audio features
+
+    Features are z-score normalised so duration (milliseconds) does not
+    drown out danceability and energy (0-1). k-NN queries use a KD-tree when
+    scipy is installed and a vectorised brute-force scan otherwise; range
+    queries are a boolean mask over the raw feature matrix.
+    """
+
+    def __init__(self, ids, titles, artists, features):
+        # Object arrays: a fixed-width str array pads every title to the longest one
+        self.ids = np.asarray(ids, dtype=object)
+        self.titles = np.asarray(titles, dtype=object)
+        self.artists = np.asarray(artists, dtype=object)
+        self.features = np.asarray(features, dtype=np.float32)
+        self.mean = self.features.mean(axis=0) if len(self.features) else np.zeros(len(FEATURES), np.float32)
+        std = self.features.std(axis=0) if len(self.features) else np.ones(len(FEATURES), np.float32)
+        self.std = np.where(std > 0, std, 1.0).astype(np.float32)
+        self.matrix = (self.features - self.mean) / self.std
+        self.quantiles = {
+            name: np.quantile(self.features[:, i], [0.25, 0.75]) if len(self.features) else (0.0, 0.0)
+            for i, name in enumerate(FEATURES)
+        }
+        self._positions = {song_id: i for i, song_id in enumerate(self.ids)}
+        self._by_title = {}
+        for i, title in enumerate(self.titles):
+            self._by_title.setdefault(title.lower(), []).append(i)
+        self._tree = cKDTree(self.matrix) if cKDTree is not None and len(self.matrix) else None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _rows(self, positions, distances=None):
+        rows = []
+        for rank, i in enumerate(positions):
+            row = {"id": str(self.ids[i]), "title": str(self.titles[i]), "artist": str(self.artists[i])}
+            row.update({name: float(self.features[i, j]) for j, name in enumerate(FEATURES)})
+            if distances is not None:
+                row["distance"] = round(float(distances[rank]), 4)
+            rows.append(row)
+        return rows
+
+    def knn(self, vector, k=10, exclude=None):
+        """The k songs closest to a raw (unnormalised) feature vector"""
+        query = (np.asarray(vector, dtype=np.float32) - self.mean) / self.std
+        wanted = min(len(self), k + (1 if exclude is not None else 0))
+        if wanted == 0:
+            return []
+        if self._tree is not None:
+            distances, positions = self._tree.query(query, k=wanted)
+            distances, positions = np.atleast_1d(distances), np.atleast_1d(positions)
+        else:
+            all_distances = np.linalg.norm(self.matrix - query, axis=1)
+            positions = np.argpartition(all_distances, wanted - 1)[:wanted]
+            positions = positions[np.argsort(all_distances[positions])]
+            distances = all_distances[positions]
+        keep = [n for n, i in enumerate(positions) if i != exclude][:k]
+        return self._rows(positions[keep], distances[keep])
+
+    def similar_to(self, song_id, k=10):
+        """The k songs that sound most like `song_id` (the song itself excluded)"""
+        position = self._positions.get(song_id)
+        if position is None:
+            return []
+        return self.knn(self.features[position], k=k, exclude=position)
+
+    def range_query(self, bounds, limit=20, order_by=None):
+        """Songs whose features fall inside {feature: (low, high)} bounds
+
+        Either bound may be None. Results are ranked by how far they sit
+        towards the open end of each bound (higher for a lower bound only,
+        lower for an upper bound only), unless `order_by` names a single
+        feature to sort on, highest first.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        columns, signs = [], []
+        for name, (low, high) in bounds.items():
+            j = list(FEATURES).index(name)
+            columns.append(j)
+            signs.append(-1.0 if low is None and high is not None else 1.0)
+            if low is not None:
+                mask &= self.features[:, j] >= low
+            if high is not None:
+                mask &= self.features[:, j] <= high
+        positions = np.flatnonzero(mask)
+        if order_by is not None:
+            score = self.features[positions, list(FEATURES).index(order_by)]
+        else:
+            score = self.matrix[positions][:, columns] @ np.asarray(signs, dtype=np.float32) if columns \
+                else np.zeros(len(positions))
+        positions = positions[np.argsort(-score, kind="stable")][:limit]
+        return self._rows(positions)
+
+    def find(self, title, artist=None):
+        """Ids of songs with this title (case-insensitive), optionally by artist"""
+        matches = self._by_title.get(title.lower(), [])
+        if artist is not None:
+            matches = [i for i in matches if self.artists[i].lower() == artist.lower()]
+        return [str(self.ids[i]) for i in matches]
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        arrays = save_strings({"features": self.features}, ids=self.ids, titles=self.titles, artists=self.artists)
+        np.savez_compressed(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(load_strings(data, "ids"), load_strings(data, "titles"), load_strings(data, "artists"),
+                       data["features"])
+
+
+class SimilarityIndexBuilder:
+    """Collects the audio features of cleaned chunks as they stream past"""
+
+    def __init__(self):
+        self._ids, self._titles, self._artists, self._features = [], [], [], []
+
+    def add(self, chunk):
+        self._ids.append(chunk['track_id'].to_numpy(dtype=object))
+        self._titles.append(chunk['track_name'].to_numpy(dtype=object))
+        self._artists.append(chunk['track_artist'].to_numpy(dtype=object))
+        self._features.append(np.column_stack([
+            chunk[column].to_numpy(dtype=np.float32) for column in FEATURES.values()
+        ]))
+
+    def tap(self, chunks):
+        """Pass chunks through unchanged while adding them to the index"""
+        for chunk in chunks:
+            self.add(chunk)
+            yield chunk
+
+    def build(self):
+        if not self._ids:
+            return SimilarityIndex([], [], [], np.empty((0, len(FEATURES)), dtype=np.float32))
+        return SimilarityIndex(
+            np.concatenate(self._ids), np.concatenate(self._titles),
+            np.concatenate(self._artists), np.concatenate(self._features),
+        )
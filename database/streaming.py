@@ -0,0 +1,103 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from tracing import TRACER
+
+# Only the columns the loader writes are read, with dtypes fixed up front so
+# pandas never has to sniff (or upcast to object) a chunk on its own.
+CSV_DTYPES = {
+    'track_id': 'string',
+    'track_name': 'string',
+    'track_artist': 'string',
+    'track_popularity': 'Int64',
+    'track_album_id': 'string',
+    'track_album_name': 'string',
+    'track_album_release_date': 'string',
+    'playlist_genre': 'string',
+    'danceability': 'float64',
+    'energy': 'float64',
+    'duration_ms': 'Int64',
+}
+
+
+# The same columns held in Arrow memory, for dtype_backend="pyarrow".
+ARROW_DTYPES = {
+    'string': 'string[pyarrow]',
+    'Int64': 'int64[pyarrow]',
+    'float64': 'double[pyarrow]',
+}
+
+
+def read_csv_chunks(path, chunksize, dtype_backend=None):
+    """Yield the music CSV as DataFrames of at most `chunksize` rows
+
+    Pass dtype_backend="pyarrow" (pyarrow must be installed) to get
+    Arrow-backed columns, which store strings more compactly and speed up
+    `.str` operations.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = [col for col in CSV_DTYPES if col in header]
+    dtypes = {col: CSV_DTYPES[col] for col in usecols}
+    if dtype_backend == 'pyarrow':
+        dtypes = {col: ARROW_DTYPES[dtype] for col, dtype in dtypes.items()}
+    yield from pd.read_csv(path, usecols=usecols, dtype=dtypes, chunksize=chunksize)
+
+
+class TrackIdSet:
+    """Compact membership set of track ids for de-duplicating across chunks
+
+    Ids are stored as 64-bit hashes (8 bytes per track) instead of Python
+    strings, so a ten-million-track export costs ~80 MB rather than
+    gigabytes. A hash collision would drop one track; by the birthday bound
+    the odds of any collision are about three in a million at that scale.
+
+    Each chunk's new hashes become a sorted run, and runs of similar size are
+    merged, so every hash is re-sorted O(log n) times over the whole load and
+    a lookup searches only O(log n) runs.
+    """
+
+    def __init__(self):
+        self._runs = []
+
+    def __len__(self):
+        return sum(len(run) for run in self._runs)
+
+    def _seen(self, hashes):
+        # Sorted needles walk each run in order, which is far kinder to the cache
+        order = np.argsort(hashes)
+        needles = hashes[order]
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self._runs:
+            positions = np.searchsorted(run, needles)
+            hit = positions < len(run)
+            hit[hit] = run[positions[hit]] == needles[hit]
+            found |= hit
+        seen = np.empty_like(found)
+        seen[order] = found
+        return seen
+
+    def filter_new(self, track_ids):
+        """Return a boolean mask of ids not seen before, and remember them"""
+        hashes = pd.util.hash_array(np.asarray(track_ids, dtype=object))
+        mask = ~self._seen(hashes)
+        new = np.unique(hashes[mask])
+        if len(new):
+            self._runs.append(new)
+            while len(self._runs) > 1 and len(self._runs[-2]) <= 2 * len(self._runs[-1]):
+                last = self._runs.pop()
+                self._runs[-1] = np.sort(np.concatenate([self._runs[-1], last]), kind="stable")
+        return mask
+
+
+def clean_chunks(clean, chunks):
+    """Clean each chunk with `clean` (e.g. `loader.clean_data`), dropping ids seen in earlier chunks"""
+    seen = TrackIdSet()
+    for chunk in chunks:
+        start = time.perf_counter()
+        cleaned = clean(chunk)
+        cleaned = cleaned[seen.filter_new(cleaned['track_id'])]
+        TRACER.record("load.clean", time.perf_counter() - start, rows=len(cleaned))
+        if len(cleaned):
+            yield cleaned
@@ -1,16 +1,20 @@
 # test_neo4j.py
-from neo4j import GraphDatabase
-from config import NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD
+from database.driver import check_health, close_driver, read_session
 # import pandas as pd
 
 def test_neo4j_connection():
-    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
-    
     print("=" * 60)
     print("NEO4J DATABASE COMPREHENSIVE ANALYSIS")
     print("=" * 60)
     
-    with driver.session() as session:
+    health = check_health()
+    routing = "routing (cluster-aware)" if health["routing"] else "direct"
+    if not health["ok"]:
+        print(f"Neo4j is unreachable ({routing}): {health['error']}")
+        return
+    print(f"Connected to {health['server']} in {health['seconds'] * 1000:.0f} ms, {routing}")
+    
+    with read_session() as session:
         # 1. Database Overview
         print("\n1. DATABASE OVERVIEW")
         print("-" * 40)
@@ -176,7 +180,7 @@ def test_neo4j_connection():
             except Exception as e:
                 print(f"Query {i} failed: {e}")
     
-    driver.close()
+    close_driver()
     
     print("\n" + "=" * 60)
     print("ANALYSIS COMPLETE")
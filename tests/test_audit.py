@@ -0,0 +1,113 @@
+import json
+from types import SimpleNamespace
+
+from database.audit import (
+    audit, explain, filtered_properties, load_corpus, plan_operators, record_query, suggest_indexes,
+    unwritten_indexes, written_properties,
+)
+
+SCAN_PLAN = {
+    "operatorType": "ProduceResults@neo4j",
+    "args": {"Details": "title"},
+    "children": [{
+        "operatorType": "Filter@neo4j",
+        "args": {"Details": "al.year = $year"},
+        "children": [{"operatorType": "NodeByLabelScan@neo4j", "args": {"Details": "al:Album"}, "children": []}],
+    }],
+}
+
+SEEK_PLAN = {
+    "operatorType": "ProduceResults@neo4j",
+    "arguments": {"Details": "name"},
+    "children": [{"operatorType": "NodeUniqueIndexSeek@neo4j", "arguments": {"Details": "UNIQUE a:Artist(name)"}}],
+}
+
+ALBUMS_BY_YEAR = "MATCH (al:Album) WHERE al.year = $year AND al.title STARTS WITH 'A' RETURN al.title AS title"
+ARTIST_BY_NAME = "MATCH (a:Artist {name: $name}) RETURN a.name AS name"
+
+INDEXES = [
+    ("artist_name", "RANGE", "Artist", ("name",)),
+    ("album_title", "RANGE", "Album", ("title",)),
+    ("album_mood", "RANGE", "Album", ("mood",)),
+]
+
+
+class PlanSession:
+    """Session that answers SHOW INDEXES and EXPLAIN with canned plans"""
+
+    def __init__(self):
+        self.explained = []
+
+    def run(self, query, params=None):
+        if query.startswith("SHOW INDEXES"):
+            return [{"name": n, "type": t, "label": label, "properties": list(p)} for n, t, label, p in INDEXES]
+        cypher = query[len("EXPLAIN "):]
+        self.explained.append((cypher, params))
+        if "BROKEN" in cypher:
+            raise ValueError("Invalid input 'BROKEN'")
+        plan = SCAN_PLAN if ":Album" in cypher else SEEK_PLAN
+        return SimpleNamespace(consume=lambda: SimpleNamespace(plan=plan))
+
+
+def test_plan_operators_flattens_the_tree():
+    assert plan_operators(SCAN_PLAN) == [
+        ("ProduceResults", "title"), ("Filter", "al.year = $year"), ("NodeByLabelScan", "al:Album"),
+    ]
+    assert plan_operators(SEEK_PLAN)[1] == ("NodeUniqueIndexSeek", "UNIQUE a:Artist(name)")
+    assert plan_operators(None) == []
+
+
+def test_explain_keeps_only_scans():
+    session = PlanSession()
+    assert explain(session, ALBUMS_BY_YEAR, {"year": 1999}) == [("NodeByLabelScan", "al:Album")]
+    assert explain(session, ARTIST_BY_NAME) == []
+    assert session.explained[0] == (ALBUMS_BY_YEAR, {"year": 1999})
+
+
+def test_filtered_properties_reads_maps_and_where_clauses():
+    assert filtered_properties(ALBUMS_BY_YEAR) == {"Album": {"year", "title"}}
+    assert filtered_properties(ARTIST_BY_NAME) == {"Artist": {"name"}}
+
+
+def test_suggest_indexes_skips_indexed_and_unscanned_labels():
+    scans = [("NodeByLabelScan", "al:Album")]
+    assert suggest_indexes(ALBUMS_BY_YEAR, scans, INDEXES) == ["CREATE INDEX IF NOT EXISTS FOR (n:Album) ON (n.year)"]
+    assert suggest_indexes(ARTIST_BY_NAME, scans, INDEXES) == []
+
+
+def test_unwritten_indexes_uses_the_loader_queries():
+    written = written_properties()
+    assert {"title", "year", "releaseDate"} <= written["Album"]
+    assert "name" in written["Artist"]
+    assert unwritten_indexes(INDEXES, written) == [("album_mood", "Album", ("mood",))]
+
+
+def test_audit_reports_scans_failures_and_unwritten_indexes():
+    session = PlanSession()
+    report = audit(session, {ALBUMS_BY_YEAR: {}, ARTIST_BY_NAME: {"name": "Queen"}, "BROKEN $limit": {}})
+    scanning, failed = report["queries"]
+    assert scanning["cypher"] == ALBUMS_BY_YEAR
+    assert scanning["suggestions"] == ["CREATE INDEX IF NOT EXISTS FOR (n:Album) ON (n.year)"]
+    assert failed == {"cypher": "BROKEN $limit", "error": "Invalid input 'BROKEN'"}
+    assert report["unwritten_indexes"] == [("album_mood", "Album", ("mood",))]
+    params = dict(session.explained)
+    assert params[ALBUMS_BY_YEAR] == {"year": None}
+    assert params[ARTIST_BY_NAME] == {"name": "Queen"}
+    assert params["BROKEN $limit"] == {"limit": 10}
+
+
+def test_corpus_merges_templates_learned_store_and_log(tmp_path):
+    log = str(tmp_path / "queries.jsonl")
+    store = str(tmp_path / "templates.json")
+    record_query(ARTIST_BY_NAME, log)
+    record_query(ALBUMS_BY_YEAR, log)
+    record_query("", log)
+    with open(store, "w", encoding="utf-8") as f:
+        json.dump([{"cypher": ALBUMS_BY_YEAR, "defaults": {"year": 2000}}], f)
+
+    corpus = load_corpus(log, store)
+    assert corpus[ALBUMS_BY_YEAR] == {"year": 2000}
+    assert corpus[ARTIST_BY_NAME] == {}
+    assert len(load_corpus(str(tmp_path / "none.jsonl"), None)) == len(corpus) - 2
+    with open(log, encoding="utf-8") as f:
+        assert len(f.readlines()) == 2
@@ -0,0 +1,85 @@
+import csv
+import gzip
+import os
+
+import pytest
+
+from database import bulk_import
+from database.bulk_import import NODE_HEADERS, RELATIONSHIP_HEADERS, BulkImportWriter, write_import_files
+from database.loader import clean_music_data
+from database.manifest import load_manifest
+from tests.test_loader import songs
+
+
+def read_rows(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", newline="") as f:
+        return list(csv.reader(f))
+
+
+def chunks():
+    first = songs(("1", "Queen", 50), ("2", "Queen", 60))
+    first.loc[0, "track_name"] = 'Bohemian Rhapsody, "Live"'
+    second = songs(("3", "Queen", 70), ("4", "ABBA", 80))
+    second.loc[1, "track_album_release_date"] = "1976-10"
+    return [clean_music_data(first), clean_music_data(second)]
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_writer_output(tmp_path, compress):
+    writer = write_import_files(chunks(), str(tmp_path), compress)
+    files = {name: writer._path(name) for name in {**NODE_HEADERS, **RELATIONSHIP_HEADERS}}
+    assert all(path.endswith(".csv.gz" if compress else ".csv") for path in files.values())
+
+    for name, header in {**NODE_HEADERS, **RELATIONSHIP_HEADERS}.items():
+        assert read_rows(writer._path(name, header=True)) == [header]
+
+    assert read_rows(files["Artist"]) == [["Queen"], ["ABBA"]]
+    assert read_rows(files["Album"]) == [["album-Queen", "Queen Hits", "2019-01-01", "2019"],
+                                         ["album-ABBA", "ABBA Hits", "1976-10-01", "1976"]]
+    assert read_rows(files["Song"])[0] == ["1", 'Bohemian Rhapsody, "Live"', "200000", "50", "pop", "0.5", "0.5"]
+    assert [row[0] for row in read_rows(files["Song"])] == ["1", "2", "3", "4"]
+    assert read_rows(files["Genre"]) == [["pop"]]
+    assert read_rows(files["Year"]) == [["2019", "2019"], ["1976", "1976"]]
+    assert read_rows(files["SINGS"]) == [["Queen", "1"], ["Queen", "2"], ["Queen", "3"], ["ABBA", "4"]]
+    assert read_rows(files["CONTAINS"])[3] == ["album-ABBA", "4"]
+    assert read_rows(files["CREATED"]) == [["Queen", "album-Queen"], ["ABBA", "album-ABBA"]]
+    assert read_rows(files["RELEASED_IN"]) == [["album-Queen", "2019"], ["album-ABBA", "1976"]]
+    assert writer.counts["Song"] == 4 and writer.counts["Artist"] == 2
+
+
+def test_albums_without_a_release_date_are_exported_without_a_year(tmp_path):
+    data = songs(("1", "Queen", 50), ("2", "ABBA", 60))
+    data.loc[1, "track_album_release_date"] = "someday"
+    writer = write_import_files([clean_music_data(data)], str(tmp_path))
+    assert read_rows(writer._path("Album"))[1] == ["album-ABBA", "ABBA Hits", "", ""]
+    assert read_rows(writer._path("Year")) == [["2019", "2019"]]
+    assert read_rows(writer._path("RELEASED_IN")) == [["album-Queen", "2019"]]
+
+
+def test_writer_replaces_an_earlier_export(tmp_path):
+    write_import_files(chunks(), str(tmp_path))
+    writer = write_import_files(chunks()[1:], str(tmp_path))
+    assert [row[0] for row in read_rows(writer._path("Song"))] == ["3", "4"]
+
+
+def test_command_lists_every_file(tmp_path):
+    writer = BulkImportWriter(str(tmp_path))
+    command = writer.command()
+    for name in NODE_HEADERS:
+        assert f"--nodes={name}={writer._path(name, header=True)},{writer._path(name)}" in command
+    for name in RELATIONSHIP_HEADERS:
+        assert f"--relationships={name}={writer._path(name, header=True)},{writer._path(name)}" in command
+
+
+def test_export_writes_files_manifest_and_indexes(tmp_path, monkeypatch):
+    for name in ("LOAD_MANIFEST_FILE", "SIMILARITY_INDEX_FILE", "ENTITY_INDEX_FILE"):
+        monkeypatch.setattr(bulk_import, name, str(tmp_path / name.lower()))
+    path = str(tmp_path / "songs.csv")
+    songs(("1", "Queen", 50), ("2", "Queen", 60), ("2", "Queen", 60), ("3", "ABBA", 70)).to_csv(path, index=False)
+
+    writer = bulk_import.export_music_data(str(tmp_path / "import"), path=path, chunksize=2)
+    assert [row[0] for row in read_rows(writer._path("Song"))] == ["1", "2", "3"]
+    assert set(load_manifest(str(tmp_path / "load_manifest_file"))) == {"1", "2", "3"}
+    assert os.path.exists(str(tmp_path / "similarity_index_file"))
+    assert os.path.exists(str(tmp_path / "entity_index_file"))
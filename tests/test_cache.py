@@ -0,0 +1,46 @@
+import os
+
+from chatbot.cache import MemoryCacheBackend, QueryCache, ReloadingFile, cache_key, is_self_contained
+
+
+def test_follow_up_questions_are_not_cached():
+    assert is_self_contained("What are the most popular songs by Queen?")
+    assert not is_self_contained("What about their albums?")
+
+
+def test_cache_key_ignores_case_and_punctuation_but_not_version():
+    assert cache_key("Songs by Queen?", 1) == cache_key("  songs  by queen", 1)
+    assert cache_key("Songs by Queen?", 1) != cache_key("Songs by Queen?", 2)
+
+
+def test_memory_backend_evicts_least_recently_used():
+    cache = QueryCache(MemoryCacheBackend(max_entries=2))
+    cache.set("a", 1, "A")
+    cache.set("b", 1, "B")
+    assert cache.get("a", 1) == "A"
+    cache.set("c", 1, "C")
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 1) == "A"
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_reloading_file_rebuilds_when_the_file_is_replaced(tmp_path):
+    path = str(tmp_path / "index.txt")
+    builds = []
+
+    def build(path):
+        with open(path) as f:
+            builds.append(f.read())
+        return builds[-1]
+
+    loaded = ReloadingFile(path, build)
+    assert loaded.get() is None
+    with open(path, "w") as f:
+        f.write("v1")
+    assert loaded.get() == "v1"
+    assert loaded.get() == "v1"
+    with open(f"{path}.tmp", "w") as f:
+        f.write("v2")
+    os.replace(f"{path}.tmp", path)
+    assert loaded.get() == "v2"
+    assert builds == ["v1", "v2"]
@@ -0,0 +1,57 @@
+import json
+import threading
+
+from database.checkpoint import LoadCheckpoint
+
+
+def saved(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["batches"]
+
+
+def test_commits_are_saved_every_n_batches(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    checkpoint = LoadCheckpoint(path, {"size": 1}, save_every=3, save_seconds=3600)
+    checkpoint.commit("songs/0", 1)
+    checkpoint.commit("songs/0", 2)
+    assert not (tmp_path / "checkpoint.json").exists()
+    checkpoint.commit("albums/0", 1)
+    assert saved(path) == {"songs/0": 2, "albums/0": 1}
+    checkpoint.commit("songs/0", 3)
+    checkpoint.flush()
+    assert saved(path) == {"songs/0": 3, "albums/0": 1}
+
+
+def test_commits_are_saved_after_save_seconds(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    checkpoint = LoadCheckpoint(path, {"size": 1}, save_every=1000, save_seconds=0)
+    checkpoint.commit("songs/0", 1)
+    assert saved(path) == {"songs/0": 1}
+
+
+def test_resume_only_matches_the_same_source(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    checkpoint = LoadCheckpoint(path, {"size": 1}, save_every=1)
+    checkpoint.commit("songs/0", 4)
+    assert LoadCheckpoint.resume(path, {"size": 1}).done("songs/0") == 4
+    assert LoadCheckpoint.resume(path, {"size": 2}) is None
+    checkpoint.clear()
+    checkpoint.flush()
+    assert LoadCheckpoint.resume(path, {"size": 1}) is None
+
+
+def test_parallel_commits_all_reach_the_file(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    checkpoint = LoadCheckpoint(path, {"size": 1}, save_every=7, save_seconds=3600)
+
+    def worker(partition):
+        for batch in range(1, 51):
+            checkpoint.commit(f"rels/{partition}", batch)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    checkpoint.flush()
+    assert saved(path) == {f"rels/{n}": 50 for n in range(4)}
@@ -0,0 +1,74 @@
+from chatbot.context import ConversationContext, estimate_tokens, extractive_summarizer, llm_summarizer
+
+
+def chat(context, turns):
+    for n in range(turns):
+        context.add_user_message(f"Question {n} about Queen albums from the seventies?")
+        context.add_ai_message(f"Answer {n}. Queen released several albums then.")
+
+
+def test_messages_are_capped_and_clipped():
+    context = ConversationContext(max_messages=4, max_message_chars=10)
+    chat(context, 5)
+    assert len(context) == 4
+    assert context.evicted == 6
+    assert all(len(m["content"]) <= 10 for m in context)
+
+
+def test_evicted_turns_are_folded_into_the_summary():
+    context = ConversationContext(max_messages=4)
+    chat(context, 3)
+    assert "Question 0" in context.summary and "Answer 0" in context.summary
+    assert "Question 1" not in context.summary
+
+
+def test_prompt_stays_within_budget_as_the_chat_grows():
+    context = ConversationContext(max_prompt_tokens=120, max_summary_tokens=40, max_messages=100)
+    sizes = []
+    for n in range(30):
+        chat(context, 1)
+        context.add_user_message(f"And what about album {n}?")
+        prompt = context.contextual_query()
+        sizes.append(estimate_tokens(prompt))
+        assert prompt.endswith(f"User now asks: And what about album {n}?")
+    assert max(sizes) <= 120 + estimate_tokens("Summary of earlier conversation:\n\n\n")
+    assert estimate_tokens(context.summary) <= 40
+
+
+def test_first_question_is_sent_as_is():
+    context = ConversationContext()
+    context.add_user_message("Who sang Bohemian Rhapsody?")
+    assert context.contextual_query() == "Who sang Bohemian Rhapsody?"
+
+
+def test_clear_forgets_history_and_summary():
+    context = ConversationContext(max_messages=2)
+    chat(context, 2)
+    context.clear()
+    context.add_user_message("Fresh start?")
+    assert context.summary == ""
+    assert context.contextual_query() == "Fresh start?"
+
+
+def test_summaries_are_folded_once():
+    calls = []
+
+    def summarizer(summary, turns):
+        calls.append([turn["seq"] for turn in turns])
+        return extractive_summarizer(200)(summary, turns)
+
+    context = ConversationContext(max_messages=2, summarizer=summarizer)
+    chat(context, 3)
+    context.contextual_query()
+    seqs = [seq for call in calls for seq in call]
+    assert seqs == sorted(set(seqs))
+
+
+class FailingLLM:
+    def invoke(self, prompt):
+        raise TimeoutError("model unavailable")
+
+
+def test_llm_summarizer_falls_back_to_extractive():
+    turns = [{"role": "user", "content": "Songs by Queen? Thanks."}]
+    assert llm_summarizer(FailingLLM(), 50)("", turns) == "user: Songs by Queen?"
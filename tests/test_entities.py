@@ -0,0 +1,87 @@
+import pandas as pd
+import pytest
+
+from chatbot.entities import EntityResolver
+from database.entities import EntityIndex, EntityIndexBuilder, base_name, normalize_name
+
+ENTITIES = [
+    ("artist", "Queen", "Queen"),
+    ("artist", "Beyoncé", "Beyoncé"),
+    ("artist", "The Weeknd", "The Weeknd"),
+    ("artist", "Love", "Love"),
+    ("album", "A Night at the Opera", "album-1"),
+    ("song", "Bohemian Rhapsody - Remastered 2011", "song-1"),
+    ("song", "Bohemian Rhapsody (Live Aid)", "song-2"),
+    ("song", "Yesterday", "song-3"),
+]
+
+
+@pytest.fixture
+def resolver():
+    kinds, names, ids = zip(*ENTITIES)
+    return EntityResolver(EntityIndex(kinds, names, ids), threshold=0.8)
+
+
+def test_normalize_and_base_name():
+    assert normalize_name("Beyoncé!") == "beyonce"
+    assert base_name("Bohemian Rhapsody - Remastered 2011") == "Bohemian Rhapsody"
+    assert base_name("Queen") is None
+
+
+def test_cued_single_word_resolves_to_the_canonical_artist(resolver):
+    resolution = resolver.resolve("most popular songs by queen")
+    assert resolution.question == "most popular songs by Queen"
+    assert [(e.kind, e.name) for e in resolution.entities] == [("artist", "Queen")]
+    assert resolution.entities[0].condition() == 'Artist.name = "Queen"'
+
+
+def test_uncued_single_word_is_not_a_name(resolver):
+    resolution = resolver.resolve("I love rock songs by the weekend")
+    assert resolution.question == "I love rock songs by The Weeknd"
+    assert [e.name for e in resolution.entities] == ["The Weeknd"]
+    assert resolver.resolve("songs I played yesterday").entities == []
+
+
+def test_quoted_single_word_may_be_any_kind(resolver):
+    resolution = resolver.resolve("who sings 'yesterday'")
+    assert [(e.kind, e.ids) for e in resolution.entities] == [("song", ["song-3"])]
+
+
+def test_misspelt_name_resolves_fuzzily(resolver):
+    resolution = resolver.resolve("songs by Beyonse")
+    assert resolution.question == "songs by Beyoncé"
+    assert resolution.entities[0].score < 1
+
+
+def test_title_versions_resolve_together(resolver):
+    entity = resolver.resolve("how popular is bohemian rhapsody").entities[0]
+    assert (entity.kind, entity.name) == ("song", "Bohemian Rhapsody")
+    assert entity.condition() == 'Song.id IN ["song-2", "song-1"]'
+
+
+def test_hint_lists_resolved_names(resolver):
+    resolution = resolver.resolve("albums like a night at the opera")
+    assert 'A Night at the Opera (album): Album.id = "album-1"' in resolution.annotate("prompt")
+    assert resolver.resolve("what are the top songs").annotate("prompt") == "prompt"
+
+
+def test_index_round_trips_through_a_file(tmp_path):
+    kinds, names, ids = zip(*ENTITIES)
+    path = str(tmp_path / "entities.npz")
+    EntityIndex(kinds, names, ids).save(path)
+    assert EntityIndex.load(path).lookup("the weeknd") == {("artist", "The Weeknd"): ["The Weeknd"]}
+
+
+def test_builder_skips_missing_names():
+    chunk = pd.DataFrame({
+        "track_id": ["1", "2", "3"],
+        "track_name": ["Yesterday", None, "Help!"],
+        "track_artist": ["The Beatles", "The Beatles", None],
+        "track_album_id": ["album-1", None, "album-2"],
+        "track_album_name": ["Help!", "Abbey Road", None],
+    }).astype("string")
+    builder = EntityIndexBuilder()
+    builder.add(chunk)
+    index = builder.build()
+    assert sorted(index.names) == ["Help!", "Help!", "The Beatles", "Yesterday"]
+    assert index.lookup("nan") == {} and index.lookup("<NA>") == {}
@@ -0,0 +1,171 @@
+import os
+
+import pandas as pd
+import pytest
+
+from database import loader as loader_module
+from database.loader import (
+    ALBUM_QUERY, ARTIST_AGGREGATES_QUERY, CLEAR_QUERY, DELETE_SONGS_QUERY, RELEASED_IN_QUERY, SONG_QUERY,
+    UNLINK_SONGS_QUERY, UNLINK_YEARS_QUERY, YEAR_QUERY, Neo4jMusicLoader, clean_music_data, load_music_data,
+    normalize_release_dates,
+)
+from database.manifest import build_manifest, diff_manifests, load_manifest, save_manifest
+
+
+def songs(*rows):
+    """A raw CSV frame of (track_id, artist, popularity) songs, one album per artist"""
+    return pd.DataFrame([
+        {"track_id": track_id, "track_name": f"Song {track_id}", "track_artist": artist,
+         "track_album_id": f"album-{artist}", "track_album_name": f"{artist} Hits",
+         "track_album_release_date": "2019", "track_popularity": popularity, "playlist_genre": "pop",
+         "danceability": 0.5, "energy": 0.5, "duration_ms": 200000}
+        for track_id, artist, popularity in rows
+    ])
+
+
+class Result:
+    def __init__(self, records=()):
+        self.records = list(records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def single(self):
+        return {"version": 1}
+
+    def consume(self):
+        return None
+
+
+class RecordingDriver:
+    """Driver-shaped object that keeps every statement and its rows; can fail on a given query"""
+
+    def __init__(self, fail_on=None):
+        self.statements = []
+        self.fail_on = fail_on
+
+    def run(self, query, parameters=None, **kwargs):
+        if query == self.fail_on:
+            raise ConnectionError("database went away")
+        self.statements.append((query, kwargs.get("rows")))
+        return Result()
+
+    def session(self, **kwargs):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute_write(self, work):
+        return work(self)
+
+    def rows(self, query):
+        return [row for statement, rows in self.statements if statement == query for row in rows or ()]
+
+
+def test_normalize_release_dates():
+    dates = pd.Series(["2012", "2012-05", "2012-05-17", " 1999 ", "unknown", "2012-13", "", None])
+    assert normalize_release_dates(dates).tolist() == [
+        "2012-01-01", "2012-05-01", "2012-05-17", "1999-01-01", pd.NA, pd.NA, pd.NA, pd.NA,
+    ]
+
+
+def test_albums_without_a_release_date_get_no_year():
+    data = songs(("1", "Queen", 50), ("2", "ABBA", 60))
+    data.loc[1, "track_album_release_date"] = "someday"
+    driver = RecordingDriver()
+    Neo4jMusicLoader(driver=driver).load_data(clean_music_data(data))
+
+    albums = {row["id"]: row for row in driver.rows(ALBUM_QUERY)}
+    assert albums["album-ABBA"]["release_date"] is None and albums["album-ABBA"]["year"] is None
+    assert albums["album-Queen"]["year"] == 2019
+    assert driver.rows(YEAR_QUERY) == [{"value": 2019}]
+    assert [row["id"] for row in driver.rows(RELEASED_IN_QUERY)] == ["album-Queen"]
+    assert [row["id"] for row in driver.rows(UNLINK_YEARS_QUERY)] == ["album-ABBA"]
+
+
+def test_diff_manifests():
+    old = {"a": ["h1", "X", "x"], "b": ["h2", "Y", "y"], "c": ["h3", "Z", "z"]}
+    new = {"a": ["h1", "X", "x"], "b": ["h9", "Y", "y"], "d": ["h4", "W", "w"]}
+    assert diff_manifests(old, new) == (["d"], ["b"], ["c"])
+
+
+def test_manifest_fingerprints_only_change_with_graph_columns(tmp_path):
+    before = build_manifest(clean_music_data(songs(("1", "Queen", 50))))
+    assert build_manifest(clean_music_data(songs(("1", "Queen", 50)))) == before
+    assert build_manifest(clean_music_data(songs(("1", "Queen", 51))))["1"][0] != before["1"][0]
+    path = str(tmp_path / "manifest.json")
+    save_manifest(before, path)
+    assert load_manifest(path) == before
+    assert load_manifest(str(tmp_path / "missing.json")) is None
+
+
+def test_manifest_with_a_missing_album_id_can_be_saved(tmp_path):
+    data = songs(("1", "Queen", 50), ("2", "ABBA", 60))
+    data.loc[1, "track_album_id"] = None
+    manifest = build_manifest(clean_music_data(data.astype({"track_album_id": "string"})))
+    assert manifest["2"][2] is None
+    path = str(tmp_path / "manifest.json")
+    save_manifest(manifest, path)
+    assert load_manifest(path) == manifest
+
+
+def test_sync_without_manifest_runs_a_full_load(tmp_path):
+    driver = RecordingDriver()
+    manifest = {}
+    Neo4jMusicLoader(driver=driver).sync_data(
+        clean_music_data(songs(("1", "Queen", 50))), manifest, str(tmp_path / "manifest.json")
+    )
+    assert driver.statements[0][0] == CLEAR_QUERY
+    assert set(manifest) == {"1"}
+
+
+def test_sync_writes_only_the_delta(tmp_path):
+    path = str(tmp_path / "manifest.json")
+    save_manifest(build_manifest(clean_music_data(songs(("1", "Queen", 50), ("2", "Queen", 60), ("3", "ABBA", 70)))),
+                  path)
+    driver = RecordingDriver()
+    loader = Neo4jMusicLoader(driver=driver)
+    manifest = {}
+    stats = loader.sync_data(clean_music_data(songs(("1", "Queen", 50), ("2", "Queen", 65), ("4", "Muse", 80))),
+                             manifest, path)
+
+    assert (stats["inserted"], stats["changed"], stats["deleted"]) == (1, 1, 1)
+    assert CLEAR_QUERY not in [query for query, _ in driver.statements]
+    assert sorted(row["id"] for row in driver.rows(SONG_QUERY)) == ["2", "4"]
+    assert [row["id"] for row in driver.rows(UNLINK_SONGS_QUERY)] == ["2"]
+    assert [row["id"] for row in driver.rows(DELETE_SONGS_QUERY)] == ["3"]
+    assert loader.touched_artists == {"Queen", "Muse", "ABBA"}
+    assert set(manifest) == {"1", "2", "4"}
+    # Saving is left to the caller, once the post-load steps have committed
+    assert set(load_manifest(path)) == {"1", "2", "3"}
+
+
+@pytest.fixture
+def load_files(tmp_path, monkeypatch):
+    for name in ("LOAD_MANIFEST_FILE", "LOAD_CHECKPOINT_FILE", "SIMILARITY_INDEX_FILE", "ENTITY_INDEX_FILE",
+                 "METRICS_FILE"):
+        monkeypatch.setattr(loader_module, name, str(tmp_path / name.lower()))
+    return tmp_path
+
+
+def test_failed_aggregates_leave_the_delta_for_the_next_run(load_files, monkeypatch):
+    manifest_path = str(load_files / "load_manifest_file")
+    save_manifest(build_manifest(clean_music_data(songs(("1", "Queen", 50)))), manifest_path)
+    csv = str(load_files / "songs.csv")
+    songs(("1", "Queen", 55), ("2", "Muse", 60)).to_csv(csv, index=False)
+
+    failing = RecordingDriver(fail_on=ARTIST_AGGREGATES_QUERY)
+    monkeypatch.setattr(loader_module, "get_driver", lambda: failing)
+    load_music_data(path=csv)
+    assert set(load_manifest(manifest_path)) == {"1"}
+
+    driver = RecordingDriver()
+    monkeypatch.setattr(loader_module, "get_driver", lambda: driver)
+    load_music_data(path=csv, resume=True)
+    assert sorted(row["name"] for row in driver.rows(ARTIST_AGGREGATES_QUERY)) == ["Muse", "Queen"]
+    assert set(load_manifest(manifest_path)) == {"1", "2"}
+    assert not os.path.exists(str(load_files / "load_checkpoint_file"))
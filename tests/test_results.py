@@ -0,0 +1,72 @@
+from chatbot.results import ResultPager, limit_cypher, limit_params, qa_context
+
+
+def test_appends_missing_limit():
+    assert limit_cypher("MATCH (s:Song) RETURN s.title", 100) == "MATCH (s:Song) RETURN s.title\nLIMIT 100"
+
+
+def test_lowers_larger_literal_limit():
+    assert limit_cypher("MATCH (s:Song) RETURN s LIMIT 5000;", 100) == "MATCH (s:Song) RETURN s LIMIT 100"
+
+
+def test_keeps_smaller_literal_limit():
+    assert limit_cypher("MATCH (s:Song) RETURN s LIMIT 5", 100) == "MATCH (s:Song) RETURN s LIMIT 5"
+
+
+def test_keeps_parameter_and_expression_limits():
+    for cypher in ("MATCH (s:Song) RETURN s LIMIT $limit", "MATCH (s:Song) RETURN s LIMIT toInteger(5)",
+                   "MATCH (s:Song) RETURN s LIMIT 2 * $n"):
+        assert limit_cypher(cypher, 100) == cypher
+
+
+def test_limit_inside_subquery_or_earlier_part_is_not_final():
+    cypher = "MATCH (a:Artist) WITH a LIMIT 5 MATCH (a)-[:SINGS]->(s) RETURN s"
+    assert limit_cypher(cypher, 100) == f"{cypher}\nLIMIT 100"
+    cypher = "CALL { MATCH (s:Song) RETURN s LIMIT 5 } RETURN s"
+    assert limit_cypher(cypher, 100) == f"{cypher}\nLIMIT 100"
+
+
+def test_limit_in_a_string_is_not_a_clause():
+    cypher = "MATCH (s:Song {title: 'No Limit 5'}) RETURN s"
+    assert limit_cypher(cypher, 100) == f"{cypher}\nLIMIT 100"
+
+
+def test_union_is_capped_as_a_whole():
+    cypher = "MATCH (a:Artist) RETURN a.name AS name UNION MATCH (s:Song) RETURN s.title AS name LIMIT 5"
+    assert limit_cypher(cypher, 100) == f"CALL {{\n{cypher}\n}}\nRETURN *\nLIMIT 100"
+
+
+def test_union_in_a_string_is_not_a_clause():
+    cypher = "MATCH (s:Song {title: 'Union'}) RETURN s"
+    assert limit_cypher(cypher, 100) == f"{cypher}\nLIMIT 100"
+
+
+def test_limit_params_clamps_only_larger_limits():
+    assert limit_params({"limit": 5000, "artist": "Queen"}, 100) == {"limit": 100, "artist": "Queen"}
+    assert limit_params({"limit": 10}, 100) == {"limit": 10}
+    assert limit_params({}, 100) == {}
+
+
+def test_qa_context_summarises_long_results():
+    rows = [{"title": f"Song {i}", "popularity": i} for i in range(30)]
+    assert qa_context(rows[:3], 25) == rows[:3]
+    context = qa_context(rows, 25, truncated=True)[0]
+    assert context["total_rows"] == "more than 30"
+    assert context["columns"]["popularity"] == {"min": 0, "max": 29, "mean": 14.5}
+    assert context["first_25_rows"] == rows[:25]
+
+
+def test_pager_fetches_later_pages_only_when_truncated():
+    calls = []
+
+    def fetch(cypher, params):
+        calls.append(params)
+        return [{"n": i} for i in range(params["_skip"], params["_skip"] + 2)]
+
+    pager = ResultPager([{"n": 0}, {"n": 1}, {"n": 2}], 2, truncated=True, cypher="MATCH (n) RETURN n", fetch=fetch)
+    assert pager.rows == [{"n": 0}, {"n": 1}]
+    assert pager.load_more() == [{"n": 2}]
+    assert not calls
+    assert pager.load_more() == [{"n": 3}, {"n": 4}]
+    assert calls == [{"_skip": 3, "_limit": 3}]
+    assert pager.exhausted
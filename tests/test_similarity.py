@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from chatbot.tools import SimilarityTool
+from database import similarity as similarity_module
+from database.similarity import FEATURES, SimilarityIndex, SimilarityIndexBuilder
+
+# danceability, energy, popularity, duration
+SONGS = [
+    ("1", "Bohemian Rhapsody", "Queen", (0.4, 0.4, 80, 354000)),
+    ("2", "Somebody to Love", "Queen", (0.45, 0.45, 75, 296000)),
+    ("3", "Dancing Queen", "ABBA", (0.9, 0.9, 85, 231000)),
+    ("4", "Gimme! Gimme! Gimme!", "ABBA", (0.85, 0.95, 70, 292000)),
+    ("5", "Hurt", "Johnny Cash", (0.2, 0.1, 60, 218000)),
+    ("6", "Dancing Queen", "Cover Band", (0.8, 0.7, 10, 240000)),
+]
+
+
+def build(monkeypatch=None, tree=False):
+    if not tree:
+        monkeypatch.setattr(similarity_module, "cKDTree", None)
+    ids, titles, artists, features = zip(*SONGS)
+    return SimilarityIndex(ids, titles, artists, np.array(features))
+
+
+def nearest(song_id, k):
+    """Reference k-NN: z-score every feature, then sort by Euclidean distance"""
+    features = np.array([song[3] for song in SONGS], dtype=float)
+    matrix = (features - features.mean(axis=0)) / features.std(axis=0)
+    i = [song[0] for song in SONGS].index(song_id)
+    distances = np.linalg.norm(matrix - matrix[i], axis=1)
+    return [SONGS[j][0] for j in np.argsort(distances) if j != i][:k]
+
+
+def test_knn_brute_force_orders_by_normalised_distance(monkeypatch):
+    index = build(monkeypatch)
+    assert index._tree is None
+    for song_id, *_ in SONGS:
+        assert [row["id"] for row in index.similar_to(song_id, k=3)] == nearest(song_id, 3)
+    rows = index.similar_to("1", k=3)
+    assert rows == sorted(rows, key=lambda row: row["distance"])
+    assert all(row["id"] != "1" for row in index.similar_to("1", k=10))
+    assert len(index.similar_to("1", k=10)) == 5
+    assert index.similar_to("missing") == []
+
+
+def test_knn_tree_matches_brute_force(monkeypatch):
+    pytest.importorskip("scipy")
+    tree = build(tree=True)
+    assert tree._tree is not None
+    for song_id, *_ in SONGS:
+        assert tree.similar_to(song_id, k=3) == build(monkeypatch).similar_to(song_id, k=3)
+
+
+def test_range_query_bounds_and_order(monkeypatch):
+    index = build(monkeypatch)
+    rows = index.range_query({"energy": (0.6, None)})
+    assert [row["id"] for row in rows] == ["4", "3", "6"]
+    rows = index.range_query({"energy": (0.3, 0.8)}, order_by="popularity")
+    assert [row["id"] for row in rows] == ["1", "2", "6"]
+    assert [row["id"] for row in index.range_query({"energy": (None, 0.3)})] == ["5"]
+    assert len(index.range_query({}, limit=2)) == 2
+
+
+def test_find_by_title_and_artist(monkeypatch):
+    index = build(monkeypatch)
+    assert index.find("dancing queen") == ["3", "6"]
+    assert index.find("Dancing Queen", "abba") == ["3"]
+    assert index.find("Yesterday") == []
+
+
+def test_save_and_load_round_trip(monkeypatch, tmp_path):
+    index = build(monkeypatch)
+    path = str(tmp_path / "similarity.npz")
+    index.save(path)
+    loaded = SimilarityIndex.load(path)
+    assert loaded.ids.dtype == object and loaded.titles.dtype == object
+    assert loaded.similar_to("1", k=3) == index.similar_to("1", k=3)
+    with np.load(path) as data:
+        assert all(data[name].dtype.kind != "U" for name in data.files)
+
+
+def test_builder_collects_chunks(monkeypatch):
+    monkeypatch.setattr(similarity_module, "cKDTree", None)
+    frame = pd.DataFrame([
+        {"track_id": song_id, "track_name": title, "track_artist": artist,
+         **dict(zip(FEATURES.values(), features))}
+        for song_id, title, artist, features in SONGS
+    ]).astype({"track_artist": "category"})
+    builder = SimilarityIndexBuilder()
+    assert list(builder.tap([frame[:3], frame[3:]])) and len(builder.build()) == 6
+    assert builder.build().similar_to("1", k=3) == build(monkeypatch).similar_to("1", k=3)
+    assert len(SimilarityIndexBuilder().build()) == 0
+
+
+def test_tool_routes_similar_questions(monkeypatch):
+    tool = SimilarityTool(build(monkeypatch))
+    match = tool.match("Find 2 songs similar to 'Bohemian Rhapsody' by Queen")
+    assert match.name == "similar_songs"
+    assert [row["id"] for row in match.rows] == nearest("1", 2)
+    assert tool.match("songs like Dancing Queen by ABBA").rows[0]["id"] == "4"
+    assert tool.match("songs like Yesterday") is None
+
+
+def test_tool_routes_range_questions(monkeypatch):
+    tool = SimilarityTool(build(monkeypatch))
+    match = tool.match("show me 3 high energy songs")
+    assert match.name == "audio_feature_range"
+    assert [row["id"] for row in match.rows] == ["4", "3"]
+    assert [row["id"] for row in tool.match("songs with low danceability").rows] == ["5", "1"]
+    assert tool.match("who sang Hurt") is None
+
+
+def test_load_reads_indexes_saved_as_fixed_width_strings(monkeypatch, tmp_path):
+    monkeypatch.setattr(similarity_module, "cKDTree", None)
+    ids, titles, artists, features = zip(*SONGS)
+    path = str(tmp_path / "old.npz")
+    np.savez_compressed(path, ids=np.array(ids), titles=np.array(titles), artists=np.array(artists),
+                        features=np.array(features, dtype=np.float32))
+    assert SimilarityIndex.load(path).find("Hurt") == ["5"]
@@ -0,0 +1,79 @@
+import asyncio
+
+from benchmarks.standin import StandInDriver
+from chatbot.streaming import astream_answer, extract_cypher, stream_answer
+from chatbot.templates import TemplateEngine
+from chatbot.tools import ToolMatch
+from tracing import Tracer
+
+GENERATED = "MATCH (s:Song) RETURN s.title AS title"
+
+
+class FakeLLM:
+    def __init__(self, text):
+        self.text = text
+
+    def invoke(self, inputs):
+        return self.text
+
+    def stream(self, inputs):
+        yield self.text
+
+
+class FakeChain:
+    graph_schema = "schema"
+
+    def __init__(self):
+        self.cypher_generation_chain = FakeLLM(f"```cypher\n{GENERATED}\n```")
+        self.qa_chain = FakeLLM("answer")
+
+
+def answer(match):
+    events = stream_answer(FakeChain(), None, "question", match=match, tracer=Tracer(), driver=StandInDriver())
+    return [(event.kind, event.source if event.kind == "cypher" else event.value) for event in events]
+
+
+def test_template_with_no_rows_falls_back_to_generated_cypher():
+    match = TemplateEngine().match("most popular songs by Queen")
+    assert answer(match) == [
+        ("cypher", "template"), ("context", []),
+        ("cypher", "llm"), ("context", []),
+        ("token", "answer"), ("done", "answer"),
+    ]
+
+
+def test_tool_rows_are_answered_without_a_query():
+    rows = [{"title": "Song"}]
+    assert answer(ToolMatch("similar_songs", rows)) == [
+        ("cypher", "tool"), ("context", rows), ("token", "answer"), ("done", "answer"),
+    ]
+
+
+class RecordingExecutor:
+    def __init__(self):
+        self.calls = []
+
+    async def invoke(self, runnable, inputs):
+        self.calls.append("invoke")
+        return runnable.invoke(inputs)
+
+    async def stream(self, runnable, inputs):
+        self.calls.append("stream")
+        for chunk in runnable.stream(inputs):
+            yield chunk
+
+
+def test_async_cache_hit_makes_no_llm_call():
+    executor = RecordingExecutor()
+
+    async def collect():
+        events = astream_answer(executor, FakeChain(), None, "question", lookup=lambda: "cached", tracer=Tracer())
+        return [event.kind async for event in events]
+
+    assert asyncio.run(collect()) == ["done"]
+    assert executor.calls == []
+
+
+def test_extract_cypher_strips_fences():
+    assert extract_cypher(f"```cypher\n{GENERATED}\n```") == GENERATED
+    assert extract_cypher(GENERATED) == GENERATED
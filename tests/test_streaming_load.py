@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+from database.streaming import TrackIdSet, clean_chunks
+
+
+def test_track_id_set_remembers_ids_across_chunks():
+    seen = TrackIdSet()
+    assert seen.filter_new(["a", "b"]).tolist() == [True, True]
+    assert seen.filter_new(["b", "c", "a", "d"]).tolist() == [False, True, False, True]
+    assert len(seen) == 4
+
+
+def test_track_id_set_keeps_few_runs():
+    seen = TrackIdSet()
+    for start in range(0, 10000, 100):
+        assert seen.filter_new([str(n) for n in range(start, start + 100)]).all()
+    assert len(seen) == 10000
+    assert len(seen._runs) <= 2 * int(np.log2(100)) + 1
+    assert not seen.filter_new([str(n) for n in range(0, 10000, 7)]).any()
+
+
+def test_clean_chunks_drops_ids_from_earlier_chunks():
+    chunks = [pd.DataFrame({"track_id": ["a", "b"]}), pd.DataFrame({"track_id": ["b", "c"]}),
+              pd.DataFrame({"track_id": ["a"]})]
+    cleaned = list(clean_chunks(lambda chunk: chunk, chunks))
+    assert [chunk["track_id"].tolist() for chunk in cleaned] == [["a", "b"], ["c"]]
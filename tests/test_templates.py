@@ -0,0 +1,65 @@
+from chatbot.templates import TemplateEngine, clean_question, generalize
+
+ARTIST_CYPHER = "MATCH (a:Artist {name: 'Queen'})-[:SINGS]->(s:Song) RETURN s.title AS title LIMIT 5"
+
+
+def test_builtin_template_fills_slots_and_defaults():
+    match = TemplateEngine().match("What are the most popular songs by Queen?")
+    assert match.template.name == "most_popular_songs_by_artist"
+    assert match.params == {"artist": "Queen", "limit": 10}
+    match = TemplateEngine().match("top 5 most popular songs by The Weeknd")
+    assert match.params == {"artist": "The Weeknd", "limit": 5}
+
+
+def test_name_slot_does_not_swallow_trailing_qualifiers():
+    engine = TemplateEngine()
+    assert engine.match("what are the most popular songs by Queen released after 1980?") is None
+    assert engine.match("most popular songs by Queen from 1975") is None
+    assert engine.match("most popular songs by Queen with more than 1 billion streams") is None
+
+
+def test_name_may_start_with_a_qualifier_word():
+    match = TemplateEngine().match("most popular songs by In Flames")
+    assert match.params["artist"] == "In Flames"
+
+
+def test_clean_question_keeps_casing():
+    assert clean_question("  songs   by Queen?! ") == "songs by Queen"
+
+
+def test_generalize_turns_literals_into_slots():
+    template = generalize("top 5 songs by Queen", ARTIST_CYPHER)
+    assert template.slots == {"s0": "str", "s1": "int"}
+    assert "'Queen'" not in template.cypher and "$s0" in template.cypher
+    assert template.cypher.endswith("LIMIT $s1")
+    assert template.match("top 20 songs by Metallica") == {"s0": "Metallica", "s1": 20}
+
+
+def test_learned_name_slot_does_not_swallow_trailing_qualifiers():
+    template = generalize("songs by Queen", ARTIST_CYPHER)
+    assert template.match("songs by Metallica") == {"s0": "Metallica"}
+    assert template.match("songs by Queen released after 1990") is None
+
+
+def test_generalize_leaves_numbers_inside_strings_alone():
+    cypher = "MATCH (s:Song) WHERE s.title = 'Song 2' OR s.title = 'Song 3' RETURN s LIMIT 3"
+    template = generalize("show 3 versions of Song 2", cypher)
+    assert template.cypher == "MATCH (s:Song) WHERE s.title = $s0 OR s.title = 'Song 3' RETURN s LIMIT $s1"
+
+
+def test_generalize_refuses_writes():
+    assert generalize("delete Queen", "MATCH (a:Artist {name: 'Queen'}) DETACH DELETE a") is None
+
+
+def test_learned_templates_persist_and_evict_the_coldest(tmp_path):
+    path = tmp_path / "templates.json"
+    engine = TemplateEngine(str(path), max_learned=2)
+    engine.learn("songs by Queen", ARTIST_CYPHER)
+    engine.learn("albums by Queen", "MATCH (a:Artist {name: 'Queen'})-[:CREATED]->(al) RETURN al.title")
+    assert engine.match("songs by Metallica").params == {"s0": "Metallica"}
+
+    engine.learn("genres of Queen", "MATCH (a:Artist {name: 'Queen'})-[:SINGS]->(s) RETURN DISTINCT s.genre")
+    reloaded = TemplateEngine(str(path), max_learned=2)
+    assert len(reloaded.learned) == 2
+    assert reloaded.match("songs by Metallica") is not None
+    assert reloaded.match("albums by Metallica") is None
@@ -0,0 +1,31 @@
+import json
+
+from tracing import Tracer
+
+
+def test_spans_feed_histograms_and_counters():
+    tracer = Tracer()
+    with tracer.span("answer") as root:
+        tracer.span("db_execution", parent=root, rows=3).end()
+    text = tracer.prometheus_text()
+    assert 'melodia_span_seconds_count{span="answer"} 1' in text
+    assert 'melodia_rows_total{span="db_execution"} 3' in text
+
+
+def test_trace_log_is_written_in_the_background_and_rotated(tmp_path):
+    path = str(tmp_path / "traces.jsonl")
+    tracer = Tracer(path, log_max_bytes=1)
+    tracer.span("first").end()
+    tracer._log.flush()
+    tracer.span("second").end()
+    tracer._log.flush()
+    with open(f"{path}.1") as f:
+        assert json.loads(f.read())["name"] == "first"
+    with open(path) as f:
+        assert json.loads(f.read())["name"] == "second"
+
+
+def test_no_trace_log_without_a_path():
+    tracer = Tracer()
+    tracer.span("answer").end()
+    assert tracer._log is None
@@ -0,0 +1,261 @@
+import atexit
+import contextvars
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import TRACE_LOG_FILE, TRACE_LOG_MAX_BYTES
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Span attributes that are summed into per-span counters
+COUNTED_ATTRIBUTES = ("rows", "tokens", "db_hits")
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Histogram:
+    """Cumulative Prometheus-style histogram"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+class TraceLog:
+    """JSON-lines span log written from a background thread
+
+    Finishing a span only queues its entry, so no request waits on disk.
+    The writer appends whatever has queued up in one go and rotates the
+    file to `<path>.1` once it passes `max_bytes`. If it falls `max_pending`
+    entries behind, new entries are dropped and counted instead.
+    """
+
+    def __init__(self, path, max_bytes=0, max_pending=10000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.dropped = 0
+        self._queue = queue.Queue(max_pending)
+        threading.Thread(target=self._run, name="melodia-trace-log", daemon=True).start()
+        atexit.register(self.flush)
+
+    def write(self, entry):
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """Wait until every queued entry is on disk"""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            entries = [self._queue.get()]
+            while True:
+                try:
+                    entries.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._append(entries)
+            except OSError:
+                self.dropped += len(entries)
+            finally:
+                for _ in entries:
+                    self._queue.task_done()
+
+    def _append(self, entries):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if self.max_bytes and os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+            os.replace(self.path, f"{self.path}.1")
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(entry, default=str) + "\n" for entry in entries))
+
+
+class Span:
+    """One timed stage; numeric attributes in COUNTED_ATTRIBUTES become counters"""
+
+    def __init__(self, tracer, name, parent=None, attrs=None):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else uuid.uuid4().hex[:16]
+        self.span_id = uuid.uuid4().hex[:8]
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attrs = dict(attrs or {})
+        self.error = None
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.seconds = None
+        self._token = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+        return self
+
+    def add(self, key, amount=1):
+        self.attrs[key] = self.attrs.get(key, 0) + amount
+        return self
+
+    def elapsed(self):
+        """Seconds since the span started"""
+        return time.perf_counter() - self._start
+
+    def end(self, error=None):
+        """Finish the span (idempotent) and hand it to the tracer"""
+        if self.seconds is None:
+            self.seconds = time.perf_counter() - self._start
+            self.error = error
+            self.tracer._finish(self)
+        return self.seconds
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        self.end(repr(exc) if exc is not None else None)
+        return False
+
+
+class Tracer:
+    """Collects spans into latency histograms and counters, and logs them as JSON
+
+    `span()` nests under the active span of the calling context when used as
+    a context manager. Code that yields in the middle of a stage (streamed
+    answers) passes `parent` explicitly and calls `end()` instead, so no
+    context variable is left set across a yield.
+    """
+
+    def __init__(self, log_path=None, buckets=DEFAULT_BUCKETS, log_max_bytes=TRACE_LOG_MAX_BYTES):
+        self.log_path = log_path
+        self.log_max_bytes = log_max_bytes
+        self._log = None
+        self.buckets = buckets
+        self.histograms = {}
+        self.counters = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def span(self, name, parent=None, **attrs):
+        return Span(self, name, parent if parent is not None else _current_span.get(), attrs)
+
+    def record(self, name, seconds, parent=None, **attrs):
+        """Add a span for a stage that was timed elsewhere"""
+        span = self.span(name, parent, **attrs)
+        span.started_at -= seconds
+        span._start -= seconds
+        span.end()
+        return span
+
+    def _finish(self, span):
+        with self._lock:
+            histogram = self.histograms.get(span.name)
+            if histogram is None:
+                histogram = self.histograms[span.name] = Histogram(self.buckets)
+            histogram.observe(span.seconds)
+            for key in COUNTED_ATTRIBUTES:
+                value = span.attrs.get(key)
+                if isinstance(value, (int, float)):
+                    self.counters[(key, span.name)] = self.counters.get((key, span.name), 0) + value
+            if span.error is not None:
+                self.errors[span.name] = self.errors.get(span.name, 0) + 1
+            if self.log_path:
+                self._write_log(span)
+
+    def _write_log(self, span):
+        if self._log is None or self._log.path != self.log_path:
+            self._log = TraceLog(self.log_path, self.log_max_bytes)
+        self._log.write({
+            "trace": span.trace_id, "span": span.span_id, "parent": span.parent_id,
+            "name": span.name, "start": round(span.started_at, 6), "seconds": round(span.seconds, 6),
+            "attrs": dict(span.attrs), "error": span.error,
+        })
+
+    def prometheus_text(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = [
+            "# HELP melodia_span_seconds Duration of traced stages",
+            "# TYPE melodia_span_seconds histogram",
+        ]
+        with self._lock:
+            for name, histogram in sorted(self.histograms.items()):
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    lines.append(f'melodia_span_seconds_bucket{{span="{name}",le="{bound}"}} {count}')
+                lines.append(f'melodia_span_seconds_bucket{{span="{name}",le="+Inf"}} {histogram.count}')
+                lines.append(f'melodia_span_seconds_sum{{span="{name}"}} {histogram.sum:.6f}')
+                lines.append(f'melodia_span_seconds_count{{span="{name}"}} {histogram.count}')
+            for key in COUNTED_ATTRIBUTES:
+                lines.append(f"# TYPE melodia_{key}_total counter")
+                for (counted, name), value in sorted(self.counters.items()):
+                    if counted == key:
+                        lines.append(f'melodia_{key}_total{{span="{name}"}} {value}')
+            lines.append("# TYPE melodia_span_errors_total counter")
+            for name, value in sorted(self.errors.items()):
+                lines.append(f'melodia_span_errors_total{{span="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def write_metrics(self, path):
+        """Write the Prometheus text to a file (node_exporter textfile collector)"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+    def serve_metrics(self, port, host="0.0.0.0", readiness=None):
+        """Serve /metrics (and /ready, given `readiness`) on a daemon thread and return the server
+
+        `readiness` returns a dict with a boolean "ready"; /ready answers 200
+        with it as JSON once ready and 503 until then.
+        """
+        tracer = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def _send(self, status, body, content_type):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                path = self.path.split("?")[0]
+                if path == "/metrics":
+                    self._send(200, tracer.prometheus_text().encode("utf-8"), "text/plain; version=0.0.4")
+                elif path == "/ready" and readiness is not None:
+                    status = readiness()
+                    body = json.dumps(status, default=str).encode("utf-8")
+                    self._send(200 if status.get("ready") else 503, body, "application/json")
+                else:
+                    self.send_error(404)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="melodia-metrics", daemon=True).start()
+        return server
+
+
+# Process-wide tracer used by the app and the loader
+TRACER = Tracer(TRACE_LOG_FILE or None)